@@ -0,0 +1,356 @@
+"""
+Telemetry alert rules, evaluated after every telemetry tick.
+
+Rules are compiled against the reference-data equipment list into groups that
+share a target (one tag, one equipment type or the whole fleet), metric, kind
+and direction. Each group holds the device positions it applies to and its
+rules' thresholds as columns, so one tick is a handful of array operations per
+group over only the devices that group covers; no per-device Python loop.
+
+Per (rule, device) the engine keeps when the condition started to hold and
+whether the alert is active:
+- fires once the condition has held for duration_seconds;
+- clears only when the value is back past clear_threshold (hysteresis);
+- a device without a reading yet (NaN) neither fires nor clears.
+Only transitions are reported, so a standing alert is logged once when raised
+and once when cleared. Transitions go to system_logs (module ALERTS) in one
+batch per tick; active alerts are kept in memory for the live views.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.metrics import ALERT_EVAL_SECONDS, ALERT_TRANSITIONS, ALERTS_ACTIVE
+from app.core.reference_data import EquipmentRef, ReferenceData, reference_data
+from app.models.alert import AlertRule
+from app.models.log import SystemLog
+
+METRICS = ("temperature", "vibration")
+KINDS = ("threshold", "rate")
+DIRECTIONS = ("above", "below")
+SEVERITIES = ("warning", "critical")
+METRIC_UNITS = {"temperature": "°C", "vibration": "mm/s"}
+
+
+class RuleSpec(NamedTuple):
+    """Detached copy of an enabled AlertRule."""
+    id: str
+    name: str
+    equipment_type: Optional[str]
+    equipment_tag: Optional[str]
+    metric: str
+    kind: str
+    direction: str
+    threshold: float
+    clear_threshold: float
+    duration_seconds: float
+    severity: str
+
+    @classmethod
+    def from_rule(cls, rule: AlertRule) -> "RuleSpec":
+        return cls(
+            rule.id, rule.name, rule.equipment_type or None, rule.equipment_tag or None,
+            rule.metric, rule.kind, rule.direction, rule.threshold,
+            rule.threshold if rule.clear_threshold is None else rule.clear_threshold,
+            rule.duration_seconds or 0.0, rule.severity,
+        )
+
+
+class ActiveAlert(NamedTuple):
+    rule_id: str
+    rule_name: str
+    severity: str
+    equipment_id: str
+    tag: str
+    equipment_name: str
+    metric: str
+    kind: str
+    value: float
+    raised_at: datetime
+
+
+class AlertEvent(NamedTuple):
+    event: str  # raised, cleared
+    alert: ActiveAlert
+
+
+class _RuleGroup:
+    """Rules sharing target, metric, kind and direction: k rules x m devices of state."""
+    __slots__ = ("metric", "kind", "above", "rules", "idx", "threshold", "clear", "duration", "since", "active")
+
+    def __init__(self, metric: str, kind: str, direction: str, rules: List[RuleSpec], idx: np.ndarray):
+        self.metric = metric
+        self.kind = kind
+        self.above = direction == "above"
+        self.rules = rules
+        self.idx = idx
+        # Columns, so comparisons broadcast to (rules, devices)
+        self.threshold = np.array([r.threshold for r in rules])[:, None]
+        self.clear = np.array([r.clear_threshold for r in rules])[:, None]
+        self.duration = np.array([r.duration_seconds for r in rules])[:, None]
+        self.since = np.full((len(rules), len(idx)), np.nan)
+        self.active = np.zeros((len(rules), len(idx)), dtype=bool)
+
+
+def _target(rule: RuleSpec) -> Tuple:
+    if rule.equipment_tag:
+        return ("tag", rule.equipment_tag)
+    if rule.equipment_type:
+        return ("type", rule.equipment_type)
+    return ("all",)
+
+
+def _describe(alert: ActiveAlert, rule: RuleSpec) -> str:
+    unit = METRIC_UNITS.get(alert.metric, "")
+    if rule.kind == "rate":
+        unit += "/мин"
+    sign = ">" if rule.direction == "above" else "<"
+    return (f"{alert.rule_name}: {alert.tag} {alert.metric} {alert.value:.2f} {unit} "
+            f"({sign} {rule.threshold:g}, {alert.severity})")
+
+
+class AlertEngine:
+    """
+    Current telemetry values per device plus compiled rule groups and their state.
+    Thread-safe: the flusher, the simulator and request handlers share one instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules_version = 0
+        self._compiled_for: Tuple = (None, -1)  # (reference snapshot, rules version)
+        self._devices: List[EquipmentRef] = []
+        self._position: Dict[str, int] = {}
+        self._values: Dict[str, np.ndarray] = {}
+        self._stamps = np.empty(0)
+        self._previous: Dict[str, np.ndarray] = {}
+        self._previous_stamps = np.empty(0)
+        self._groups: List[_RuleGroup] = []
+        self._rule_by_id: Dict[str, RuleSpec] = {}
+        self._active: Dict[Tuple[str, str], ActiveAlert] = {}
+
+    def rules_changed(self):
+        """Writers call this after committing rule changes; the next tick recompiles."""
+        with self._lock:
+            self._rules_version += 1
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._rule_by_id)
+
+    def active(self) -> List[ActiveAlert]:
+        """Active alerts, critical first, then newest first."""
+        with self._lock:
+            alerts = list(self._active.values())
+        alerts.sort(key=lambda a: a.raised_at, reverse=True)
+        alerts.sort(key=lambda a: a.severity != "critical")
+        return alerts
+
+    # -- compilation -----------------------------------------------------------
+
+    def refresh(self, db: Session):
+        """Recompile when rules changed or the equipment snapshot was rebuilt (its TTL covers other processes)."""
+        ref = reference_data.get(db)
+        if self._compiled_for == (ref, self._rules_version):
+            return
+        version = self._rules_version
+        rules = [RuleSpec.from_rule(r) for r in db.query(AlertRule).filter(AlertRule.enabled == True)]  # noqa: E712
+        self.compile(rules, list(ref.equipment_by_id.values()), ref, version)
+
+    def compile(self, rules: List[RuleSpec], devices: List[EquipmentRef], ref: Optional[ReferenceData] = None, version: int = 0):
+        with self._lock:
+            carried = self._carry_state()
+            self._set_devices(devices)
+
+            by_type: Dict[Optional[str], List[int]] = {}
+            by_tag: Dict[str, int] = {}
+            for i, d in enumerate(devices):
+                by_type.setdefault(d.type, []).append(i)
+                by_tag[d.tag] = i
+            grouped: Dict[Tuple, List[RuleSpec]] = {}
+            for rule in rules:
+                grouped.setdefault((_target(rule), rule.metric, rule.kind, rule.direction), []).append(rule)
+
+            groups = []
+            for (target, metric, kind, direction), members in grouped.items():
+                if target[0] == "tag":
+                    idx = [by_tag[target[1]]] if target[1] in by_tag else []
+                elif target[0] == "type":
+                    idx = by_type.get(target[1], [])
+                else:
+                    idx = range(len(devices))
+                if not len(idx) or metric not in METRICS:
+                    continue
+                group = _RuleGroup(metric, kind, direction, members, np.fromiter(idx, dtype=np.intp))
+                self._restore_state(group, carried)
+                groups.append(group)
+
+            self._groups = groups
+            self._rule_by_id = {r.id: r for r in rules}
+            self._active = {
+                key: alert for key, alert in self._active.items()
+                if key[0] in self._rule_by_id and key[1] in self._position
+            }
+            self._compiled_for = (ref, version)
+        ALERTS_ACTIVE.set(len(self._active))
+
+    def _set_devices(self, devices: List[EquipmentRef]):
+        """Re-index the value arrays for a new device list, keeping known devices' values."""
+        old_position = self._position
+        self._devices = devices
+        self._position = {d.id: i for i, d in enumerate(devices)}
+        n = len(devices)
+        keep_new = np.fromiter((i for i, d in enumerate(devices) if d.id in old_position), dtype=np.intp)
+        keep_old = np.fromiter((old_position[devices[i].id] for i in keep_new), dtype=np.intp)
+
+        def remap(array: Optional[np.ndarray]) -> np.ndarray:
+            fresh = np.full(n, np.nan)
+            if array is not None and len(keep_new):
+                fresh[keep_new] = array[keep_old]
+            return fresh
+
+        self._values = {m: remap(self._values.get(m)) for m in METRICS}
+        self._previous = {m: remap(self._previous.get(m)) for m in METRICS}
+        self._stamps = remap(self._stamps if len(self._stamps) else None)
+        self._previous_stamps = remap(self._previous_stamps if len(self._previous_stamps) else None)
+
+    def _carry_state(self) -> Dict[str, List[Tuple[str, float, bool]]]:
+        """rule id -> [(device id, since, active)] for every pair with state, to survive a recompile."""
+        carried: Dict[str, List[Tuple[str, float, bool]]] = {}
+        for group in self._groups:
+            rows, cols = np.nonzero(~np.isnan(group.since) | group.active)
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                carried.setdefault(group.rules[r].id, []).append(
+                    (self._devices[group.idx[c]].id, group.since[r, c], group.active[r, c])
+                )
+        return carried
+
+    def _restore_state(self, group: _RuleGroup, carried: Dict[str, List[Tuple[str, float, bool]]]):
+        column = None
+        for r, rule in enumerate(group.rules):
+            for device_id, since, active in carried.get(rule.id, ()):
+                if column is None:
+                    column = {p: c for c, p in enumerate(group.idx.tolist())}
+                c = column.get(self._position.get(device_id))
+                if c is not None:
+                    group.since[r, c], group.active[r, c] = since, active
+
+    # -- evaluation ------------------------------------------------------------
+
+    def observe(self, latest: Dict[str, tuple]):
+        """
+        latest: equipment_id -> (equipment_id, timestamp, temperature, vibration).
+        The value a reading replaces becomes the previous one, for rate rules.
+        """
+        with self._lock:
+            self._observe(latest)
+
+    def _observe(self, latest: Dict[str, tuple]):
+        position = self._position
+        positions, stamps, temperatures, vibrations = [], [], [], []
+        for eq_id, ts, temperature, vibration in latest.values():
+            p = position.get(eq_id)
+            if p is not None:
+                positions.append(p)
+                stamps.append(ts.timestamp())
+                temperatures.append(temperature)
+                vibrations.append(vibration)
+        if not positions:
+            return
+        p = np.array(positions, dtype=np.intp)
+        stamps = np.array(stamps)
+        newer = ~(stamps <= self._stamps[p])  # NaN (no reading yet) counts as older
+        p, stamps = p[newer], stamps[newer]
+        for metric, values in (("temperature", temperatures), ("vibration", vibrations)):
+            self._previous[metric][p] = self._values[metric][p]
+            self._values[metric][p] = np.array(values)[newer]
+        self._previous_stamps[p] = self._stamps[p]
+        self._stamps[p] = stamps
+
+    def _rates(self) -> Dict[str, np.ndarray]:
+        """Change per minute between each device's last two readings (NaN without two)."""
+        elapsed = self._stamps - self._previous_stamps
+        elapsed[~(elapsed > 0)] = np.nan
+        with np.errstate(invalid="ignore"):
+            return {m: (self._values[m] - self._previous[m]) * 60.0 / elapsed for m in METRICS}
+
+    def tick(self, latest: Optional[Dict[str, tuple]] = None, now: Optional[float] = None) -> List[AlertEvent]:
+        """Apply the newest readings, evaluate every group, return raised/cleared transitions."""
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        raised_at = datetime.fromtimestamp(now)
+        events: List[AlertEvent] = []
+        with self._lock:
+            if latest:
+                self._observe(latest)
+            rates = self._rates() if any(g.kind == "rate" for g in self._groups) else None
+            for group in self._groups:
+                series = (self._values if group.kind == "threshold" else rates)[group.metric]
+                x = series[group.idx][None, :]
+                # NaN compares False both ways: no data keeps the current state
+                if group.above:
+                    hit, back = x > group.threshold, x < group.clear
+                else:
+                    hit, back = x < group.threshold, x > group.clear
+                since = np.where(hit, np.where(np.isnan(group.since), now, group.since), np.nan)
+                fire = hit & ~group.active & (now - since >= group.duration)
+                clear = group.active & back
+                group.since = since
+                if fire.any() or clear.any():
+                    group.active = (group.active | fire) & ~clear
+                    self._transitions(group, fire, clear, x[0], raised_at, events)
+            active = len(self._active)
+        ALERTS_ACTIVE.set(active)
+        ALERT_EVAL_SECONDS.observe(time.perf_counter() - started)
+        return events
+
+    def _transitions(self, group: _RuleGroup, fire: np.ndarray, clear: np.ndarray, values: np.ndarray,
+                     raised_at: datetime, events: List[AlertEvent]):
+        for r, c in zip(*np.nonzero(fire)):
+            rule, device = group.rules[r], self._devices[group.idx[c]]
+            alert = ActiveAlert(
+                rule.id, rule.name, rule.severity, device.id, device.tag, device.name,
+                rule.metric, rule.kind, float(values[c]), raised_at,
+            )
+            self._active[(rule.id, device.id)] = alert
+            events.append(AlertEvent("raised", alert))
+        for r, c in zip(*np.nonzero(clear)):
+            rule, device = group.rules[r], self._devices[group.idx[c]]
+            alert = self._active.pop((rule.id, device.id), None)
+            if alert is not None:
+                events.append(AlertEvent("cleared", alert._replace(value=float(values[c]))))
+
+    def log_rows(self, events: List[AlertEvent]) -> List[dict]:
+        rows = []
+        for event, alert in events:
+            rule = self._rule_by_id.get(alert.rule_id)
+            if rule is None:
+                continue
+            prefix = "Сработала тревога" if event == "raised" else "Тревога снята"
+            rows.append({
+                "timestamp": datetime.now(),
+                "username": None,
+                "role": None,
+                "action": "ALERT_RAISED" if event == "raised" else "ALERT_CLEARED",
+                "module": "ALERTS",
+                "details": f"{prefix}. {_describe(alert, rule)}",
+            })
+        return rows
+
+
+alert_engine = AlertEngine()
+
+
+def evaluate_alerts(db: Session, latest: Optional[Dict[str, tuple]] = None) -> List[AlertEvent]:
+    """One telemetry tick: recompile if needed, evaluate, write all transitions in one batch."""
+    alert_engine.refresh(db)
+    events = alert_engine.tick(latest)
+    if events:
+        db.execute(insert(SystemLog), alert_engine.log_rows(events))
+        db.commit()
+        for event, _ in events:
+            ALERT_TRANSITIONS.inc(event)
+    return events
@@ -0,0 +1,255 @@
+"""
+Batch state changes (POST /equipment/batch, /repairs/batch, /operations/batch).
+
+The form handlers change one row per request: load it, set the fields,
+commit, redirect. A batch carries up to BATCH_UPDATE_MAX_ITEMS such changes.
+Each item is validated on its own and existence is checked with one
+SELECT ... IN per table; the accepted items are then written in the caller's
+transaction with set-based statements:
+
+- statuses: one UPDATE ... WHERE id IN (...) per distinct status;
+- timestamps the form handlers set on a transition (operation start/end,
+  repair end): one UPDATE per transition, guarded by IS NULL like the
+  handlers' `if not ...`;
+- per-row values (actual quantities, defect totals): one executemany;
+- defects: one multi-row INSERT.
+
+Invalid items are reported and skipped, the rest are applied. When an id
+appears more than once the last status and quantity win and defects add up.
+The caller commits once and refreshes caches once, as `changed` says.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.types import new_id
+from app.models.equipment import Equipment
+from app.models.operation import DefectLog, ProductionOperation
+from app.models.repair import RepairLog
+
+EQUIPMENT_STATUSES = ("operational", "maintenance", "broken")
+REPAIR_STATUSES = ("pending", "in_progress", "completed")
+OPERATION_STATUSES = ("pending", "in_progress", "completed", "problem")
+IN_CHUNK = 500  # ids per IN (...) list
+
+
+class BatchError(ValueError):
+    """The request as a whole is unusable (not a list, too many items)."""
+
+
+class BatchResult:
+    """Outcome per item, in request order."""
+
+    def __init__(self, items: list):
+        self.ids: List[Optional[str]] = [item.get("id") if isinstance(item, dict) else None for item in items]
+        self.errors: Dict[int, str] = {}
+        self.changed: Set[str] = set()  # "equipment", "repairs", "defects": what the caller has to refresh
+
+    def fail(self, index: int, message: str):
+        self.errors.setdefault(index, message)
+
+    @property
+    def applied(self) -> int:
+        return len(self.ids) - len(self.errors)
+
+    def to_dict(self) -> dict:
+        return {
+            "applied": self.applied,
+            "failed": len(self.errors),
+            "results": [
+                {"id": item_id, "ok": False, "error": self.errors[i]} if i in self.errors else {"id": item_id, "ok": True}
+                for i, item_id in enumerate(self.ids)
+            ],
+        }
+
+
+def _check_items(items) -> BatchResult:
+    if not isinstance(items, list) or not items:
+        raise BatchError("updates must be a non-empty list")
+    if len(items) > settings.BATCH_UPDATE_MAX_ITEMS:
+        raise BatchError(f"at most {settings.BATCH_UPDATE_MAX_ITEMS} updates per batch")
+    result = BatchResult(items)
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("id"), str):
+            result.fail(i, "id is required")
+    return result
+
+
+def _status(item: dict, allowed: Tuple[str, ...], required: bool) -> Tuple[Optional[str], Optional[str]]:
+    """(status, error)"""
+    status = item.get("status")
+    if status is None and not required:
+        return None, None
+    if status not in allowed:
+        return None, f"status must be one of {', '.join(allowed)}"
+    return status, None
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _chunks(ids: Iterable[str]) -> Iterable[List[str]]:
+    ids = list(ids)
+    for i in range(0, len(ids), IN_CHUNK):
+        yield ids[i:i + IN_CHUNK]
+
+
+def _existing(db: Session, column, ids: Iterable[str]) -> Set[str]:
+    found: Set[str] = set()
+    for chunk in _chunks(set(ids)):
+        found.update(i for (i,) in db.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def _update_in(db: Session, model, ids: Iterable[str], values: dict, *criteria):
+    for chunk in _chunks(ids):
+        db.query(model).filter(model.id.in_(chunk), *criteria).update(values, synchronize_session=False)
+
+
+def _by_status(statuses: Dict[str, str]) -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    for item_id, status in statuses.items():
+        groups.setdefault(status, []).append(item_id)
+    return groups
+
+
+def _known(db: Session, model, items: list, result: BatchResult) -> List[Tuple[int, dict]]:
+    """Items that passed validation so far and whose row exists."""
+    pending = [(i, item) for i, item in enumerate(items) if i not in result.errors]
+    existing = _existing(db, model.id, (item["id"] for _, item in pending))
+    known = []
+    for i, item in pending:
+        if item["id"] in existing:
+            known.append((i, item))
+        else:
+            result.fail(i, "not found")
+    return known
+
+
+def update_equipment_statuses(db: Session, items: list) -> BatchResult:
+    """[{"id", "status"}]: what POST /equipment/{id}/status does, for many assets."""
+    result = _check_items(items)
+    for i, item in enumerate(items):
+        if i not in result.errors:
+            _, error = _status(item, EQUIPMENT_STATUSES, required=True)
+            if error:
+                result.fail(i, error)
+
+    statuses = {item["id"]: item["status"] for _, item in _known(db, Equipment, items, result)}
+    for status, ids in _by_status(statuses).items():
+        _update_in(db, Equipment, ids, {Equipment.status: status})
+    if statuses:
+        result.changed.add("equipment")
+    return result
+
+
+def update_repairs(db: Session, items: list) -> BatchResult:
+    """
+    [{"id", "status"}]: what POST /repairs/{id}/update does. Completing a repair
+    stamps its end date and puts the asset back into operation, once.
+    """
+    result = _check_items(items)
+    for i, item in enumerate(items):
+        if i not in result.errors:
+            _, error = _status(item, REPAIR_STATUSES, required=True)
+            if error:
+                result.fail(i, error)
+
+    statuses = {item["id"]: item["status"] for _, item in _known(db, RepairLog, items, result)}
+    completed = [repair_id for repair_id, status in statuses.items() if status == "completed"]
+    # Assets of repairs this batch closes (end date still empty), read before the UPDATEs below
+    equipment_ids: Set[str] = set()
+    for chunk in _chunks(completed):
+        equipment_ids.update(eq_id for (eq_id,) in db.query(RepairLog.equipment_id).filter(
+            RepairLog.id.in_(chunk), RepairLog.end_date.is_(None)
+        ) if eq_id is not None)
+
+    now = datetime.now()
+    for status, ids in _by_status(statuses).items():
+        _update_in(db, RepairLog, ids, {RepairLog.status: status})
+    _update_in(db, RepairLog, completed, {RepairLog.end_date: now}, RepairLog.end_date.is_(None))
+    _update_in(db, Equipment, equipment_ids, {Equipment.last_maintenance: now, Equipment.status: "operational"})
+    if statuses:
+        result.changed.add("repairs")
+    if equipment_ids:
+        result.changed.add("equipment")
+    return result
+
+
+def update_operations(db: Session, items: list) -> BatchResult:
+    """
+    [{"id", "status"?, "actual_quantity"?, "defects"?: [{"quantity", "reason", "comment"?}]}]:
+    POST /operations/{id}/update and /operations/{id}/defect for many operations.
+    """
+    result = _check_items(items)
+    for i, item in enumerate(items):
+        if i in result.errors:
+            continue
+        _, error = _status(item, OPERATION_STATUSES, required=False)
+        if error:
+            result.fail(i, error)
+            continue
+        if "actual_quantity" in item and (_number(item["actual_quantity"]) is None or item["actual_quantity"] < 0):
+            result.fail(i, "actual_quantity must be a non-negative number")
+            continue
+        defects = item.get("defects") or []
+        if not isinstance(defects, list):
+            result.fail(i, "defects must be a list")
+            continue
+        for d, defect in enumerate(defects):
+            where = f"defects[{d}]"
+            if not isinstance(defect, dict) or _number(defect.get("quantity")) is None or defect["quantity"] <= 0:
+                result.fail(i, f"{where}: quantity must be a positive number")
+            elif not isinstance(defect.get("reason"), str) or not defect["reason"].strip() or len(defect["reason"]) > 200:
+                result.fail(i, f"{where}: reason is required (at most 200 characters)")
+            elif defect.get("comment") is not None and not isinstance(defect["comment"], str):
+                result.fail(i, f"{where}: comment must be a string")
+        if i not in result.errors and item.get("status") is None and "actual_quantity" not in item and not defects:
+            result.fail(i, "nothing to update")
+
+    now = datetime.now()
+    statuses: Dict[str, str] = {}
+    quantities: Dict[str, float] = {}
+    defect_rows: List[dict] = []
+    defect_totals: Dict[str, float] = {}
+    for _, item in _known(db, ProductionOperation, items, result):
+        op_id = item["id"]
+        if item.get("status") is not None:
+            statuses[op_id] = item["status"]
+        if "actual_quantity" in item:
+            quantities[op_id] = float(item["actual_quantity"])
+        for defect in item.get("defects") or []:
+            defect_rows.append({
+                "id": new_id(),
+                "operation_id": op_id,
+                "quantity": float(defect["quantity"]),
+                "reason": defect["reason"].strip(),
+                "comment": defect.get("comment"),
+                "created_at": now,
+            })
+            defect_totals[op_id] = defect_totals.get(op_id, 0.0) + float(defect["quantity"])
+
+    for status, ids in _by_status(statuses).items():
+        _update_in(db, ProductionOperation, ids, {ProductionOperation.status: status})
+        if status == "in_progress":
+            _update_in(db, ProductionOperation, ids, {ProductionOperation.start_time: now}, ProductionOperation.start_time.is_(None))
+        elif status == "completed":
+            _update_in(db, ProductionOperation, ids, {ProductionOperation.end_time: now}, ProductionOperation.end_time.is_(None))
+    if quantities:
+        # ORM bulk UPDATE by primary key: one executemany
+        db.execute(update(ProductionOperation), [{"id": op_id, "actual_quantity": q} for op_id, q in quantities.items()])
+    if defect_rows:
+        db.execute(insert(DefectLog), defect_rows)
+        operations = ProductionOperation.__table__
+        db.execute(
+            update(operations)
+            .where(operations.c.id == bindparam("op_id"))
+            .values(defect_quantity=func.coalesce(operations.c.defect_quantity, 0.0) + bindparam("added")),
+            [{"op_id": op_id, "added": total} for op_id, total in defect_totals.items()],
+        )
+        result.changed.add("defects")
+    return result
@@ -0,0 +1,185 @@
+import gzip
+import zlib
+from typing import Optional
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "image/svg+xml", "application/manifest+json",
+)
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best encoding we can produce from an Accept-Encoding header,
+    honouring q-values (q=0 refuses). Brotli wins ties. None means identity.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, level: int = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.BROTLI_QUALITY if level is None else level)
+    # mtime=0: identical input gives identical bytes (stable for caches and ETags)
+    return gzip.compress(data, compresslevel=settings.GZIP_LEVEL if level is None else level, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, chunk: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Plain ASGI middleware: br/gzip for dynamic text responses, negotiated per request.
+
+    Bodies below COMPRESSION_MIN_SIZE, non-text types and responses that already
+    carry a Content-Encoding (precompressed static files) pass through untouched.
+    Streaming responses are compressed chunk by chunk and flushed, so the client
+    still sees data as it is produced.
+    """
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        passthrough = False
+        stream = None
+        pending, pending_size = [], 0
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough, stream, pending_size
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not is_compressible(content_type)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message  # Held back until we know the body size
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None:
+                # Responses behind http middleware arrive as a stream even when small:
+                # buffer up to the threshold before deciding
+                pending.append(body)
+                pending_size += len(body)
+                if more_body and pending_size < self.minimum_size:
+                    return
+                body = b"".join(pending)
+                pending.clear()
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        start["headers"] = _with_vary(start["headers"])
+                        passthrough = True
+                    else:
+                        body = compress(body, encoding)
+                        start["headers"] = _compressed_headers(start["headers"], encoding, len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                stream = _StreamCompressor(encoding)
+                start["headers"] = _compressed_headers(start["headers"], encoding, None)
+                await send(start)
+
+            chunk = stream.process(body) if body else b""
+            if not more_body:
+                chunk += stream.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _with_vary(headers):
+    # Caches must key on Accept-Encoding whenever the body could differ by it
+    for i, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers = list(headers)
+                headers[i] = (key, value + b", Accept-Encoding")
+            return headers
+    return list(headers) + [(b"vary", b"Accept-Encoding")]
+
+
+def _compressed_headers(headers, encoding: str, length: Optional[int]):
+    result = []
+    for key, value in headers:
+        lower = key.lower()
+        if lower == b"content-length":
+            continue
+        if lower == b"etag" and not value.startswith(b"W/"):
+            # Different bytes than the identity body: only weakly equal to it
+            value = b"W/" + value
+        result.append((key, value))
+    result.append((b"content-encoding", encoding.encode("latin-1")))
+    if length is not None:
+        result.append((b"content-length", str(length).encode("latin-1")))
+    return _with_vary(result)
@@ -5,12 +5,113 @@ class Settings:
     PROJECT_VERSION: str = "1.0.0"
     
     # Database
-    DATABASE_URL: str = "sqlite:///./digital_platform.db"
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./digital_platform.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+    # Read replica for GET requests (unset: everything uses DATABASE_URL).
+    # Reads fall back to the primary while the replica lags more than REPLICA_MAX_LAG_SECONDS.
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_POOL_SIZE: int = int(os.getenv("REPLICA_POOL_SIZE", "10"))
+    REPLICA_MAX_OVERFLOW: int = int(os.getenv("REPLICA_MAX_OVERFLOW", "20"))
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_HEARTBEAT_SECONDS: float = float(os.getenv("REPLICA_HEARTBEAT_SECONDS", "1"))
+    # Local testing: copy the primary SQLite file over the replica file this often (0 = off)
+    REPLICA_SYNC_SECONDS: float = float(os.getenv("REPLICA_SYNC_SECONDS", "0"))
     
+    # Keys: UUIDs stored as 16-byte binary (native UUID on PostgreSQL) instead of 36-char text.
+    # Existing databases must be converted first: python -m app.db.compact_keys
+    COMPACT_KEYS: bool = os.getenv("COMPACT_KEYS", "0") == "1"
+
     # Security
     SECRET_KEY: str = "super-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Background jobs (app.core.scheduler): threads for blocking job work
+    SCHEDULER_WORKERS: int = int(os.getenv("SCHEDULER_WORKERS", "4"))
+    IOT_SIMULATOR_INTERVAL_SECONDS: float = float(os.getenv("IOT_SIMULATOR_INTERVAL_SECONDS", "5"))
+
+    # Stock ledger
+    STOCK_SNAPSHOT_INTERVAL_SECONDS: int = 3600
+    STOCK_SNAPSHOT_LAG_SECONDS: int = 60  # Leave in-flight transactions out of a snapshot
+    STOCK_RECONCILE_INTERVAL_SECONDS: int = 3600  # Ledger vs. warehouse quantity check
+
+    # Warehouse valuation: running totals (re-aggregated after the TTL) and snapshots for the history chart
+    VALUATION_TTL_SECONDS: int = 300
+    VALUATION_SNAPSHOT_INTERVAL_SECONDS: int = int(os.getenv("VALUATION_SNAPSHOT_INTERVAL_SECONDS", "3600"))
+    VALUATION_HISTORY_RANGES: tuple = (7, 30, 90, 365)
+
+    # Dashboard production trend
+    PRODUCTION_TREND_RANGES: tuple = (7, 30, 90, 365)
+    PRODUCTION_ROLLUP_BACKFILL_DAYS: int = 400
+
+    # Per-enterprise rollup cache (invalidated on writes; TTL covers other processes)
+    ENTERPRISE_ROLLUP_TTL_SECONDS: int = 300
+
+    # Per-asset reliability cache (refreshed on repair writes; TTL covers other processes)
+    RELIABILITY_TTL_SECONDS: int = 300
+
+    # Response compression (br when the brotli package is installed, else gzip)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # Dynamic responses; static files are precompressed at maximum
+
+    # JSON API (/api/v1) paging
+    API_PAGE_SIZE: int = 100
+    API_MAX_PAGE_SIZE: int = 1000
+
+    # Order intake: numbers are reserved from the database this many at a time per process
+    ORDER_NUMBER_BLOCK_SIZE: int = int(os.getenv("ORDER_NUMBER_BLOCK_SIZE", "1000"))
+    ORDER_BATCH_MAX_ORDERS: int = 5000  # POST /orders/batch
+    ORDER_BATCH_MAX_OPERATIONS: int = 50  # Initial operations per order
+    # POST /equipment/batch, /repairs/batch, /operations/batch
+    BATCH_UPDATE_MAX_ITEMS: int = 5000
+
+    # Reference data (enterprises, equipment tags, product codes): version-checked per request
+    REFERENCE_DATA_TTL_SECONDS: int = 60
+
+    # Telemetry ingestion (POST /api/telemetry/ingest)
+    # Set to make the in-app IoT simulator post to the endpoint instead of writing the database
+    IOT_SIMULATOR_INGEST_URL: str = os.getenv("IOT_SIMULATOR_INGEST_URL")
+    TELEMETRY_INGEST_TOKEN: str = os.getenv("TELEMETRY_INGEST_TOKEN")  # Bearer token for gateways; unset: logged-in users only
+    TELEMETRY_BUFFER_CAPACITY: int = int(os.getenv("TELEMETRY_BUFFER_CAPACITY", "500000"))  # readings; beyond this batches get 503
+    TELEMETRY_FLUSH_SECONDS: float = float(os.getenv("TELEMETRY_FLUSH_SECONDS", "1"))
+    TELEMETRY_FLUSH_ROWS: int = 50_000  # Flush early once this many readings are waiting
+    TELEMETRY_MAX_BODY_BYTES: int = 16 * 1024 * 1024
+    TELEMETRY_RETENTION_DAYS: int = int(os.getenv("TELEMETRY_RETENTION_DAYS", "90"))  # 0 keeps all history
+    TELEMETRY_RETENTION_BATCH: int = 5000
+    # Cold history (app.core.telemetry_archive): days older than this move to compressed day files (0 = off)
+    TELEMETRY_ARCHIVE_AFTER_DAYS: int = int(os.getenv("TELEMETRY_ARCHIVE_AFTER_DAYS", "0"))
+    TELEMETRY_ARCHIVE_DIR: str = os.getenv("TELEMETRY_ARCHIVE_DIR", "./telemetry_archive")
+    TELEMETRY_HISTORY_MAX_DAYS: int = 31  # Longest range of GET /api/telemetry/history
+
+    # Telemetry alerts: rules on /alerts, evaluated after every simulator tick and ingest flush
+    ALERTS_ENABLED: bool = os.getenv("ALERTS_ENABLED", "1") == "1"
+    ALERTS_LIVE_LIMIT: int = 10  # Active alerts on the dashboard card
+
+    # Global search (/api/search): in-memory index, rebuilt in full this often
+    SEARCH_INDEX_REBUILD_SECONDS: int = int(os.getenv("SEARCH_INDEX_REBUILD_SECONDS", "900"))
+    SEARCH_SCAN_LIMIT: int = 500  # Candidates checked per query before ranking
+    SEARCH_MAX_RESULTS: int = 50
+
+    # Outbox dispatcher
+    OUTBOX_POLL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_MAX_BACKOFF_SECONDS: int = 600
+
+    # SQL instrumentation: per-request query count and time in response headers.
+    # Off by default: the headers go to every client, logged in or not. Development and benchmarks only.
+    # Strict mode fails a request that repeats one statement shape more than the threshold (N+1).
+    SQL_STRICT: bool = os.getenv("SQL_STRICT", "0") == "1"
+    SQL_STATS_ENABLED: bool = os.getenv("SQL_STATS", "0") == "1" or SQL_STRICT
+    SQL_STATS_SLOWEST: int = 3
+    # X-DB-Slowest carries raw SQL text (tables, columns, filters): local debugging only
+    SQL_STATS_SQL_TEXT: bool = os.getenv("SQL_STATS_SQL_TEXT", "0") == "1"
+    SQL_REPEAT_THRESHOLD: int = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+
 settings = Settings()
 
@@ -0,0 +1,180 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import primary_session
+from app.models.enterprise import Enterprise
+from app.models.equipment import Equipment
+from app.models.operation import ProductionOperation, DefectLog
+from app.models.order import ProductionOrder
+
+OPEN_STATUSES = ("new", "in_progress", "problem")
+
+
+class EnterpriseRollup:
+    """Orders, output, defects and equipment availability of one plant."""
+    __slots__ = (
+        "key", "name", "type", "region",
+        "orders_total", "orders_open", "orders_completed", "orders_problem",
+        "ordered_quantity", "completed_quantity", "output_value",
+        "defect_count", "defect_quantity",
+        "equipment_total", "equipment_operational", "equipment_maintenance", "equipment_broken",
+    )
+
+    def __init__(self, key, name=None, type=None, region=None):
+        self.key = key
+        self.name = name
+        self.type = type
+        self.region = region
+        self.orders_total = 0
+        self.orders_open = 0
+        self.orders_completed = 0
+        self.orders_problem = 0
+        self.ordered_quantity = 0.0
+        self.completed_quantity = 0.0
+        self.output_value = 0.0
+        self.defect_count = 0
+        self.defect_quantity = 0.0
+        self.equipment_total = 0
+        self.equipment_operational = 0
+        self.equipment_maintenance = 0
+        self.equipment_broken = 0
+
+    @property
+    def availability(self) -> Optional[float]:
+        # Share of equipment in operation, %
+        return 100.0 * self.equipment_operational / self.equipment_total if self.equipment_total else None
+
+    @property
+    def defect_rate(self) -> Optional[float]:
+        # Defect quantity per completed output, %
+        return 100.0 * self.defect_quantity / self.completed_quantity if self.completed_quantity else None
+
+    @property
+    def completion_rate(self) -> Optional[float]:
+        return 100.0 * self.orders_completed / self.orders_total if self.orders_total else None
+
+    def to_dict(self) -> dict:
+        pct = lambda v: round(v, 2) if v is not None else None
+        return {
+            "id": self.key,
+            "name": self.name,
+            "type": self.type,
+            "region": self.region,
+            "orders_total": self.orders_total,
+            "orders_open": self.orders_open,
+            "orders_completed": self.orders_completed,
+            "orders_problem": self.orders_problem,
+            "ordered_quantity": round(self.ordered_quantity, 2),
+            "completed_quantity": round(self.completed_quantity, 2),
+            "output_value": round(self.output_value, 2),
+            "defect_count": self.defect_count,
+            "defect_quantity": round(self.defect_quantity, 2),
+            "defect_rate_pct": pct(self.defect_rate),
+            "equipment_total": self.equipment_total,
+            "equipment_operational": self.equipment_operational,
+            "equipment_maintenance": self.equipment_maintenance,
+            "equipment_broken": self.equipment_broken,
+            "availability_pct": pct(self.availability),
+            "completion_rate_pct": pct(self.completion_rate),
+        }
+
+
+def compute_enterprise_rollups(db: Session) -> Dict[str, EnterpriseRollup]:
+    """
+    All plants at once: one grouped query per fact table (orders, defects, equipment),
+    never a query per enterprise.
+    """
+    result: Dict[str, EnterpriseRollup] = {
+        eid: EnterpriseRollup(eid, name, etype, region)
+        for eid, name, etype, region in db.query(Enterprise.id, Enterprise.name, Enterprise.type, Enterprise.region)
+    }
+
+    for eid, status, count, quantity, value in db.query(
+        ProductionOrder.enterprise_id, ProductionOrder.status, func.count(ProductionOrder.id),
+        func.sum(ProductionOrder.quantity), func.sum(ProductionOrder.quantity * ProductionOrder.price_per_unit)
+    ).group_by(ProductionOrder.enterprise_id, ProductionOrder.status):
+        r = result.get(eid)
+        if r is None:
+            continue
+        r.orders_total += count
+        r.ordered_quantity += quantity or 0.0
+        if status == "completed":
+            r.orders_completed += count
+            r.completed_quantity += quantity or 0.0
+            r.output_value += value or 0.0
+        elif status in OPEN_STATUSES:
+            r.orders_open += count
+            if status == "problem":
+                r.orders_problem += count
+
+    for eid, count, quantity in db.query(
+        ProductionOrder.enterprise_id, func.count(DefectLog.id), func.sum(DefectLog.quantity)
+    ).join(
+        ProductionOperation, ProductionOperation.id == DefectLog.operation_id
+    ).join(
+        ProductionOrder, ProductionOrder.id == ProductionOperation.order_id
+    ).group_by(ProductionOrder.enterprise_id):
+        r = result.get(eid)
+        if r is not None:
+            r.defect_count += count
+            r.defect_quantity += quantity or 0.0
+
+    for eid, status, count in db.query(
+        Equipment.enterprise_id, Equipment.status, func.count(Equipment.id)
+    ).group_by(Equipment.enterprise_id, Equipment.status):
+        r = result.get(eid)
+        if r is None:
+            continue
+        r.equipment_total += count
+        if status == "operational":
+            r.equipment_operational += count
+        elif status == "maintenance":
+            r.equipment_maintenance += count
+        elif status == "broken":
+            r.equipment_broken += count
+
+    return result
+
+
+class EnterpriseRollupCache:
+    """
+    In-process cache of the per-plant rollup. Writes that touch orders, defects,
+    equipment or enterprises call invalidate(); the TTL bounds staleness from
+    writers in other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rollups: Optional[Dict[str, EnterpriseRollup]] = None
+        self._built_at = 0.0
+
+    def _ensure(self, db: Session) -> Dict[str, EnterpriseRollup]:
+        with self._lock:
+            if self._rollups is None or time.monotonic() - self._built_at > settings.ENTERPRISE_ROLLUP_TTL_SECONDS:
+                with primary_session(db) as primary:
+                    self._rollups = compute_enterprise_rollups(primary)
+                self._built_at = time.monotonic()
+            return self._rollups
+
+    def invalidate(self):
+        with self._lock:
+            self._rollups = None
+
+    def get(self, db: Session, enterprise_id: str) -> Optional[EnterpriseRollup]:
+        return self._ensure(db).get(enterprise_id)
+
+    def all(self, db: Session) -> List[EnterpriseRollup]:
+        return sorted(self._ensure(db).values(), key=lambda r: -r.output_value)
+
+    def totals(self, db: Session) -> EnterpriseRollup:
+        total = EnterpriseRollup("total", name="Итого по холдингу")
+        for r in self._ensure(db).values():
+            for field in EnterpriseRollup.__slots__[4:]:
+                setattr(total, field, getattr(total, field) + getattr(r, field))
+        return total
+
+
+enterprise_rollup_cache = EnterpriseRollupCache()
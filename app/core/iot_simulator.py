@@ -1,45 +1,176 @@
+"""
+IoT telemetry simulator.
+
+In the app it is a scheduled job (one tick per IOT_SIMULATOR_INTERVAL_SECONDS).
+By default it writes readings straight to the database; with
+IOT_SIMULATOR_INGEST_URL set it posts them to the ingestion endpoint like a
+real gateway would, and logs the responses it does not expect.
+
+Standalone it is a load generator for the ingestion endpoint:
+
+    python -m app.core.iot_simulator --url http://localhost:8000/api/telemetry/ingest \\
+        --token $TELEMETRY_INGEST_TOKEN --rate 50000 --duration 30 --format frame
+"""
+import argparse
+import json
+import logging
 import random
 import time
-import threading
 from datetime import datetime
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.session import SessionLocal
+from app.core.alerts import evaluate_alerts
+from app.core.telemetry_ingest import FRAME, NDJSON, encode_frame, encode_ndjson
 from app.models.equipment import Equipment
+from app.models.telemetry import TelemetryReading
+
+logger = logging.getLogger("app.iot_simulator")
+
+
+def sample(status: str, rng=random):
+    """(temperature, vibration) for an asset in the given status."""
+    if status == "operational":
+        # Normal operating range
+        return round(rng.uniform(40.0, 65.0), 1), round(rng.uniform(0.1, 2.5), 2)
+    if status == "broken":
+        # Overheating / High vibration
+        return round(rng.uniform(80.0, 110.0), 1), round(rng.uniform(5.0, 15.0), 2)
+    # Maintenance - Sensors Disabled
+    return 0.0, 0.0
+
+
+def _write_direct(db: Session):
+    equipment_list = db.query(Equipment).all()
+    history = []
+    latest = {}
+    for eq in equipment_list:
+        eq.temperature, eq.vibration = sample(eq.status)
+        eq.last_telemetry_update = datetime.now()
+        history.append({
+            "equipment_id": eq.id,
+            "timestamp": eq.last_telemetry_update,
+            "temperature": eq.temperature,
+            "vibration": eq.vibration
+        })
+        latest[eq.id] = (eq.id, eq.last_telemetry_update, eq.temperature, eq.vibration)
+    if history:
+        db.execute(insert(TelemetryReading), history)
+    db.commit()
+    if settings.ALERTS_ENABLED:
+        evaluate_alerts(db, latest)
+
+
+def _post_to_ingest(db: Session, http):
+    now = time.time()
+    samples = [(tag, now) + sample(status) for tag, status in db.query(Equipment.tag, Equipment.status)]
+    db.close()  # Not holding a connection during the HTTP call
+    if samples:
+        response = http.post(
+            settings.IOT_SIMULATOR_INGEST_URL, data=encode_ndjson(samples),
+            headers=_headers(NDJSON, settings.TELEMETRY_INGEST_TOKEN), timeout=10
+        )
+        if response.status_code not in (202, 503):
+            logger.warning("Ingest returned %d: %s", response.status_code, response.text[:200])
+
+
+def _headers(content_type: str, token: str = None) -> dict:
+    headers = {"Content-Type": content_type}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
 
-def simulate_iot_telemetry():
+
+_http = None
+
+
+def simulate_tick():
+    """
+    One simulator tick (scheduled job): new telemetry for every asset, written
+    to the database or posted to the ingestion endpoint.
+    """
+    global _http
+    db: Session = SessionLocal()
+    try:
+        if settings.IOT_SIMULATOR_INGEST_URL:
+            if _http is None:
+                import requests
+                _http = requests.Session()
+            _post_to_ingest(db, _http)
+        else:
+            _write_direct(db)
+    finally:
+        db.close()
+
+
+def run_load(url: str, rate: int, duration: float, batch: int, fmt: str, token: str = None, seed: int = 1) -> dict:
     """
-    Background task to simulate IoT data.
-    Updates equipment telemetry in the database.
+    Post batches of readings for every known tag at `rate` readings/s for `duration`
+    seconds. On 503 the batch is retried after Retry-After, as a gateway would.
     """
-    while True:
-        try:
-            db: Session = SessionLocal()
-            equipment_list = db.query(Equipment).all()
-            
-            for eq in equipment_list:
-                # Simulate data based on status
-                if eq.status == "operational":
-                    # Normal operating range
-                    eq.temperature = round(random.uniform(40.0, 65.0), 1)
-                    eq.vibration = round(random.uniform(0.1, 2.5), 2)
-                elif eq.status == "broken":
-                    # Overheating / High vibration
-                    eq.temperature = round(random.uniform(80.0, 110.0), 1)
-                    eq.vibration = round(random.uniform(5.0, 15.0), 2)
-                else: # maintenance
-                    # Maintenance - Sensors Disabled
-                    eq.temperature = 0.0
-                    eq.vibration = 0.0
-                
-                eq.last_telemetry_update = datetime.now()
-            
-            db.commit()
-            db.close()
-        except Exception as e:
-            print(f"[IoT Simulator] Error: {e}")
-            
-        time.sleep(5)  # Update every 5 seconds
-
-def start_iot_simulation():
-    thread = threading.Thread(target=simulate_iot_telemetry, daemon=True)
-    thread.start()
+    import requests
+    db = SessionLocal()
+    assets = db.query(Equipment.tag, Equipment.status).all()
+    db.close()
+    if not assets:
+        raise SystemExit("No equipment in the database")
+
+    rng = random.Random(seed)
+    encode, content_type = (encode_frame, FRAME) if fmt == "frame" else (encode_ndjson, NDJSON)
+    http = requests.Session()
+    headers = _headers(content_type, token)
+    accepted = rejected = errors = 0
+    started = time.perf_counter()
+    cursor = 0
+    while time.perf_counter() - started < duration:
+        now = time.time()
+        samples = []
+        for _ in range(batch):
+            tag, status = assets[cursor % len(assets)]
+            cursor += 1
+            samples.append((tag, now) + sample(status, rng))
+        body = encode(samples)
+        while True:
+            response = http.post(url, data=body, headers=headers, timeout=30)
+            if response.status_code != 503:
+                break
+            rejected += len(samples)
+            time.sleep(float(response.headers.get("Retry-After", "1")))
+        if response.status_code == 202:
+            accepted += len(samples)
+        else:
+            errors += 1
+            print(f"{response.status_code}: {response.text[:200]}")
+        # Pace to the target rate
+        ahead = accepted / rate - (time.perf_counter() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+    elapsed = time.perf_counter() - started
+    return {
+        "format": fmt,
+        "batch": batch,
+        "seconds": round(elapsed, 2),
+        "accepted": accepted,
+        "accepted_per_s": round(accepted / elapsed),
+        "rejected_backpressure": rejected,
+        "errors": errors,
+    }
+
+
+def main():
+    # Standalone: register every mapped class so relationships resolve
+    from app.models import enterprise, equipment, order, operation, repair  # noqa: F401
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/api/telemetry/ingest")
+    parser.add_argument("--token", default=settings.TELEMETRY_INGEST_TOKEN)
+    parser.add_argument("--rate", type=int, default=50_000, help="target readings per second")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--batch", type=int, default=5_000, help="readings per request")
+    parser.add_argument("--format", choices=("frame", "ndjson"), default="frame")
+    args = parser.parse_args()
+    print(json.dumps(run_load(args.url, args.rate, args.duration, args.batch, args.format, args.token), indent=2))
+
+
+if __name__ == "__main__":
+    main()
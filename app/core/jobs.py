@@ -0,0 +1,42 @@
+"""
+The app's periodic jobs. Registered at import of app.main; the scheduler
+starts them on app startup and cancels them on shutdown.
+"""
+from app.core.config import settings
+from app.core.scheduler import Scheduler
+from app.core.iot_simulator import simulate_tick
+from app.core.outbox import DISPATCH_JOB, dispatch_pending
+from app.core.retention import telemetry_retention_job
+from app.core.search_index import REBUILD_JOB, rebuild_search_index
+from app.core.telemetry_archive import telemetry_archive_job
+from app.core.stock_ledger import compact_snapshots_job, reconcile_stock_job
+from app.core.telemetry_ingest import FLUSH_JOB, flush_buffer
+from app.core.valuation import valuation_snapshot_job
+from app.db.replica import replica_interval, replica_maintenance
+from app.db.session import engine, read_engine
+
+HOUR = 3600.0
+
+
+def register_jobs(scheduler: Scheduler):
+    scheduler.add("iot_simulator", simulate_tick, settings.IOT_SIMULATOR_INTERVAL_SECONDS, jitter=0.5, timeout=60)
+    # final: readings already answered with 202 are written on shutdown, not lost
+    scheduler.add(FLUSH_JOB, flush_buffer, settings.TELEMETRY_FLUSH_SECONDS, timeout=120, final=True)
+    scheduler.add(DISPATCH_JOB, dispatch_pending, settings.OUTBOX_POLL_SECONDS, timeout=300)
+    # First build right at startup; later runs compact tombstones and pick up other processes' writes
+    scheduler.add(REBUILD_JOB, rebuild_search_index, settings.SEARCH_INDEX_REBUILD_SECONDS, timeout=HOUR)
+    # Hourly housekeeping: first run one interval after startup, spread by jitter across processes
+    scheduler.add(
+        "stock_snapshots", compact_snapshots_job, settings.STOCK_SNAPSHOT_INTERVAL_SECONDS,
+        initial_delay=settings.STOCK_SNAPSHOT_INTERVAL_SECONDS, jitter=60, timeout=HOUR,
+    )
+    scheduler.add(
+        "stock_reconciliation", reconcile_stock_job, settings.STOCK_RECONCILE_INTERVAL_SECONDS,
+        initial_delay=300, jitter=60, timeout=HOUR,
+    )
+    scheduler.add("valuation_snapshots", valuation_snapshot_job, settings.VALUATION_SNAPSHOT_INTERVAL_SECONDS,
+                  jitter=60, timeout=HOUR)
+    scheduler.add("telemetry_retention", telemetry_retention_job, HOUR, initial_delay=600, jitter=300, timeout=HOUR)
+    scheduler.add("telemetry_archive", telemetry_archive_job, HOUR, initial_delay=900, jitter=300, timeout=4 * HOUR)
+    if read_engine is not engine:
+        scheduler.add("replica", replica_maintenance, replica_interval(), timeout=300)
@@ -0,0 +1,122 @@
+"""
+Read-only JSON API (/api/v1): resource definitions, sparse field selection,
+keyset paging, version-based ETags and fast serialization.
+"""
+import json
+import zlib
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from starlette.responses import JSONResponse
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.resource_versions import current_version
+from app.models.equipment import Equipment
+from app.models.operation import ProductionOperation
+from app.models.order import ProductionOrder
+from app.models.repair import RepairLog
+from app.models.warehouse import WarehouseItem
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is several times slower
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class ApiError(ValueError):
+    """Bad query parameters; rendered as 400."""
+
+
+class Resource:
+    """A model exposed read-only: which columns may be selected and filtered on."""
+
+    def __init__(self, name: str, model, fields: Tuple[str, ...], filters: Tuple[str, ...]):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.filters = filters
+
+    def columns(self, fields: Optional[str]) -> List[str]:
+        if not fields:
+            return list(self.fields)
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in self.fields]
+        if unknown:
+            raise ApiError(f"Unknown fields for {self.name}: {', '.join(unknown)}. Available: {', '.join(self.fields)}")
+        # id always comes along: it is the paging cursor and the item identity
+        return ["id"] + [f for f in dict.fromkeys(selected) if f != "id"]
+
+    def _query(self, db: Session, names: List[str]):
+        return db.query(*(getattr(self.model, n) for n in names))
+
+    def list(self, db: Session, fields: str = None, limit: int = None, after: str = None, filters: Dict[str, str] = None) -> dict:
+        names = self.columns(fields)
+        limit = settings.API_PAGE_SIZE if limit is None else limit
+        if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+            raise ApiError(f"limit must be between 1 and {settings.API_MAX_PAGE_SIZE}")
+        query = self._query(db, names)
+        for key, value in (filters or {}).items():
+            query = query.filter(getattr(self.model, key) == value)
+        # Keyset paging on the (time-ordered) primary key: stable under inserts, no OFFSET scans
+        if after:
+            query = query.filter(self.model.id > after)
+        rows = query.order_by(self.model.id).limit(limit + 1).all()
+        more = len(rows) > limit
+        data = [dict(zip(names, row)) for row in rows[:limit]]
+        return {"data": data, "next_after": data[-1]["id"] if more else None}
+
+    def get(self, db: Session, item_id: str, fields: str = None) -> Optional[dict]:
+        names = self.columns(fields)
+        row = self._query(db, names).filter(self.model.id == item_id).first()
+        return dict(zip(names, row)) if row is not None else None
+
+
+RESOURCES: Dict[str, Resource] = {r.name: r for r in (
+    Resource("orders", ProductionOrder, (
+        "id", "order_number", "product_code", "product_name", "quantity", "price_per_unit",
+        "due_date", "problem_details", "status", "created_date", "enterprise_id",
+    ), filters=("status", "enterprise_id", "product_code")),
+    Resource("operations", ProductionOperation, (
+        "id", "order_id", "name", "status", "start_time", "end_time",
+        "planned_quantity", "actual_quantity", "defect_quantity",
+    ), filters=("order_id", "status")),
+    Resource("equipment", Equipment, (
+        "id", "tag", "name", "type", "status", "last_maintenance",
+        "temperature", "vibration", "last_telemetry_update", "enterprise_id",
+    ), filters=("status", "type", "enterprise_id", "tag")),
+    Resource("repairs", RepairLog, (
+        "id", "equipment_id", "start_date", "end_date", "description", "performed_by", "cost", "status",
+    ), filters=("equipment_id", "status")),
+    Resource("warehouse", WarehouseItem, (
+        "id", "product_code", "product_name", "quantity", "unit", "price", "location", "version",
+    ), filters=("product_code", "location")),
+)}
+
+
+def resource_etag(db: Session, resource: str, representation: str) -> Optional[str]:
+    """
+    ETag from the resource's change counter plus the exact path and query (item,
+    fields, filters, page), so different representations never share a tag.
+    None if the resource has no counter row.
+    """
+    version = current_version(db, resource)
+    if version is None:
+        return None
+    variant = zlib.crc32(representation.encode("utf-8"))
+    return f'"{resource}.{version}.{variant:08x}"'
@@ -0,0 +1,71 @@
+"""
+Read-only rows for the list pages.
+
+List views only render a handful of columns, so they select exactly those
+columns and wrap each result tuple in a small immutable record. Nothing enters
+the session's identity map, nothing is tracked for changes, and derived values
+(such as a warehouse item's total value) come from SQL rather than being set
+on ORM instances.
+"""
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.equipment import Equipment
+from app.models.order import ProductionOrder
+from app.models.warehouse import WarehouseItem
+
+
+class OrderRow(NamedTuple):
+    id: str
+    order_number: str
+    product_code: str
+    product_name: Optional[str]
+    quantity: float
+    price_per_unit: Optional[float]
+    due_date: Optional[datetime]
+    problem_details: Optional[str]
+    status: str
+    enterprise_id: Optional[str]
+
+
+class EquipmentRow(NamedTuple):
+    id: str
+    tag: str
+    name: str
+    type: Optional[str]
+    status: str
+    enterprise_id: Optional[str]
+
+
+class WarehouseRow(NamedTuple):
+    id: str
+    product_code: str
+    product_name: str
+    quantity: float
+    unit: str
+    price: float
+    location: str
+    total_value: float
+
+
+def _columns(model, row_type):
+    return [getattr(model, name) for name in row_type._fields]
+
+
+def order_rows(db: Session) -> List[OrderRow]:
+    query = db.query(*_columns(ProductionOrder, OrderRow)).order_by(ProductionOrder.created_date.desc())
+    return list(map(OrderRow._make, query))
+
+
+def equipment_rows(db: Session) -> List[EquipmentRow]:
+    return list(map(EquipmentRow._make, db.query(*_columns(Equipment, EquipmentRow))))
+
+
+def warehouse_rows(db: Session) -> List[WarehouseRow]:
+    query = db.query(
+        WarehouseItem.id, WarehouseItem.product_code, WarehouseItem.product_name,
+        WarehouseItem.quantity, WarehouseItem.unit, WarehouseItem.price, WarehouseItem.location,
+        func.coalesce(WarehouseItem.quantity * WarehouseItem.price, 0.0).label("total_value"),
+    )
+    return list(map(WarehouseRow._make, query))
@@ -0,0 +1,280 @@
+"""
+Runtime metrics in the Prometheus text format, without a client library.
+
+Hot-path updates touch only the calling thread's own shard (no lock), so an
+observe()/inc() is a thread-local lookup, a bisect and a few list increments.
+Shards are summed when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+import jinja2
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        # First update from this thread: the only locked step
+        values = self._local.values = {}
+        with self._shards_lock:
+            self._shards.append(values)
+        return values
+
+    def _merged(self) -> Dict[tuple, object]:
+        raise NotImplementedError
+
+    def _labels(self, labels: tuple, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._merged().items()):
+            lines.append(f"{self.name}{self._labels(labels)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def _merged(self):
+        merged = {}
+        for shard in list(self._shards):
+            for labels, value in list(shard.items()):
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+
+class Gauge(Counter):
+    """Summed per-thread deltas, or a callback evaluated at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback: Callable[[], Dict[tuple, float]] = None):
+        super().__init__(name, help, labelnames)
+        self._callback = callback
+        self._set: Dict[tuple, float] = {}
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        # Last write wins; a single dict store is atomic under the GIL
+        self._set[labels] = value
+
+    def _merged(self):
+        merged = super()._merged()
+        merged.update(self._set)
+        if self._callback is not None:
+            merged.update(self._callback())
+        return merged
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._shard()
+        # [per-bucket counts..., +Inf count, sum]
+        row = values.get(labels)
+        if row is None:
+            row = values[labels] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def _merged(self):
+        merged = {}
+        for shard in list(self._shards):
+            for labels, row in list(shard.items()):
+                total = merged.setdefault(labels, [0] * len(row))
+                for i, v in enumerate(row):
+                    total[i] += v
+        return merged
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, row in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _number(bound))
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_number(row[-1])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route")
+)
+HTTP_REQUESTS = Counter("http_requests_total", "Requests by route template and status", ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served")
+
+# Templates
+TEMPLATE_RENDER_SECONDS = Histogram("template_render_seconds", "Jinja2 render time", ("template",))
+
+# Database connection pool
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool", ("engine",))
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent getting a connection from the pool", ("engine",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+
+# Background jobs (app.core.scheduler)
+JOB_RUN_SECONDS = Histogram(
+    "job_run_seconds", "Duration of one background job run", ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+JOB_RUNS = Counter("job_runs_total", "Background job runs by outcome (ok, error, timeout, skipped)", ("job", "outcome"))
+JOB_LAG = Gauge("job_start_lag_seconds", "How late the last run of a job started vs. its slot", ("job",))
+
+# Telemetry ingestion
+TELEMETRY_READINGS = Counter(
+    "telemetry_ingest_readings_total", "Ingested readings by outcome (accepted, rejected, unknown_tag, dropped)", ("result",)
+)
+TELEMETRY_BUFFERED = Gauge("telemetry_ingest_buffered_readings", "Readings waiting for the next bulk flush")
+TELEMETRY_FLUSH_SECONDS = Histogram("telemetry_ingest_flush_seconds", "Duration of one bulk flush")
+
+# Stock ledger
+STOCK_LEDGER_MISMATCHES = Gauge("stock_ledger_mismatches", "Products whose ledger balance differs from warehouse stock")
+
+# Telemetry alerts
+ALERT_EVAL_SECONDS = Histogram("alert_evaluation_seconds", "Duration of one alert rules evaluation")
+ALERT_TRANSITIONS = Counter("alert_transitions_total", "Alerts raised and cleared", ("event",))
+ALERTS_ACTIVE = Gauge("alerts_active", "Currently active alerts")
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware: request latency per route template and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope; never label by raw path
+            route = scope.get("route")
+            template = getattr(route, "path", None) or ("/static" if scope["path"].startswith("/static/") else "unmatched")
+            HTTP_REQUEST_SECONDS.observe(elapsed, scope["method"], template)
+            HTTP_REQUESTS.inc(scope["method"], template, str(status[0]))
+
+
+class TimedTemplate(jinja2.Template):
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            TEMPLATE_RENDER_SECONDS.observe(time.perf_counter() - started, self.name or "<string>")
+
+
+def instrument_templates(templates):
+    """Time every render of a Jinja2Templates instance."""
+    templates.env.template_class = TimedTemplate
+    if templates.env.cache is not None:
+        templates.env.cache.clear()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that times how long a checkout waits; labelled by pool_logging_name."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started, self.logging_name or "default")
+
+
+_engines: Dict[str, object] = {}
+
+
+def _pool_state() -> Dict[tuple, float]:
+    state = {}
+    for name, engine in list(_engines.items()):
+        # engine.pool, not a captured pool: dispose() replaces it
+        pool = engine.pool
+        for key, attr in (("checked_out", "checkedout"), ("size", "size"), ("overflow", "overflow")):
+            if hasattr(pool, attr):
+                state[(name, key)] = getattr(pool, attr)()
+    return state
+
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pool state: checked_out, size, overflow", ("engine", "state"), callback=_pool_state
+)
+
+
+def instrument_pool(engine, name: str):
+    """Checkout counter and pool state gauges for `engine` (create it with pool_logging_name=name)."""
+    _engines[name] = engine
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        DB_POOL_CHECKOUTS.inc(name)
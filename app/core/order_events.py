@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.core.outbox import outbox_handler
+from app.core.stock import receive_stock
+from app.core.production_rollup import record_order_completed
+from app.models.warehouse import StockMovement
+
+ORDER_COMPLETED = "order.completed"
+
+
+def order_completed_payload(order) -> dict:
+    # Everything the handlers need, so they still work if the order is edited or deleted meanwhile
+    return {
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "product_code": order.product_code,
+        "product_name": order.product_name,
+        "quantity": order.quantity,
+        "price_per_unit": order.price_per_unit,
+        # Retries can run much later (past midnight); the rollup day is when the order completed
+        "completed_at": datetime.now().isoformat(),
+    }
+
+
+@outbox_handler(ORDER_COMPLETED)
+def book_production_into_stock(db: Session, payload: dict):
+    """WMS Integration with Pricing: receive the order output at its unit price."""
+    already_booked = db.query(StockMovement.id).filter(
+        StockMovement.movement_type == "production",
+        StockMovement.reference == payload["order_number"]
+    ).first()
+    if already_booked:
+        return
+
+    receive_stock(
+        db,
+        product_code=payload["product_code"],
+        quantity=payload["quantity"],
+        price=payload["price_per_unit"] or 0.0,
+        product_name=payload["product_name"],
+        unit="т",
+        movement_type="production",
+        reference=payload["order_number"]
+    )
+    # Same transaction as the stock movement, so the guard above also covers the rollup
+    completed_at = payload.get("completed_at")  # Absent in events published before it was added
+    record_order_completed(db, payload["quantity"], at=datetime.fromisoformat(completed_at) if completed_at else None)
@@ -0,0 +1,144 @@
+"""
+Batch order intake (POST /orders/batch).
+
+One request carries up to ORDER_BATCH_MAX_ORDERS orders, each with optional
+initial operations. The whole batch is validated first, takes its order
+numbers from the block-reserved sequence in one call, and is written in one
+transaction: one multi-row INSERT for the orders, one for the operations, one
+rollup bump for the day. Nothing is written if any order is invalid.
+"""
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.numbering import next_order_numbers
+from app.core.production_rollup import bump_production_day
+from app.core.reference_data import ReferenceData
+from app.db.types import new_id
+from app.models.operation import ProductionOperation
+from app.models.order import ProductionOrder
+
+
+class OrderIntakeError(ValueError):
+    """The batch was rejected; `errors` lists the problems by order index."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors[:10]))
+        self.errors = errors
+
+
+class CreatedOrder(NamedTuple):
+    id: str
+    order_number: str
+    product_code: str  # As stored (stripped)
+    product_name: str
+
+
+def _number(value, field: str, errors: List[str], where: str) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append(f"{where}: {field} must be a number")
+        return None
+    return float(value)
+
+
+def _validate(index: int, raw, ref: ReferenceData, errors: List[str], dates: Dict[str, datetime]) -> Optional[dict]:
+    where = f"orders[{index}]"
+    if not isinstance(raw, dict):
+        errors.append(f"{where}: expected an object")
+        return None
+    before = len(errors)
+
+    product_code = raw.get("product_code")
+    if not isinstance(product_code, str) or not product_code.strip() or len(product_code) > 50:
+        errors.append(f"{where}: product_code is required (at most 50 characters)")
+        product_code = ""
+    product_code = product_code.strip()
+    product_name = raw.get("product_name") or product_code
+    if not isinstance(product_name, str) or len(product_name) > 200:
+        errors.append(f"{where}: product_name must be a string of at most 200 characters")
+    quantity = _number(raw.get("quantity"), "quantity", errors, where)
+    if quantity is not None and quantity <= 0:
+        errors.append(f"{where}: quantity must be positive")
+    price = _number(raw.get("price_per_unit", 0.0), "price_per_unit", errors, where)
+    if price is not None and price < 0:
+        errors.append(f"{where}: price_per_unit cannot be negative")
+    enterprise_id = raw.get("enterprise_id")
+    if not isinstance(enterprise_id, str) or enterprise_id not in ref.enterprise_by_id:
+        errors.append(f"{where}: unknown enterprise_id")
+
+    due_date = raw.get("due_date") or None
+    if due_date is not None:
+        # A batch usually repeats a handful of dates; parse each once
+        parsed = dates.get(due_date) if isinstance(due_date, str) else None
+        if parsed is None:
+            try:
+                parsed = dates[due_date] = datetime.combine(date.fromisoformat(due_date), datetime.min.time())
+            except (TypeError, ValueError):
+                errors.append(f"{where}: due_date must be YYYY-MM-DD")
+        due_date = parsed
+
+    operations = raw.get("operations") or []
+    if not isinstance(operations, list) or len(operations) > settings.ORDER_BATCH_MAX_OPERATIONS:
+        errors.append(f"{where}: operations must be a list of at most {settings.ORDER_BATCH_MAX_OPERATIONS}")
+        operations = []
+    for op_index, op in enumerate(operations):
+        op_where = f"{where}.operations[{op_index}]"
+        if not isinstance(op, dict) or not isinstance(op.get("name"), str) or not op["name"].strip():
+            errors.append(f"{op_where}: name is required")
+        else:
+            _number(op.get("planned_quantity", 0.0), "planned_quantity", errors, op_where)
+
+    if len(errors) > before:
+        return None
+    return {
+        "product_code": product_code,
+        "product_name": product_name,
+        "quantity": quantity,
+        "price_per_unit": price,
+        "enterprise_id": enterprise_id,
+        "due_date": due_date,
+        "operations": operations,
+    }
+
+
+def intake_orders(db: Session, payload: List, ref: ReferenceData) -> List[CreatedOrder]:
+    """
+    Validate and insert a batch in the caller's transaction (the caller commits).
+    Raises OrderIntakeError without writing anything when an order is invalid.
+    """
+    if not isinstance(payload, list) or not payload:
+        raise OrderIntakeError(["orders must be a non-empty list"])
+    if len(payload) > settings.ORDER_BATCH_MAX_ORDERS:
+        raise OrderIntakeError([f"at most {settings.ORDER_BATCH_MAX_ORDERS} orders per batch"])
+
+    errors: List[str] = []
+    dates: Dict[str, datetime] = {}
+    orders = [_validate(i, raw, ref, errors, dates) for i, raw in enumerate(payload)]
+    if errors:
+        raise OrderIntakeError(errors)
+
+    now = datetime.now()
+    order_rows, operation_rows, created = [], [], []
+    for order, number in zip(orders, next_order_numbers(len(orders), now)):
+        order_id = new_id()
+        operations = order.pop("operations")
+        order_rows.append({**order, "id": order_id, "order_number": number, "status": "new", "created_date": now})
+        operation_rows.extend(
+            {
+                "id": new_id(),
+                "order_id": order_id,
+                "name": op["name"].strip(),
+                "planned_quantity": float(op.get("planned_quantity", 0.0)),
+                "status": "pending",
+            }
+            for op in operations
+        )
+        created.append(CreatedOrder(order_id, number, order["product_code"], order["product_name"]))
+
+    # ORM bulk INSERTs: executemany batches, and the session events (resource versions, search index) still see them
+    db.execute(insert(ProductionOrder), order_rows)
+    if operation_rows:
+        db.execute(insert(ProductionOperation), operation_rows)
+    bump_production_day(db, now.date(), ordered_quantity=sum(row["quantity"] for row in order_rows), ordered_count=len(order_rows))
+    return created
@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.db.session import SessionLocal
+from app.models.outbox import OutboxEvent
+
+# event_type -> handlers(db, payload). Handlers must be idempotent: an event can be
+# delivered again after a crash between the side effect and the commit.
+_handlers: Dict[str, List[Callable[[Session, dict], None]]] = {}
+
+DISPATCH_JOB = "outbox"
+
+
+def outbox_handler(event_type: str):
+    def register(func):
+        _handlers.setdefault(event_type, []).append(func)
+        return func
+    return register
+
+
+def publish(db: Session, event_type: str, payload: dict):
+    """Record an event in the caller's transaction. Dispatched after commit."""
+    db.add(OutboxEvent(event_type=event_type, payload=json.dumps(payload, ensure_ascii=False, default=str)))
+
+
+def notify_dispatcher():
+    # Optional nudge after commit so events do not wait for the next poll
+    scheduler.trigger(DISPATCH_JOB)
+
+
+def _claim_batch(db: Session, limit: int) -> List[OutboxEvent]:
+    # SKIP LOCKED lets several dispatchers share the table on PostgreSQL; ignored on SQLite
+    return db.query(OutboxEvent).filter(
+        OutboxEvent.status == "pending",
+        OutboxEvent.available_at <= datetime.now()
+    ).order_by(OutboxEvent.created_at).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def _handle(db: Session, event: OutboxEvent):
+    payload = json.loads(event.payload)
+    for handler in _handlers.get(event.event_type, []):
+        handler(db, payload)
+    event.status = "done"
+    event.attempts += 1
+    event.processed_at = datetime.now()
+    event.last_error = None
+
+
+def _record_failure(db: Session, event_id: str, error: Exception):
+    event = db.query(OutboxEvent).filter(OutboxEvent.id == event_id).first()
+    if not event:
+        return
+    event.attempts += 1
+    event.last_error = f"{type(error).__name__}: {error}"
+    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        event.status = "failed"
+    else:
+        backoff = min(2 ** event.attempts, settings.OUTBOX_MAX_BACKOFF_SECONDS)
+        event.available_at = datetime.now() + timedelta(seconds=backoff)
+    db.commit()
+
+
+def dispatch_batch(db: Session, limit: int = None) -> int:
+    """
+    Process up to `limit` due events. The whole batch is applied in one transaction;
+    if any handler fails the batch is replayed event by event so one bad event only
+    delays itself. Returns the number of events processed successfully.
+    """
+    events = _claim_batch(db, limit or settings.OUTBOX_BATCH_SIZE)
+    if not events:
+        db.rollback()
+        return 0
+
+    event_ids = [e.id for e in events]
+    try:
+        for event in events:
+            _handle(db, event)
+        db.commit()
+        return len(events)
+    except Exception:
+        db.rollback()
+
+    done = 0
+    for event_id in event_ids:
+        event = db.query(OutboxEvent).filter(
+            OutboxEvent.id == event_id, OutboxEvent.status == "pending"
+        ).with_for_update(skip_locked=True).first()
+        if not event:
+            continue
+        try:
+            _handle(db, event)
+            db.commit()
+            done += 1
+        except Exception as e:
+            db.rollback()
+            _record_failure(db, event_id, e)
+    return done
+
+
+def outbox_stats(db: Session) -> dict:
+    counts = dict(db.query(OutboxEvent.status, func.count(OutboxEvent.id)).group_by(OutboxEvent.status).all())
+    oldest = db.query(func.min(OutboxEvent.created_at)).filter(OutboxEvent.status == "pending").scalar()
+    return {
+        "pending": counts.get("pending", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_pending": oldest.isoformat() if oldest else None,
+    }
+
+
+def dispatch_pending():
+    """
+    Scheduled job: drain the outbox in batches. Runs every OUTBOX_POLL_SECONDS,
+    or right away when woken up by notify_dispatcher().
+    """
+    db: Session = SessionLocal()
+    try:
+        while dispatch_batch(db) > 0:
+            pass
+    finally:
+        db.close()
@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.upsert import upsert_insert
+from app.models.order import ProductionOrder
+from app.models.rollup import ProductionDaily, RollupWatermark
+from app.models.warehouse import StockMovement
+
+ROLLUP_NAME = "production_daily"
+
+
+def _as_date(value) -> date:
+    # func.date() comes back as 'YYYY-MM-DD' on SQLite and as a date elsewhere
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def bump_production_day(
+    db: Session,
+    day: date,
+    ordered_quantity: float = 0.0,
+    ordered_count: int = 0,
+    completed_quantity: float = 0.0,
+    completed_count: int = 0,
+):
+    """Add deltas to one day of the rollup in the caller's transaction."""
+    deltas = {
+        "ordered_quantity": ordered_quantity,
+        "ordered_count": ordered_count,
+        "completed_quantity": completed_quantity,
+        "completed_count": completed_count,
+    }
+    table = ProductionDaily.__table__
+    stmt = upsert_insert(db, table)
+    if stmt is not None:
+        stmt = stmt.values(day=day, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day],
+            set_={k: table.c[k] + stmt.excluded[k] for k in deltas}
+        )
+        db.execute(stmt)
+        return
+
+    updated = db.query(ProductionDaily).filter(ProductionDaily.day == day).update(
+        {getattr(ProductionDaily, k): getattr(ProductionDaily, k) + v for k, v in deltas.items()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(ProductionDaily(day=day, **deltas))
+        db.flush()
+
+
+def record_order_created(db: Session, order: ProductionOrder):
+    bump_production_day(db, order.created_date.date(), ordered_quantity=order.quantity, ordered_count=1)
+
+
+def record_order_deleted(db: Session, order: ProductionOrder):
+    # Completed output stays: the goods were produced and booked into stock
+    bump_production_day(db, order.created_date.date(), ordered_quantity=-order.quantity, ordered_count=-1)
+
+
+def record_order_completed(db: Session, quantity: float, at: datetime = None):
+    day = (at or datetime.now()).date()
+    bump_production_day(db, day, completed_quantity=quantity, completed_count=1)
+
+
+def _bucket_source(db: Session, start: date, end: date) -> Dict[date, List[float]]:
+    """
+    SQL-side daily buckets straight from the source tables for [start, end).
+    Ordered volume from orders, completed volume from production movements in the stock ledger.
+    """
+    buckets: Dict[date, List[float]] = {}
+    lo, hi = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+    order_day = func.date(ProductionOrder.created_date)
+    for day, quantity, count in db.query(
+        order_day, func.sum(ProductionOrder.quantity), func.count(ProductionOrder.id)
+    ).filter(
+        ProductionOrder.created_date >= lo, ProductionOrder.created_date < hi
+    ).group_by(order_day):
+        b = buckets.setdefault(_as_date(day), [0.0, 0, 0.0, 0])
+        b[0] += quantity or 0.0
+        b[1] += count
+
+    movement_day = func.date(StockMovement.created_at)
+    for day, quantity, count in db.query(
+        movement_day, func.sum(StockMovement.quantity), func.count(StockMovement.id)
+    ).filter(
+        StockMovement.movement_type == "production",
+        StockMovement.created_at >= lo, StockMovement.created_at < hi
+    ).group_by(movement_day):
+        b = buckets.setdefault(_as_date(day), [0.0, 0, 0.0, 0])
+        b[2] += quantity or 0.0
+        b[3] += count
+
+    return buckets
+
+
+def rebuild_production_rollup(db: Session, days: int = None):
+    """
+    Recompute the rollup for the last `days` days from source tables and move the watermark there.
+    Run with no concurrent writers (startup, data reset).
+    """
+    days = days or settings.PRODUCTION_ROLLUP_BACKFILL_DAYS
+    covered_from = date.today() - timedelta(days=days - 1)
+
+    db.query(ProductionDaily).delete()
+    for day, (oq, oc, cq, cc) in _bucket_source(db, covered_from, date.today() + timedelta(days=1)).items():
+        db.add(ProductionDaily(
+            day=day, ordered_quantity=oq, ordered_count=oc, completed_quantity=cq, completed_count=cc
+        ))
+
+    watermark = db.query(RollupWatermark).filter(RollupWatermark.name == ROLLUP_NAME).first()
+    if watermark:
+        watermark.covered_from = covered_from
+    else:
+        db.add(RollupWatermark(name=ROLLUP_NAME, covered_from=covered_from))
+    db.commit()
+
+
+def ensure_production_rollup(db: Session):
+    if not db.query(RollupWatermark).filter(RollupWatermark.name == ROLLUP_NAME).first():
+        rebuild_production_rollup(db)
+
+
+def production_trend(db: Session, days: int) -> Tuple[List[date], List[float], List[float]]:
+    """
+    Daily ordered and completed volume for the last `days` days (today included).
+    Covered days are read from the rollup (one row per day); anything older than the
+    watermark is bucketed in SQL from the source tables.
+    """
+    today = date.today()
+    start = today - timedelta(days=days - 1)
+    covered_from = db.query(RollupWatermark.covered_from).filter(
+        RollupWatermark.name == ROLLUP_NAME
+    ).scalar() or today + timedelta(days=1)
+
+    buckets: Dict[date, List[float]] = {}
+    if start < covered_from:
+        buckets.update(_bucket_source(db, start, min(covered_from, today + timedelta(days=1))))
+
+    for row in db.query(ProductionDaily).filter(
+        ProductionDaily.day >= max(start, covered_from), ProductionDaily.day <= today
+    ):
+        buckets[row.day] = [row.ordered_quantity, row.ordered_count, row.completed_quantity, row.completed_count]
+
+    axis = [start + timedelta(days=i) for i in range(days)]
+    ordered = [buckets[d][0] if d in buckets else 0 for d in axis]
+    completed = [buckets[d][2] if d in buckets else 0 for d in axis]
+    return axis, ordered, completed
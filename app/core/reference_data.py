@@ -0,0 +1,143 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import primary_session
+from app.models.enterprise import Enterprise
+from app.models.equipment import Equipment
+from app.models.warehouse import WarehouseItem
+
+
+class EnterpriseRef(NamedTuple):
+    id: str
+    name: str
+    type: str
+    region: Optional[str]
+
+
+class EquipmentRef(NamedTuple):
+    id: str
+    tag: str
+    name: str
+    type: Optional[str]
+    enterprise_id: Optional[str]
+
+
+class ReferenceData:
+    """
+    Immutable snapshot of the slow-changing lookups used by forms and list pages.
+    Shared by all requests as is; a rebuild produces a new snapshot, never mutates this one.
+    """
+    __slots__ = ("version", "built_at", "enterprises", "enterprise_by_id", "equipment_by_id", "equipment_by_tag", "products")
+
+    def __init__(self, version: int, enterprises: List[EnterpriseRef], equipment: List[EquipmentRef], products: Dict[str, str]):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.enterprises = enterprises
+        self.enterprise_by_id = {e.id: e for e in enterprises}
+        self.equipment_by_id = {e.id: e for e in equipment}
+        self.equipment_by_tag = {e.tag: e for e in equipment}
+        self.products = products  # product_code -> product_name
+
+    def with_products(self, extra: Dict[str, str]) -> "ReferenceData":
+        """Copy that also lists the codes of `extra` this snapshot does not know yet."""
+        new = {code: name for code, name in extra.items() if code not in self.products}
+        if not new:
+            return self
+        copy = object.__new__(ReferenceData)
+        for slot in self.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        copy.products = dict(sorted({**self.products, **new}.items()))
+        return copy
+
+    def enterprise_name(self, enterprise_id: Optional[str], default: str = "-") -> str:
+        ent = self.enterprise_by_id.get(enterprise_id)
+        return ent.name if ent else default
+
+
+def load_reference_data(db: Session, version: int) -> ReferenceData:
+    """
+    Three column-only queries; no ORM objects are kept past the request that builds it.
+    Product codes come from the warehouse; codes that only orders use are added
+    by ReferenceDataCache.note_product() rather than by scanning the orders table.
+    """
+    enterprises = [
+        EnterpriseRef(*row)
+        for row in db.query(Enterprise.id, Enterprise.name, Enterprise.type, Enterprise.region).order_by(Enterprise.name)
+    ]
+    equipment = [
+        EquipmentRef(*row)
+        for row in db.query(Equipment.id, Equipment.tag, Equipment.name, Equipment.type, Equipment.enterprise_id).order_by(Equipment.tag)
+    ]
+    products = dict(db.query(WarehouseItem.product_code, WarehouseItem.product_name))
+    return ReferenceData(version, enterprises, equipment, dict(sorted(products.items())))
+
+
+class ReferenceDataCache:
+    """
+    Versioned in-process cache of enterprises, equipment tags and product codes.
+
+    Writers call bump() after committing; readers compare the snapshot's version
+    with the current one, which needs no lock and no query. Only the first reader
+    after a bump rebuilds, the others keep serving the old snapshot meanwhile.
+    The TTL bounds staleness from writers in other processes.
+
+    Product codes first seen in orders of this process are remembered and kept
+    across rebuilds, which read the warehouse only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild = threading.Lock()  # Held by the one reader that rebuilds
+        self._version = 0
+        self._snapshot: Optional[ReferenceData] = None
+        self._noted: Dict[str, str] = {}  # product_code -> product_name
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+
+    def _fresh(self, snapshot: Optional[ReferenceData]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self._version
+            and time.monotonic() - snapshot.built_at <= settings.REFERENCE_DATA_TTL_SECONDS
+        )
+
+    def get(self, db: Session) -> ReferenceData:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            return snapshot
+        # Someone else is rebuilding: serve the old snapshot, or wait if there is none yet
+        if not self._rebuild.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                return snapshot  # Rebuilt by another thread while we waited
+            version = self._version
+            # A bump() while this runs leaves the result already stale, so the next reader rebuilds
+            with primary_session(db) as primary:  # Never from a replica that may predate the bump
+                fresh = load_reference_data(primary, version)
+            with self._lock:
+                self._snapshot = fresh = fresh.with_products(self._noted)
+            return fresh
+        finally:
+            self._rebuild.release()
+
+    def note_product(self, db: Session, product_code: str, product_name: Optional[str] = None):
+        # New orders rarely introduce a new code; only then does the snapshot change
+        if not product_code or product_code in self.get(db).products:
+            return
+        with self._lock:
+            self._noted[product_code] = product_name or product_code
+            if self._snapshot is not None:
+                self._snapshot = self._snapshot.with_products(self._noted)
+
+
+reference_data = ReferenceDataCache()
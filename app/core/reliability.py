@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import primary_session
+from app.models.equipment import Equipment
+from app.models.repair import RepairLog
+
+HOURS = 3600.0
+
+
+class ReliabilityStats:
+    """
+    Running reliability figures for one asset (or one equipment type).
+    Holds only sums and counts so that groups can be merged cheaply.
+    """
+    __slots__ = (
+        "key", "tag", "name", "type", "failures", "completed", "repair_hours",
+        "uptime_hours", "uptime_intervals", "total_cost", "first_event", "last_event",
+    )
+
+    def __init__(self, key, tag=None, name=None, type=None):
+        self.key = key
+        self.tag = tag
+        self.name = name
+        self.type = type
+        self.failures = 0
+        self.completed = 0
+        self.repair_hours = 0.0
+        self.uptime_hours = 0.0
+        self.uptime_intervals = 0
+        self.total_cost = 0.0
+        self.first_event: Optional[datetime] = None
+        self.last_event: Optional[datetime] = None
+
+    @property
+    def mttr(self) -> Optional[float]:
+        # Mean Time To Repair, hours (completed repairs only)
+        return self.repair_hours / self.completed if self.completed else None
+
+    @property
+    def mtbf(self) -> Optional[float]:
+        # Mean Time Between Failures, hours (end of one repair -> start of the next)
+        return self.uptime_hours / self.uptime_intervals if self.uptime_intervals else None
+
+    @property
+    def cost_per_day(self) -> float:
+        # Repair spend spread over the observed period (at least one day)
+        if not self.first_event or not self.last_event:
+            return 0.0
+        days = max((self.last_event - self.first_event).total_seconds() / 86400.0, 1.0)
+        return self.total_cost / days
+
+    def merge(self, other: "ReliabilityStats"):
+        self.failures += other.failures
+        self.completed += other.completed
+        self.repair_hours += other.repair_hours
+        self.uptime_hours += other.uptime_hours
+        self.uptime_intervals += other.uptime_intervals
+        self.total_cost += other.total_cost
+        for ts in (other.first_event, other.last_event):
+            if ts is None:
+                continue
+            if self.first_event is None or ts < self.first_event:
+                self.first_event = ts
+            if self.last_event is None or ts > self.last_event:
+                self.last_event = ts
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.key,
+            "tag": self.tag,
+            "name": self.name,
+            "type": self.type,
+            "failures": self.failures,
+            "completed_repairs": self.completed,
+            "mttr_hours": round(self.mttr, 2) if self.mttr is not None else None,
+            "mtbf_hours": round(self.mtbf, 2) if self.mtbf is not None else None,
+            "total_cost": round(self.total_cost, 2),
+            "cost_per_day": round(self.cost_per_day, 2),
+        }
+
+
+def _stats_query(db: Session):
+    # Column projection only: one row per repair (or one empty row per asset without repairs),
+    # ordered so that consecutive repairs of an asset are adjacent.
+    return db.query(
+        Equipment.id, Equipment.tag, Equipment.name, Equipment.type,
+        RepairLog.start_date, RepairLog.end_date, RepairLog.cost,
+    ).outerjoin(
+        RepairLog, RepairLog.equipment_id == Equipment.id
+    ).order_by(Equipment.id, RepairLog.start_date)
+
+
+def compute_reliability(db: Session, equipment_id: str = None) -> Dict[str, ReliabilityStats]:
+    """
+    Single batched pass over the repair log. Returns stats keyed by equipment id.
+    """
+    query = _stats_query(db)
+    if equipment_id is not None:
+        query = query.filter(Equipment.id == equipment_id)
+
+    result: Dict[str, ReliabilityStats] = {}
+    current = None
+    prev_end = None
+    for eq_id, tag, name, eq_type, start, end, cost in query:
+        if current is None or current.key != eq_id:
+            current = result[eq_id] = ReliabilityStats(eq_id, tag, name, eq_type)
+            prev_end = None
+        if start is None:
+            continue
+
+        current.failures += 1
+        current.total_cost += cost or 0.0
+        if current.first_event is None:
+            current.first_event = start
+        current.last_event = max(current.last_event or start, end or start)
+
+        if prev_end is not None and start >= prev_end:
+            current.uptime_hours += (start - prev_end).total_seconds() / HOURS
+            current.uptime_intervals += 1
+        if end is not None:
+            current.completed += 1
+            current.repair_hours += max((end - start).total_seconds(), 0.0) / HOURS
+            prev_end = end if prev_end is None else max(prev_end, end)
+
+    return result
+
+
+class ReliabilityCache:
+    """
+    In-process cache of per-asset reliability stats.
+    Built lazily with one full pass on the primary; single assets are refreshed
+    when their repairs change. The TTL bounds staleness from writers in other
+    processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_equipment: Optional[Dict[str, ReliabilityStats]] = None
+        self._built_at = 0.0
+
+    def _ensure(self, db: Session) -> Dict[str, ReliabilityStats]:
+        with self._lock:
+            if self._by_equipment is None or time.monotonic() - self._built_at > settings.RELIABILITY_TTL_SECONDS:
+                with primary_session(db) as primary:
+                    self._by_equipment = compute_reliability(primary)
+                self._built_at = time.monotonic()
+            return self._by_equipment
+
+    def invalidate(self):
+        with self._lock:
+            self._by_equipment = None
+
+    def refresh_equipment(self, db: Session, equipment_id: str):
+        with self._lock:
+            if self._by_equipment is None:
+                return  # Nothing cached yet, next read does the full pass
+            fresh = compute_reliability(db, equipment_id)
+            # Copy-on-write so readers iterating the old dict are never disturbed
+            updated = dict(self._by_equipment)
+            if equipment_id in fresh:
+                updated[equipment_id] = fresh[equipment_id]
+            else:
+                updated.pop(equipment_id, None)
+            self._by_equipment = updated
+
+    def get_equipment(self, db: Session, equipment_id: str) -> Optional[ReliabilityStats]:
+        return self._ensure(db).get(equipment_id)
+
+    def ranking(self, db: Session) -> List[ReliabilityStats]:
+        # Worst assets first: most failures, then shortest MTBF
+        stats = list(self._ensure(db).values())
+        stats.sort(key=lambda s: (-s.failures, s.mtbf if s.mtbf is not None else float("inf")))
+        return stats
+
+    def by_type(self, db: Session) -> List[ReliabilityStats]:
+        groups: Dict[str, ReliabilityStats] = {}
+        for s in self._ensure(db).values():
+            key = s.type or "-"
+            if key not in groups:
+                groups[key] = ReliabilityStats(key, type=key)
+            groups[key].merge(s)
+        return sorted(groups.values(), key=lambda s: -s.failures)
+
+
+reliability_cache = ReliabilityCache()
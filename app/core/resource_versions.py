@@ -0,0 +1,73 @@
+"""
+Per-resource change counters for conditional GETs on the JSON API.
+
+Any session write to a resource's table bumps that resource's row in
+resource_versions inside the same transaction: unit-of-work flushes
+(after_flush) as well as bulk query().update()/delete() and ORM-enabled
+insert/update/delete statements (do_orm_execute). A reader therefore never
+sees new data under an old version. Only raw Core writes on a bare connection
+bypass this; the app has none for these tables.
+
+The counter row is a hot spot by design: concurrent writers of one resource
+serialize on it until commit, which SQLite does anyway.
+"""
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.resource_version import ResourceVersion
+
+RESOURCE_BY_TABLE: Dict[str, str] = {
+    "production_orders": "orders",
+    "production_operations": "operations",
+    "defect_logs": "operations",
+    "equipment": "equipment",
+    "repair_logs": "repairs",
+    "warehouse_items": "warehouse",
+}
+RESOURCES = tuple(sorted(set(RESOURCE_BY_TABLE.values())))
+
+
+def ensure_resource_versions(engine: Engine):
+    """Create missing counter rows; without its row a resource is served without ETags."""
+    table = ResourceVersion.__table__
+    with engine.begin() as conn:
+        present = {r for (r,) in conn.execute(select(table.c.resource))}
+        missing = [{"resource": r, "version": 0} for r in RESOURCES if r not in present]
+        if missing:
+            conn.execute(insert(table), missing)
+
+
+def current_version(db: Session, resource: str) -> Optional[int]:
+    return db.query(ResourceVersion.version).filter(ResourceVersion.resource == resource).scalar()
+
+
+def _bump(session: Session, resources: Iterable[str]):
+    table = ResourceVersion.__table__
+    # On the session's connection but as Core, so this does not re-enter the ORM events
+    session.connection().execute(
+        update(table).where(table.c.resource.in_(sorted(resources))).values(version=table.c.version + 1)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_after_flush(session, flush_context):
+    tables = {type(obj).__tablename__ for obj in session.new}
+    tables.update(type(obj).__tablename__ for obj in session.deleted)
+    tables.update(
+        type(obj).__tablename__ for obj in session.dirty
+        if session.is_modified(obj, include_collections=False)
+    )
+    resources = {RESOURCE_BY_TABLE[t] for t in tables if t in RESOURCE_BY_TABLE}
+    if resources:
+        _bump(session, resources)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    resource = RESOURCE_BY_TABLE.get(getattr(table, "name", None))
+    if resource is not None:
+        _bump(orm_execute_state.session, (resource,))
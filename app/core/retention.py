@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.telemetry_archive import telemetry_archive
+from app.db.session import SessionLocal
+from app.models.telemetry import TelemetryReading
+
+
+def prune_telemetry(db: Session, older_than: datetime, batch_size: int = None) -> int:
+    """
+    Delete telemetry history older than `older_than`, committing every batch so
+    ingestion flushes are never blocked for long. Returns the number of rows deleted.
+    """
+    batch_size = batch_size or settings.TELEMETRY_RETENTION_BATCH
+    deleted = 0
+    while True:
+        # Oldest rows have the lowest ids, so this finds them without an index on timestamp
+        ids = [i for (i,) in db.query(TelemetryReading.id).filter(TelemetryReading.timestamp < older_than).limit(batch_size)]
+        if not ids:
+            return deleted
+        db.query(TelemetryReading).filter(TelemetryReading.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def telemetry_retention_job():
+    """Scheduled job: keep TELEMETRY_RETENTION_DAYS of history, in the table and the archive (0 keeps everything)."""
+    if settings.TELEMETRY_RETENTION_DAYS <= 0:
+        return
+    cutoff = datetime.now() - timedelta(days=settings.TELEMETRY_RETENTION_DAYS)
+    db: Session = SessionLocal()
+    try:
+        prune_telemetry(db, cutoff)
+    finally:
+        db.close()
+    # Whole days only: the day file holding the cutoff stays until the next day
+    telemetry_archive.remove_before(cutoff.date())
@@ -0,0 +1,211 @@
+"""
+Periodic background jobs on the app's event loop.
+
+Each job is an ordinary blocking function. The scheduler runs one asyncio task
+per job that sleeps until the next slot and hands the call to its own thread
+pool, so jobs never block request handling or each other's schedule:
+
+- fixed rate: slots are start + n * interval, so run time does not make the
+  schedule drift; slots missed while a run overran are skipped, not queued;
+- jitter: each start is delayed by up to `jitter` seconds, so jobs of several
+  processes do not hit the database in lockstep;
+- timeout: the scheduler stops waiting after `timeout` seconds. A thread
+  cannot be killed, so the run goes on, and further slots are skipped until
+  it returns (skip-if-running);
+- trigger(): runs a job now instead of at its next slot, from any thread;
+- failures are logged with their traceback and counted, and the job keeps
+  its schedule;
+- shutdown() stops every job task and waits for them. Jobs added with
+  final=True (buffers answered as accepted) then run once more, after any
+  run still in flight, before the pool shuts down without starting queued
+  work.
+
+Run counts and durations per job are exported on /metrics.
+"""
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import JOB_LAG, JOB_RUN_SECONDS, JOB_RUNS
+
+logger = logging.getLogger("app.scheduler")
+
+
+class Job:
+    def __init__(self, name: str, func: Callable[[], object], interval: float,
+                 jitter: float = 0.0, timeout: Optional[float] = None, initial_delay: float = 0.0,
+                 final: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.final = final
+        self.runs = 0
+        self.failures = 0
+        self.last_started: Optional[float] = None  # Unix time
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._future: Optional[Future] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stopping = False
+
+    def add(self, name: str, func: Callable[[], object], interval: float, **options) -> Job:
+        """Register a job; jobs added after start() are started right away."""
+        if name in self._jobs:
+            raise ValueError(f"Job {name} already registered")
+        job = self._jobs[name] = Job(name, func, interval, **options)
+        if self._loop is not None:
+            self._start_job(job)
+        return job
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def start(self):
+        """Call from the running event loop (app startup)."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        self._pool = ThreadPoolExecutor(max_workers=settings.SCHEDULER_WORKERS, thread_name_prefix="job")
+        for job in self._jobs.values():
+            self._start_job(job)
+
+    def _start_job(self, job: Job):
+        job._wake = asyncio.Event()
+        job._task = self._loop.create_task(self._run(job), name=f"job:{job.name}")
+
+    def trigger(self, name: str):
+        """Run the job as soon as possible (thread-safe; no-op before start)."""
+        job = self._jobs.get(name)
+        if job is None or job._wake is None or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(job._wake.set)
+
+    async def shutdown(self):
+        tasks = [job._task for job in self._jobs.values() if job._task is not None]
+        # Cancelling alone is not enough on 3.11: wait_for() swallows a cancellation that
+        # races with its inner future finishing, and the job loop would carry on. The flag
+        # (checked after every await in _run) and the wake-up end the loop either way.
+        self._stopping = True
+        for job in self._jobs.values():
+            if job._wake is not None:
+                job._wake.set()
+        for task in tasks:
+            task.cancel()
+        while tasks:
+            _, pending = await asyncio.wait(tasks, timeout=1.0)
+            for task in pending:
+                task.cancel()
+            tasks = list(pending)
+        if self._pool is not None:
+            for job in self._jobs.values():
+                if job.final:
+                    await self._run_final(job)
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._loop = self._pool = None
+        for job in self._jobs.values():
+            job._task = job._wake = None
+
+    async def _run_final(self, job: Job):
+        try:
+            if job.running:
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job._future)), job.timeout)
+            await asyncio.wait_for(self._loop.run_in_executor(self._pool, job.func), job.timeout)
+        except asyncio.TimeoutError:
+            logger.error("Final run of job %s timed out after %ss", job.name, job.timeout)
+        except Exception:
+            logger.exception("Final run of job %s failed", job.name)
+
+    async def _sleep_until(self, job: Job, deadline: float) -> bool:
+        """Sleep until `deadline` (loop clock); True when woken early by trigger()."""
+        delay = deadline - self._loop.time()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(job._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        woken = job._wake.is_set()
+        job._wake.clear()
+        return woken
+
+    async def _run(self, job: Job):
+        next_slot = self._loop.time() + job.initial_delay
+        while not self._stopping:
+            woken = await self._sleep_until(job, next_slot)
+            if self._stopping:
+                return
+            # Lateness of the loop itself; the jitter below is deliberate
+            JOB_LAG.set(max(0.0, self._loop.time() - next_slot), job.name)
+            if not woken and job.jitter:
+                woken = await self._sleep_until(job, self._loop.time() + random.uniform(0, job.jitter))
+                if self._stopping:
+                    return
+            now = self._loop.time()
+            if job.running:
+                JOB_RUNS.inc(job.name, "skipped")
+            else:
+                await self._execute(job)
+            # Fixed rate: the next slot after now; a run that overran skips the slots it covered
+            if woken:
+                next_slot = now + job.interval
+            else:
+                next_slot += job.interval
+                if next_slot <= self._loop.time():
+                    missed = int((self._loop.time() - next_slot) // job.interval) + 1
+                    JOB_RUNS.inc(job.name, "skipped", amount=missed)
+                    next_slot += missed * job.interval
+
+    async def _execute(self, job: Job):
+        job.last_started = time.time()
+        started = time.perf_counter()
+        job._future = self._pool.submit(job.func)
+        job.runs += 1
+        try:
+            # Shielded: a timeout or shutdown stops the waiting, not the thread
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job._future)), job.timeout)
+        except asyncio.TimeoutError:
+            job.failures += 1
+            job.last_error = f"timed out after {job.timeout}s"
+            JOB_RUNS.inc(job.name, "timeout")
+            logger.error("Job %s timed out after %ss; its slots are skipped until it returns", job.name, job.timeout)
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            JOB_RUNS.inc(job.name, "error")
+            logger.exception("Job %s failed", job.name)
+        else:
+            job.last_error = None
+            JOB_RUNS.inc(job.name, "ok")
+        job.last_duration = time.perf_counter() - started
+        JOB_RUN_SECONDS.observe(job.last_duration, job.name)
+
+
+scheduler = Scheduler()
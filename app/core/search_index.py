@@ -0,0 +1,399 @@
+"""
+Global typeahead search (GET /api/search) over equipment tags and names,
+order numbers, products (codes and names from orders and the warehouse) and
+enterprise names.
+
+In-memory trigram index:
+- every entity is one document whose text is its searchable fields,
+  lowercased, each preceded by a start-of-field mark, so "\\x02eq" means "a
+  field starting with eq";
+- trigram -> array of document numbers. Documents are only ever appended,
+  so every posting list is sorted without sorting;
+- a query of three or more characters intersects its trigrams' posting lists
+  (binary search of each candidate in the next list), walking the rarest list
+  from its newest end until SEARCH_SCAN_LIMIT candidates are found, and
+  checks the survivors against the text. A two-character query looks up the
+  start-of-field trigram, i.e. matches field prefixes;
+- field-prefix matches rank before substring matches, then shorter titles.
+
+Writes: session events record inserted, changed and deleted entities at flush
+and apply them after commit; an update is a delete plus an insert, and
+deleted documents stay as tombstones. ORM bulk inserts (session.execute(
+insert(Model), rows) with ids) are indexed from their rows; a bulk
+query().delete() on an indexed table marks the index stale instead. Bulk
+UPDATEs are not seen; the app's only ones set status, stock and telemetry
+columns, which are not searchable.
+
+A scheduled job rebuilds the index from the database: at startup, when it is
+stale, and every SEARCH_INDEX_REBUILD_SECONDS. That drops tombstones and picks
+up other processes' writes. Changes committed during a rebuild are replayed
+onto the new index before it replaces the old one.
+"""
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.db.session import SessionLocal
+from app.models.enterprise import Enterprise
+from app.models.equipment import Equipment
+from app.models.order import ProductionOrder
+from app.models.warehouse import WarehouseItem
+
+KINDS = ("equipment", "order", "product", "enterprise")
+REBUILD_JOB = "search_index"
+FIELD_START = "\x02"
+
+# Attributes whose change re-indexes an entity
+SEARCH_FIELDS = {
+    Equipment: ("tag", "name"),
+    ProductionOrder: ("order_number", "product_code", "product_name"),
+    WarehouseItem: ("product_code", "product_name"),
+    Enterprise: ("name", "region"),
+}
+MODEL_BY_TABLE = {model.__tablename__: model for model in SEARCH_FIELDS}
+
+
+class SearchDoc(NamedTuple):
+    kind: str
+    id: str
+    title: str
+    subtitle: Optional[str]
+
+    @property
+    def url(self) -> str:
+        if self.kind == "product":
+            return f"/warehouse#product-{self.id}"
+        return f"/{_URL_PREFIX[self.kind]}/{self.id}"
+
+
+_URL_PREFIX = {"equipment": "equipment", "order": "orders", "enterprise": "enterprises"}
+
+# ("put", doc, fields) or ("remove", kind, id)
+Change = Tuple
+
+
+def normalize(query: str) -> str:
+    return "".join(ch for ch in query.strip().lower() if ch.isprintable())
+
+
+def _text(fields: Iterable[Optional[str]]) -> str:
+    return "".join(FIELD_START + f.lower() for f in fields if f)
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _member(candidates: np.ndarray, postings: np.ndarray) -> np.ndarray:
+    """Boolean mask: which sorted candidates occur in the sorted postings."""
+    pos = np.searchsorted(postings, candidates)
+    pos[pos == len(postings)] = 0
+    return postings[pos] == candidates
+
+
+class SearchIndex:
+    """One generation of the index. All access under its lock (posting arrays cannot grow while viewed)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: List[Optional[SearchDoc]] = []
+        self._texts: List[Optional[str]] = []
+        self._doc_no: Dict[Tuple[str, str], int] = {}
+        self._postings: Dict[str, array] = {}
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._doc_no)
+
+    @property
+    def tombstones(self) -> int:
+        return len(self._docs) - len(self._doc_no)
+
+    def put(self, doc: SearchDoc, fields: Sequence[Optional[str]]):
+        with self._lock:
+            self._put(doc, fields)
+
+    def _put(self, doc: SearchDoc, fields: Sequence[Optional[str]]):
+        key = (doc.kind, doc.id)
+        text = _text(fields)
+        old = self._doc_no.get(key)
+        if old is not None:
+            if self._texts[old] == text:
+                self._docs[old] = doc  # Same search text: only what is displayed changed
+                return
+            self._docs[old] = self._texts[old] = None
+        number = len(self._docs)
+        self._docs.append(doc)
+        self._texts.append(text)
+        self._doc_no[key] = number
+        postings = self._postings
+        for gram in _trigrams(text):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("i")
+            posting.append(number)
+
+    def _remove(self, kind: str, entity_id: str):
+        number = self._doc_no.pop((kind, entity_id), None)
+        if number is not None:
+            self._docs[number] = self._texts[number] = None
+
+    def apply(self, changes: Iterable[Change]):
+        with self._lock:
+            for change in changes:
+                if change[0] == "put":
+                    self._put(change[1], change[2])
+                else:
+                    self._remove(change[1], change[2])
+
+    def _candidates(self, grams: Iterable[str]) -> List[int]:
+        """Document numbers containing every gram, newest first, at most SEARCH_SCAN_LIMIT."""
+        lists = [self._postings.get(g) for g in grams]
+        if not lists or any(p is None for p in lists):
+            return []
+        lists.sort(key=len)
+        arrays = [np.frombuffer(p, dtype=np.int32) for p in lists]
+        # Walk the rarest list backwards in growing chunks: a short query matching
+        # most documents stops after the newest few thousand instead of intersecting everything
+        found: List[int] = []
+        end, chunk = len(arrays[0]), settings.SEARCH_SCAN_LIMIT
+        while end > 0 and len(found) < settings.SEARCH_SCAN_LIMIT:
+            candidates = arrays[0][max(0, end - chunk):end]
+            for posting in arrays[1:]:
+                if not len(candidates):
+                    break
+                candidates = candidates[_member(candidates, posting)]
+            # Plain ints out: no numpy view of a posting array outlives the lock
+            found.extend(candidates[::-1].tolist())
+            end -= chunk
+            chunk *= 4
+        return found[:settings.SEARCH_SCAN_LIMIT]
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[Iterable[str]] = None) -> List[SearchDoc]:
+        q = normalize(query)
+        if len(q) < 2:
+            return []
+        grams = [FIELD_START + q] if len(q) == 2 else _trigrams(q)
+        prefix = FIELD_START + q
+        hits = []
+        with self._lock:
+            for number in self._candidates(grams):
+                text = self._texts[number]
+                if text is None or q not in text:
+                    continue
+                doc = self._docs[number]
+                if kinds and doc.kind not in kinds:
+                    continue
+                hits.append((prefix not in text, len(doc.title), doc))
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return [hit[2] for hit in hits[:limit]]
+
+
+# -- documents -------------------------------------------------------------------
+
+def equipment_doc(id, tag, name) -> Change:
+    return ("put", SearchDoc("equipment", id, tag, name), (tag, name))
+
+
+def order_doc(id, order_number, product_code, product_name) -> Change:
+    # Product fields are searched through the product document, not on every order
+    return ("put", SearchDoc("order", id, order_number, product_name or product_code), (order_number,))
+
+
+def product_doc(product_code, product_name) -> Change:
+    return ("put", SearchDoc("product", product_code, product_code, product_name), (product_code, product_name))
+
+
+def enterprise_doc(id, name, region) -> Change:
+    return ("put", SearchDoc("enterprise", id, name, region), (name,))
+
+
+class _Values(dict):
+    """A bulk INSERT parameter row read like an instance (absent columns are None)."""
+    __getattr__ = dict.get
+
+
+def _changes_for(obj, model=None) -> List[Change]:
+    model = model or type(obj)
+    if model is Equipment:
+        return [equipment_doc(obj.id, obj.tag, obj.name)]
+    if model is ProductionOrder:
+        changes = [order_doc(obj.id, obj.order_number, obj.product_code, obj.product_name)]
+        if obj.product_code:
+            changes.append(product_doc(obj.product_code, obj.product_name))
+        return changes
+    if model is WarehouseItem:
+        return [product_doc(obj.product_code, obj.product_name)] if obj.product_code else []
+    if model is Enterprise:
+        return [enterprise_doc(obj.id, obj.name, obj.region)]
+    return []
+
+
+def _removal_for(obj) -> List[Change]:
+    # Products stay until the next rebuild: other orders or stock may still carry the code
+    if isinstance(obj, Equipment):
+        return [("remove", "equipment", obj.id)]
+    if isinstance(obj, ProductionOrder):
+        return [("remove", "order", obj.id)]
+    if isinstance(obj, Enterprise):
+        return [("remove", "enterprise", obj.id)]
+    return []
+
+
+def build_index(db: Session) -> SearchIndex:
+    """Full build from column-only queries; orders oldest first so the newest rank first among equals."""
+    index = SearchIndex()
+    names: Dict[str, str] = {}  # One shared string per product name instead of one per order
+    changes: List[Change] = []
+    for row in db.query(Enterprise.id, Enterprise.name, Enterprise.region):
+        changes.append(enterprise_doc(*row))
+    for row in db.query(Equipment.id, Equipment.tag, Equipment.name):
+        changes.append(equipment_doc(*row))
+    index.apply(changes)
+
+    products: Dict[str, Optional[str]] = {}
+    batch: List[Change] = []
+    query = db.query(
+        ProductionOrder.id, ProductionOrder.order_number, ProductionOrder.product_code, ProductionOrder.product_name
+    ).order_by(ProductionOrder.created_date).yield_per(10_000)
+    for order_id, number, code, name in query:
+        name = names.setdefault(name, name) if name is not None else None
+        batch.append(order_doc(order_id, number, code, name))
+        if code:
+            products.setdefault(code, name)
+        if len(batch) >= 10_000:
+            index.apply(batch)
+            batch = []
+    index.apply(batch)
+    # Warehouse names win over order names for the same code
+    products.update(db.query(WarehouseItem.product_code, WarehouseItem.product_name))
+    index.apply(product_doc(code, name) for code, name in products.items() if code)
+    return index
+
+
+class SearchIndexCache:
+    """
+    The current index plus the bookkeeping that keeps it up to date. Searches
+    before the first build return nothing (ready is False), they never block on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[SearchIndex] = None
+        self._replay: Optional[List[Change]] = None  # Changes committed while a rebuild runs
+        self.stale = True
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def stats(self) -> dict:
+        index = self._index
+        if index is None:
+            return {"ready": False}
+        return {"ready": True, "documents": len(index), "tombstones": index.tombstones, "built_at": index.built_at}
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[Iterable[str]] = None) -> List[SearchDoc]:
+        index = self._index
+        return index.search(query, limit, kinds) if index is not None else []
+
+    def apply(self, changes: List[Change]):
+        with self._lock:
+            if self._index is not None:
+                self._index.apply(changes)
+            if self._replay is not None:
+                self._replay.extend(changes)
+
+    def invalidate(self):
+        self.stale = True
+        scheduler.trigger(REBUILD_JOB)
+
+    def rebuild(self, db: Session):
+        with self._lock:
+            self._replay = []
+            self.stale = False
+        try:
+            fresh = build_index(db)
+        except Exception:
+            with self._lock:
+                self._replay = None
+                self.stale = True
+            raise
+        with self._lock:
+            fresh.apply(self._replay)
+            self._replay = None
+            self._index = fresh
+
+
+search_index = SearchIndexCache()
+
+
+def rebuild_search_index():
+    """Scheduled job: full rebuild (also run early by invalidate())."""
+    db: Session = SessionLocal()
+    try:
+        search_index.rebuild(db)
+    finally:
+        db.close()
+
+
+# -- keeping it current ---------------------------------------------------------------
+
+def _search_fields_changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in SEARCH_FIELDS[type(obj)])
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session, flush_context):
+    changes: List[Change] = []
+    for obj in session.new:
+        if type(obj) in SEARCH_FIELDS:
+            changes.extend(_changes_for(obj))
+    for obj in session.dirty:
+        if type(obj) in SEARCH_FIELDS and _search_fields_changed(obj):
+            changes.extend(_changes_for(obj))
+    for obj in session.deleted:
+        if type(obj) in SEARCH_FIELDS:
+            changes.extend(_removal_for(obj))
+    if changes:
+        session.info.setdefault("search_changes", []).extend(changes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    model = MODEL_BY_TABLE.get(getattr(table, "name", None))
+    if model is None:
+        return
+    session = orm_execute_state.session
+    rows = orm_execute_state.parameters
+    if orm_execute_state.is_insert and isinstance(rows, list) and all("id" in row for row in rows):
+        # session.execute(insert(Model), [rows]): index the rows like flushed instances
+        changes = session.info.setdefault("search_changes", [])
+        for row in rows:
+            changes.extend(_changes_for(_Values(row), model))
+    else:
+        session.info["search_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop("search_changes", None)
+    if changes:
+        search_index.apply(changes)
+    if session.info.pop("search_stale", False):
+        search_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("search_changes", None)
+    session.info.pop("search_stale", None)
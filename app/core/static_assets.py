@@ -0,0 +1,121 @@
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import get_route_path
+from app.core.compression import available_encodings, compress, is_compressible, negotiate
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class StaticAsset:
+    __slots__ = ("path", "hashed_path", "digest", "media_type", "variants")
+
+    def __init__(self, path: str, data: bytes):
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(path)
+        self.path = path
+        self.hashed_path = f"{stem}.{digest}{ext}"
+        self.digest = digest
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.variants: Dict[str, bytes] = {"identity": data}
+        if is_compressible(self.media_type):
+            for encoding in available_encodings():
+                # Done once, so the slowest (smallest) settings are affordable
+                packed = compress(data, encoding, level=11 if encoding == "br" else 9)
+                if len(packed) < len(data):
+                    self.variants[encoding] = packed
+
+    def etag(self, encoding: str) -> str:
+        # Strong validators: each encoding is a different byte sequence, so it gets its own tag
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+class StaticAssets:
+    """
+    ASGI app for /static: every file is read, hashed and precompressed (gzip,
+    plus brotli when installed) once at start.
+
+    Templates link assets through static_url(), which returns the content-hashed
+    name (css/app.3f9c1e0a2b4d.css). Those URLs never change meaning, so they are
+    served as immutable for a year; a changed file gets a new URL. Plain names
+    keep working but must be revalidated (ETag / If-None-Match -> 304).
+    Files added or edited after start are picked up on the next restart.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._by_path: Dict[str, StaticAsset] = {}
+        self._by_hashed: Dict[str, StaticAsset] = {}
+        self.build()
+
+    def build(self):
+        by_path, by_hashed = {}, {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                full = os.path.join(root, name)
+                path = os.path.relpath(full, self.directory).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    asset = StaticAsset(path, f.read())
+                by_path[asset.path] = asset
+                by_hashed[asset.hashed_path] = asset
+        self._by_path, self._by_hashed = by_path, by_hashed
+
+    def url(self, path: str) -> str:
+        asset = self._by_path.get(path)
+        return f"/static/{asset.hashed_path if asset else path}"
+
+    def _lookup(self, path: str):
+        asset = self._by_hashed.get(path)
+        if asset is not None:
+            return asset, IMMUTABLE
+        asset = self._by_path.get(path)
+        return asset, REVALIDATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] not in ("GET", "HEAD"):
+            return await PlainTextResponse("Method Not Allowed", status_code=405)(scope, receive, send)
+        asset, cache_control = self._lookup(get_route_path(scope).lstrip("/"))
+        if asset is None:
+            return await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+
+        request_headers = {k: v.decode("latin-1") for k, v in scope["headers"] if k in (b"accept-encoding", b"if-none-match")}
+        encoding = _pick_variant(asset, request_headers.get(b"accept-encoding"))
+        headers = {"ETag": asset.etag(encoding), "Cache-Control": cache_control}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get(b"if-none-match")
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            return await Response(status_code=304, headers=headers)(scope, receive, send)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.variants[encoding]
+        response = Response(body if scope["method"] == "GET" else b"", headers=headers, media_type=asset.media_type)
+        if scope["method"] == "HEAD":
+            response.headers["content-length"] = str(len(body))
+        await response(scope, receive, send)
+
+
+def _pick_variant(asset: StaticAsset, accept_encoding: Optional[str]) -> str:
+    encoding = negotiate(accept_encoding)
+    if encoding in asset.variants:
+        return encoding
+    if encoding == "br" and "gzip" in asset.variants and negotiate(_without_br(accept_encoding)) == "gzip":
+        return "gzip"
+    return "identity"
+
+
+def _without_br(accept_encoding: str) -> str:
+    return ",".join(p for p in accept_encoding.split(",") if p.strip().partition(";")[0].strip().lower() != "br")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    return etag in candidates
@@ -0,0 +1,106 @@
+from sqlalchemy.orm import Session
+from app.db.types import new_id
+from app.db.upsert import upsert_insert
+from app.models.warehouse import WarehouseItem
+from app.core.stock_ledger import record_movement
+
+MAX_RETRIES = 10
+
+
+class StockConflictError(Exception):
+    """Optimistic merge kept losing to concurrent writers."""
+
+
+def ship_stock(db: Session, item_id: str, amount: float, reference: str = None) -> bool:
+    """
+    Atomically take `amount` off an item and append a shipment to the ledger.
+    Returns False when the item is missing or holds less than `amount`;
+    nothing is changed in that case. The caller commits.
+    """
+    updated = db.query(WarehouseItem).filter(
+        WarehouseItem.id == item_id,
+        WarehouseItem.quantity >= amount
+    ).update({
+        WarehouseItem.quantity: WarehouseItem.quantity - amount,
+        WarehouseItem.version: WarehouseItem.version + 1,
+    }, synchronize_session=False)
+    if updated != 1:
+        return False
+
+    # Our UPDATE holds the row until commit, so this reads the cost we shipped at
+    product_code, price = db.query(WarehouseItem.product_code, WarehouseItem.price).filter(
+        WarehouseItem.id == item_id
+    ).one()
+    record_movement(db, product_code, "shipment", -amount, price, reference)
+    return True
+
+
+def receive_stock(
+    db: Session,
+    product_code: str,
+    quantity: float,
+    price: float,
+    product_name: str = None,
+    unit: str = None,
+    location: str = None,
+    movement_type: str = "receipt",
+    reference: str = None,
+):
+    """
+    Add stock for `product_code`, merging the price as a weighted (moving) average,
+    and append the move to the ledger. Creates the item on first receipt.
+    The caller commits.
+    """
+    record_movement(db, product_code, movement_type, quantity, price, reference)
+
+    values = {
+        "product_code": product_code,
+        "product_name": product_name or product_code,
+        "quantity": quantity,
+        "price": price,
+        "unit": unit,
+        "location": location,
+    }
+    values = {k: v for k, v in values.items() if v is not None}
+
+    table = WarehouseItem.__table__
+    stmt = upsert_insert(db, table)
+    if stmt is not None:
+        # One statement: SET expressions read the pre-update row, so the merge is atomic
+        stmt = stmt.values(id=new_id(), version=0, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.product_code],
+            set_={
+                "price": (table.c.quantity * table.c.price + stmt.excluded.quantity * stmt.excluded.price)
+                         / (table.c.quantity + stmt.excluded.quantity),
+                "quantity": table.c.quantity + stmt.excluded.quantity,
+                "version": table.c.version + 1,
+            }
+        )
+        db.execute(stmt)
+        return
+
+    # Portable path: read, merge in Python, write back only if nobody moved the row meanwhile
+    for _ in range(MAX_RETRIES):
+        row = db.query(
+            WarehouseItem.id, WarehouseItem.quantity, WarehouseItem.price, WarehouseItem.version
+        ).filter(WarehouseItem.product_code == product_code).first()
+        if row is None:
+            db.add(WarehouseItem(**values))
+            db.flush()
+            return
+
+        new_quantity = row.quantity + quantity
+        new_price = (row.quantity * row.price + quantity * price) / new_quantity
+        updated = db.query(WarehouseItem).filter(
+            WarehouseItem.id == row.id,
+            WarehouseItem.version == row.version
+        ).update({
+            WarehouseItem.quantity: new_quantity,
+            WarehouseItem.price: new_price,
+            WarehouseItem.version: row.version + 1,
+        }, synchronize_session=False)
+        if updated == 1:
+            return
+
+    raise StockConflictError(product_code)
@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import STOCK_LEDGER_MISMATCHES
+from app.db.session import SessionLocal
+from app.models.warehouse import WarehouseItem, StockMovement, StockSnapshot
+
+logger = logging.getLogger("app.stock_ledger")
+
+
+def record_movement(
+    db: Session,
+    product_code: str,
+    movement_type: str,
+    quantity: float,
+    unit_price: float,
+    reference: str = None,
+):
+    """Append one ledger row in the caller's transaction. `quantity` is signed."""
+    db.add(StockMovement(
+        product_code=product_code,
+        movement_type=movement_type,
+        quantity=quantity,
+        unit_price=unit_price,
+        value=quantity * unit_price,
+        reference=reference,
+    ))
+
+
+def backfill_opening_balances(db: Session) -> int:
+    """
+    Databases created before the ledger existed: book current stock as opening movements
+    so that ledger balances match WarehouseItem. No-op once the ledger has any rows.
+    """
+    if db.query(StockMovement.id).first() is not None:
+        return 0
+    items = db.query(WarehouseItem.product_code, WarehouseItem.quantity, WarehouseItem.price).all()
+    for code, quantity, price in items:
+        record_movement(db, code, "opening", quantity or 0.0, price or 0.0, "opening balance")
+    db.commit()
+    return len(items)
+
+
+def _latest_snapshot_time(db: Session, at: datetime = None) -> Optional[datetime]:
+    query = db.query(func.max(StockSnapshot.taken_at))
+    if at is not None:
+        query = query.filter(StockSnapshot.taken_at <= at)
+    return query.scalar()
+
+
+def _ledger_tail(db: Session, after: Optional[datetime], until: datetime, product_code: str = None):
+    query = db.query(
+        StockMovement.product_code,
+        func.sum(StockMovement.quantity),
+        func.sum(StockMovement.value),
+    ).filter(StockMovement.created_at <= until)
+    if after is not None:
+        query = query.filter(StockMovement.created_at > after)
+    if product_code is not None:
+        query = query.filter(StockMovement.product_code == product_code)
+    return query.group_by(StockMovement.product_code).all()
+
+
+def balance_at(db: Session, at: datetime, product_code: str = None) -> Dict[str, dict]:
+    """
+    On-hand quantity and value per product at `at`:
+    nearest snapshot at or before `at` plus the ledger tail after it.
+    """
+    snapshot_time = _latest_snapshot_time(db, at)
+
+    balances: Dict[str, dict] = {}
+    if snapshot_time is not None:
+        query = db.query(
+            StockSnapshot.product_code, StockSnapshot.quantity, StockSnapshot.value
+        ).filter(StockSnapshot.taken_at == snapshot_time)
+        if product_code is not None:
+            query = query.filter(StockSnapshot.product_code == product_code)
+        for code, quantity, value in query:
+            balances[code] = {"quantity": quantity, "value": value}
+
+    for code, quantity, value in _ledger_tail(db, snapshot_time, at, product_code):
+        entry = balances.setdefault(code, {"quantity": 0.0, "value": 0.0})
+        entry["quantity"] += quantity or 0.0
+        entry["value"] += value or 0.0
+
+    return balances
+
+
+def compact_snapshots(db: Session, until: datetime = None) -> int:
+    """
+    Write a full set of balances as of `until` (previous snapshot + ledger since).
+    Returns the number of snapshot rows written. The caller's session is committed.
+    """
+    if until is None:
+        until = datetime.now() - timedelta(seconds=settings.STOCK_SNAPSHOT_LAG_SECONDS)
+
+    previous = _latest_snapshot_time(db)
+    if previous is not None and previous >= until:
+        return 0
+
+    balances = balance_at(db, until)
+    db.add_all([
+        StockSnapshot(taken_at=until, product_code=code, quantity=b["quantity"], value=b["value"])
+        for code, b in balances.items()
+    ])
+    db.commit()
+    return len(balances)
+
+
+def reconcile_stock(db: Session, tolerance: float = 1e-6) -> Dict[str, Tuple[float, float]]:
+    """
+    Products whose ledger balance differs from the warehouse quantity:
+    product_code -> (ledger quantity, warehouse quantity). Read-only.
+    """
+    ledger = {code: b["quantity"] for code, b in balance_at(db, datetime.now()).items()}
+    stock = dict(
+        db.query(WarehouseItem.product_code, func.sum(WarehouseItem.quantity)).group_by(WarehouseItem.product_code)
+    )
+    mismatches = {}
+    for code in ledger.keys() | stock.keys():
+        expected, actual = ledger.get(code, 0.0), stock.get(code) or 0.0
+        if abs(expected - actual) > tolerance:
+            mismatches[code] = (expected, actual)
+    return mismatches
+
+
+def reconcile_stock_job():
+    """Scheduled job: report products whose ledger and warehouse quantities disagree."""
+    db: Session = SessionLocal()
+    try:
+        mismatches = reconcile_stock(db)
+    finally:
+        db.close()
+    STOCK_LEDGER_MISMATCHES.set(len(mismatches))
+    if mismatches:
+        sample = ", ".join(
+            f"{code}: ledger {ledger_qty:g} vs stock {stock_qty:g}"
+            for code, (ledger_qty, stock_qty) in sorted(mismatches.items())[:5]
+        )
+        logger.warning("%d products out of balance (%s)", len(mismatches), sample)
+
+
+def compact_snapshots_job():
+    """Scheduled job: compact the ledger into a balance snapshot."""
+    db: Session = SessionLocal()
+    try:
+        compact_snapshots(db)
+    finally:
+        db.close()
@@ -0,0 +1,430 @@
+"""
+Cold telemetry archive: readings older than TELEMETRY_ARCHIVE_AFTER_DAYS move
+out of telemetry_readings into compressed column blocks, one file per day
+under TELEMETRY_ARCHIVE_DIR.
+
+A block holds one device's readings for one day, encoded per column:
+
+- timestamps (microseconds): the first one, then delta-of-delta. A steady
+  sampling interval makes those zero or a few units of jitter;
+- temperature / vibration: quantized to 1 / TEMPERATURE_SCALE and
+  1 / VIBRATION_SCALE (the resolution ingestion rounds to) and
+  delta-encoded. A column that does not round-trip exactly at that step
+  (more precision, or missing values) is stored as the XOR of consecutive
+  float64 bit patterns instead, which is lossless;
+
+each column in the narrowest integer width that fits, then the block
+deflated. A day file is a fixed header, the block index
+(equipment, first/last timestamp, count, offset, length) and the blocks.
+Files are written once (rewritten whole when late readings for the day are
+archived) and read through mmap: a range read looks at the index and
+decodes only the blocks of that device overlapping the range.
+
+telemetry_history() merges the archive with the rows still in the table, so
+callers do not need to know where a reading lives.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.telemetry import TelemetryReading
+
+MAGIC = b"TLA1"
+SUFFIX = ".tla"
+TEMPERATURE_SCALE = 100  # Quantization steps per unit: 0.01 °C, 0.001 mm/s
+VIBRATION_SCALE = 1000
+EPOCH = datetime(1970, 1, 1)  # Stored timestamps are naive, like the table's
+ARCHIVE_FETCH_ROWS = 10_000  # Rows per fetch while streaming a day out of the table
+
+FILE_HEADER = struct.Struct("<4sI")  # magic, block count
+INDEX_ENTRY = np.dtype([
+    ("equipment", "S16"), ("first", "<i8"), ("last", "<i8"),
+    ("count", "<u4"), ("offset", "<u8"), ("length", "<u4"),
+])
+# count, first timestamp, then per column: codec, width, first quantized value
+BLOCK_HEADER = struct.Struct("<Iq" + "BBq" * 3)
+QUANTIZED, XOR = 0, 1
+_WIDTHS = {1: np.int8, 2: np.int16, 4: np.int32, 8: np.int64}
+
+# (timestamps in microseconds since EPOCH, temperature, vibration)
+Series = Tuple[np.ndarray, np.ndarray, np.ndarray]
+# (first timestamp, last timestamp, count, encode_block() bytes)
+EncodedBlock = Tuple[int, int, int, bytes]
+
+
+def to_micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def _equipment(raw: bytes) -> str:
+    # numpy drops trailing NUL bytes of "S" fields
+    return str(uuid.UUID(bytes=raw.ljust(16, b"\0")))
+
+
+def _empty() -> Series:
+    return np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, np.float64)
+
+
+# -- block codec -----------------------------------------------------------------------
+
+def _narrow(values: np.ndarray) -> Tuple[int, bytes]:
+    if not len(values):
+        return 1, b""
+    low, high = int(values.min()), int(values.max())
+    for width, dtype in _WIDTHS.items():
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return width, values.astype(dtype).tobytes()
+    raise AssertionError("int64 always fits")
+
+
+def _encode_floats(values: np.ndarray, scale: int) -> Tuple[int, int, int, bytes]:
+    quantized = np.round(values * scale)
+    if np.all(np.isfinite(quantized)) and np.array_equal(quantized / scale, values):
+        q = quantized.astype(np.int64)
+        width, data = _narrow(np.diff(q))
+        return QUANTIZED, width, int(q[0]), data
+    bits = values.astype("<f8").view("<u8")
+    previous = np.concatenate((np.zeros(1, "<u8"), bits[:-1]))
+    return XOR, 8, 0, np.bitwise_xor(bits, previous).tobytes()
+
+
+def _decode_floats(codec: int, width: int, first: int, data: bytes, count: int, scale: int) -> np.ndarray:
+    if codec == XOR:
+        return np.bitwise_xor.accumulate(np.frombuffer(data, "<u8", count)).view("<f8")
+    deltas = np.frombuffer(data, _WIDTHS[width], count - 1).astype(np.int64)
+    q = np.empty(count, np.int64)
+    q[0] = first
+    np.cumsum(deltas, out=q[1:])
+    q[1:] += first
+    return q / scale
+
+
+def encode_block(timestamps: np.ndarray, temperature: np.ndarray, vibration: np.ndarray) -> bytes:
+    """One device's readings, ordered by time, as a compressed block."""
+    count = len(timestamps)
+    # delta-of-delta: dod[0] is the first interval, dod[i] the change of interval
+    deltas = np.diff(timestamps)
+    ts_width, ts_data = _narrow(np.diff(deltas, prepend=0))
+    t_codec, t_width, t_first, t_data = _encode_floats(temperature, TEMPERATURE_SCALE)
+    v_codec, v_width, v_first, v_data = _encode_floats(vibration, VIBRATION_SCALE)
+    header = BLOCK_HEADER.pack(count, int(timestamps[0]), 0, ts_width, 0,
+                               t_codec, t_width, t_first, v_codec, v_width, v_first)
+    return header + zlib.compress(ts_data + t_data + v_data, 6)
+
+
+def decode_block(block) -> Series:
+    (count, ts0, _, ts_width, _, t_codec, t_width, t_first,
+     v_codec, v_width, v_first) = BLOCK_HEADER.unpack_from(block)
+    payload = zlib.decompress(block[BLOCK_HEADER.size:])
+
+    ts_size = (count - 1) * ts_width
+    deltas = np.cumsum(np.frombuffer(payload, _WIDTHS[ts_width], count - 1).astype(np.int64))
+    timestamps = np.empty(count, np.int64)
+    timestamps[0] = ts0
+    np.cumsum(deltas, out=timestamps[1:])
+    timestamps[1:] += ts0
+
+    t_size = count * 8 if t_codec == XOR else (count - 1) * t_width
+    temperature = _decode_floats(t_codec, t_width, t_first, payload[ts_size:ts_size + t_size], count, TEMPERATURE_SCALE)
+    vibration = _decode_floats(v_codec, v_width, v_first, payload[ts_size + t_size:], count, VIBRATION_SCALE)
+    return timestamps, temperature, vibration
+
+
+# -- day files -------------------------------------------------------------------------
+
+def _day_path(directory: str, day: date) -> str:
+    return os.path.join(directory, day.isoformat() + SUFFIX)
+
+
+def _encoded(series: Series) -> EncodedBlock:
+    timestamps = series[0]
+    return int(timestamps[0]), int(timestamps[-1]), len(timestamps), encode_block(*series)
+
+
+def write_day(directory: str, day: date, blocks: Dict[str, Series]) -> int:
+    """Write (replace) the file of `day` from equipment id -> series; returns its size in bytes."""
+    return write_encoded_day(directory, day, {equipment_id: _encoded(series) for equipment_id, series in blocks.items()})
+
+
+def write_encoded_day(directory: str, day: date, blocks: Dict[str, EncodedBlock]) -> int:
+    """write_day() for blocks that are already encoded."""
+    os.makedirs(directory, exist_ok=True)
+    index = np.zeros(len(blocks), INDEX_ENTRY)
+    ordered = sorted(blocks.items())
+    offset = FILE_HEADER.size + index.nbytes
+    for i, (equipment_id, (first, last, count, data)) in enumerate(ordered):
+        index[i] = (uuid.UUID(equipment_id).bytes, first, last, count, offset, len(data))
+        offset += len(data)
+
+    path = _day_path(directory, day)
+    # A temp file of its own: every worker runs the archive job, and two may write the same day
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(FILE_HEADER.pack(MAGIC, len(blocks)))
+            f.write(index.tobytes())
+            for _, (_, _, _, data) in ordered:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)  # Readers keep their mapping of the old file until they notice the new one
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return offset
+
+
+class DayFile:
+    """
+    A memory-mapped day file and its block index. Never closed explicitly:
+    a reader may still be decoding when the file is evicted or replaced, so
+    the mapping is released when the last reference goes.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = FILE_HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a telemetry archive file")
+        self.index = np.frombuffer(self._map, INDEX_ENTRY, count, FILE_HEADER.size)
+
+    def equipment_ids(self) -> List[str]:
+        return [_equipment(raw) for raw in self.index["equipment"]]
+
+    def read(self, equipment_id: Optional[str] = None, start: int = None, end: int = None) -> Iterable[Tuple[str, Series]]:
+        """Decoded blocks of one device (or all) overlapping [start, end) microseconds."""
+        mask = np.ones(len(self.index), bool)
+        if equipment_id is not None:
+            mask &= self.index["equipment"] == uuid.UUID(equipment_id).bytes
+        if start is not None:
+            mask &= self.index["last"] >= start
+        if end is not None:
+            mask &= self.index["first"] < end
+        view = memoryview(self._map)
+        for entry in self.index[mask]:
+            offset = int(entry["offset"])
+            series = decode_block(view[offset:offset + int(entry["length"])])
+            yield _equipment(entry["equipment"]), series
+
+    def encoded(self) -> Dict[str, EncodedBlock]:
+        """Every block as stored (views into the mapping), by equipment id."""
+        view = memoryview(self._map)
+        return {
+            _equipment(entry["equipment"]): (
+                int(entry["first"]), int(entry["last"]), int(entry["count"]),
+                view[int(entry["offset"]):int(entry["offset"]) + int(entry["length"])],
+            )
+            for entry in self.index
+        }
+
+
+class TelemetryArchive:
+    """
+    The day files of one directory, with the most recently used ones kept
+    mapped. Each access re-checks the file, so a day rewritten by another
+    process is picked up.
+    """
+
+    def __init__(self, directory: str, open_files: int = 64):
+        self.directory = directory
+        self._open_files = open_files
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[date, DayFile]" = OrderedDict()
+
+    def days(self) -> List[date]:
+        if not os.path.isdir(self.directory):
+            return []
+        days = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                try:
+                    days.append(date.fromisoformat(name[:-len(SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def day(self, day: date) -> Optional[DayFile]:
+        path = _day_path(self.directory, day)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.forget(day)
+            return None
+        with self._lock:
+            cached = self._files.get(day)
+            if cached is not None and cached.identity == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                self._files.move_to_end(day)
+                return cached
+            opened = self._files[day] = DayFile(path)
+            while len(self._files) > self._open_files:
+                self._files.popitem(last=False)
+            return opened
+
+    def forget(self, day: date):
+        with self._lock:
+            self._files.pop(day, None)
+
+    def read_range(self, equipment_id: str, since: datetime, until: datetime) -> Series:
+        """One device's archived readings in [since, until), oldest first."""
+        start, end = to_micros(since), to_micros(until)
+        parts = []
+        day = since.date()
+        while day <= until.date():
+            day_file = self.day(day)
+            if day_file is not None:
+                for _, (timestamps, temperature, vibration) in day_file.read(equipment_id, start, end):
+                    keep = (timestamps >= start) & (timestamps < end)
+                    parts.append((timestamps[keep], temperature[keep], vibration[keep]))
+            day += timedelta(days=1)
+        return _concat(parts)
+
+    def read_day(self, day: date) -> Dict[str, Series]:
+        day_file = self.day(day)
+        return dict(day_file.read()) if day_file is not None else {}
+
+    def size(self) -> int:
+        return sum(os.path.getsize(_day_path(self.directory, day)) for day in self.days())
+
+    def remove_before(self, day: date) -> int:
+        """Delete the files of days before `day`; returns how many."""
+        removed = 0
+        for old in self.days():
+            if old >= day:
+                break
+            self.forget(old)
+            os.remove(_day_path(self.directory, old))
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        return self.remove_before(date.max)
+
+
+telemetry_archive = TelemetryArchive(settings.TELEMETRY_ARCHIVE_DIR)
+
+
+def _concat(parts: List[Series]) -> Series:
+    if not parts:
+        return _empty()
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+# -- moving rows out of the table ------------------------------------------------------
+
+def archive_day(db: Session, day: date, archive: TelemetryArchive = None) -> int:
+    """
+    Move the table's readings of `day` into its archive file (merged with what
+    the file already holds), then delete exactly those rows, committing per
+    batch. Returns the number of rows moved.
+
+    The file is durable before any row is deleted. A crash in between leaves
+    readings in both places; the next run of the day merges them again and
+    drops the duplicates (same device, same timestamp).
+    """
+    archive = archive or telemetry_archive
+    since = datetime.combine(day, datetime.min.time())
+    rows = db.execute(
+        select(TelemetryReading.id, TelemetryReading.equipment_id, TelemetryReading.timestamp,
+               TelemetryReading.temperature, TelemetryReading.vibration)
+        .where(TelemetryReading.timestamp >= since, TelemetryReading.timestamp < since + timedelta(days=1))
+        .order_by(TelemetryReading.equipment_id, TelemetryReading.timestamp)
+        .execution_options(yield_per=ARCHIVE_FETCH_ROWS)
+    )
+    day_file = archive.day(day)
+    # Blocks of devices without new rows are copied as stored, without decoding
+    blocks = day_file.encoded() if day_file is not None else {}
+    ids: List[np.ndarray] = []
+    # One device at a time: only its rows are held as Python objects, the rest as encoded blocks
+    for equipment_id, device_rows in groupby(rows, key=itemgetter(1)):
+        chunk = list(device_rows)
+        ids.append(np.fromiter((r[0] for r in chunk), np.int64, len(chunk)))
+        new = (
+            np.fromiter((to_micros(r[2]) for r in chunk), np.int64, len(chunk)),
+            np.fromiter((np.nan if r[3] is None else r[3] for r in chunk), np.float64, len(chunk)),
+            np.fromiter((np.nan if r[4] is None else r[4] for r in chunk), np.float64, len(chunk)),
+        )
+        if equipment_id in blocks:
+            merged = _concat([decode_block(blocks[equipment_id][3]), new])
+            # Stable sort keeps the archived reading first among equal timestamps, then drop repeats
+            order = np.argsort(merged[0], kind="stable")
+            merged = tuple(column[order] for column in merged)
+            keep = np.concatenate(([True], np.diff(merged[0]) != 0))
+            new = tuple(column[keep] for column in merged)
+        blocks[equipment_id] = _encoded(new)
+    if not ids:
+        return 0
+    write_encoded_day(archive.directory, day, blocks)
+
+    ids = np.concatenate(ids)
+    batch = settings.TELEMETRY_RETENTION_BATCH
+    for i in range(0, len(ids), batch):
+        db.query(TelemetryReading).filter(TelemetryReading.id.in_(ids[i:i + batch].tolist())).delete(synchronize_session=False)
+        db.commit()
+    return len(ids)
+
+
+def archive_telemetry(db: Session, before: date, archive: TelemetryArchive = None) -> int:
+    """Archive every day before `before` that still has rows in the table, oldest first."""
+    moved = 0
+    cutoff = datetime.combine(before, datetime.min.time())
+    while True:
+        oldest = db.query(func.min(TelemetryReading.timestamp)).filter(TelemetryReading.timestamp < cutoff).scalar()
+        db.commit()  # Do not hold the read transaction while encoding
+        if oldest is None:
+            return moved
+        moved += archive_day(db, oldest.date(), archive)
+
+
+def telemetry_archive_job():
+    """Scheduled job: archive days older than TELEMETRY_ARCHIVE_AFTER_DAYS (0 keeps everything in the table)."""
+    if settings.TELEMETRY_ARCHIVE_AFTER_DAYS <= 0:
+        return
+    db: Session = SessionLocal()
+    try:
+        archive_telemetry(db, date.today() - timedelta(days=settings.TELEMETRY_ARCHIVE_AFTER_DAYS))
+    finally:
+        db.close()
+
+
+# -- reading ---------------------------------------------------------------------------
+
+def telemetry_history(db: Session, equipment_id: str, since: datetime, until: datetime) -> Series:
+    """One device's readings in [since, until) from the archive and the table, oldest first."""
+    archived = telemetry_archive.read_range(equipment_id, since, until)
+    rows = db.query(
+        TelemetryReading.timestamp, TelemetryReading.temperature, TelemetryReading.vibration
+    ).filter(
+        TelemetryReading.equipment_id == equipment_id,
+        TelemetryReading.timestamp >= since, TelemetryReading.timestamp < until,
+    ).order_by(TelemetryReading.timestamp).all()
+    live = (
+        np.fromiter((to_micros(r[0]) for r in rows), np.int64, len(rows)),
+        np.fromiter((np.nan if r[1] is None else r[1] for r in rows), np.float64, len(rows)),
+        np.fromiter((np.nan if r[2] is None else r[2] for r in rows), np.float64, len(rows)),
+    )
+    if not len(archived[0]):
+        return live
+    merged = _concat([archived, live])
+    order = np.argsort(merged[0], kind="stable")
+    return tuple(column[order] for column in merged)
@@ -0,0 +1,288 @@
+"""
+Telemetry ingestion from plant gateways: POST /api/telemetry/ingest.
+
+Two body formats, both keyed by Equipment.tag:
+
+- NDJSON (Content-Type: application/x-ndjson), one reading per line:
+    {"tag": "EQ-001", "ts": 1735689600.5, "temperature": 51.2, "vibration": 0.8}
+  ts is Unix seconds or an ISO 8601 string (with an offset: converted to
+  local time, like every stored timestamp); omitted means "now".
+  temperature and vibration are required.
+
+- Binary frame (Content-Type: application/x-telemetry-frame), little-endian:
+    b"TLM1", uint16 tag count N, N x (uint8 length, UTF-8 tag),
+    then fixed 18-byte records until the end: uint16 tag index, float64 Unix
+    seconds, float32 temperature, float32 vibration.
+
+Tags resolve through the reference-data snapshot (no query per reading).
+Accepted readings go to an in-memory buffer that keeps every sample for the
+history table and the newest sample per device for the current-value columns;
+a scheduled job flushes both in bulk, then runs the alert rules on the
+newest values. When the buffer is full the whole batch is refused with
+503 + Retry-After, and every response reports the buffer fill so gateways
+can slow down before that.
+"""
+import math
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.alerts import evaluate_alerts
+from app.core.metrics import TELEMETRY_BUFFERED, TELEMETRY_FLUSH_SECONDS, TELEMETRY_READINGS
+from app.core.reference_data import reference_data
+from app.core.scheduler import scheduler
+from app.db.session import SessionLocal
+from app.models.equipment import Equipment
+from app.models.telemetry import TelemetryReading
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+NDJSON = "application/x-ndjson"
+FRAME = "application/x-telemetry-frame"
+FRAME_MAGIC = b"TLM1"
+FRAME_RECORD = struct.Struct("<Hdff")
+FLUSH_JOB = "telemetry_flush"
+
+# (equipment_id, timestamp, temperature, vibration)
+Reading = Tuple[str, datetime, float, float]
+
+
+class TelemetryFormatError(ValueError):
+    """Malformed ingestion body; rendered as 400."""
+
+
+def _timestamp(value, now: datetime) -> datetime:
+    if value is None:
+        return now
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        # Stored timestamps are naive local time; mixing aware ones in breaks every comparison
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _finite(value) -> float:
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"non-finite value {value}")
+    return value
+
+
+def _metric(record: dict, name: str) -> float:
+    # A missing value is not a zero reading: it would be stored and trip or clear alerts
+    value = record.get(name)
+    if value is None:
+        raise ValueError(f"{name} is required")
+    return _finite(value)
+
+
+def parse_ndjson(body: bytes, tags: Dict[str, object]) -> Tuple[List[Reading], int]:
+    """Returns (readings with known tags, number of readings with unknown tags)."""
+    now = datetime.now()
+    readings, unknown = [], 0
+    append = readings.append
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = _loads(line)
+            eq = tags.get(record["tag"])
+            if eq is None:
+                unknown += 1
+                continue
+            append((eq.id, _timestamp(record.get("ts"), now), _metric(record, "temperature"), _metric(record, "vibration")))
+        except (ValueError, TypeError, KeyError, OverflowError, OSError) as e:
+            raise TelemetryFormatError(f"line {number}: {e}")
+    return readings, unknown
+
+
+def parse_frame(body: bytes, tags: Dict[str, object]) -> Tuple[List[Reading], int]:
+    if body[:4] != FRAME_MAGIC or len(body) < 6:
+        raise TelemetryFormatError("not a TLM1 frame")
+    (count,), offset = struct.unpack_from("<H", body, 4), 6
+    ids = []
+    try:
+        for _ in range(count):
+            length = body[offset]
+            tag = body[offset + 1:offset + 1 + length].decode("utf-8")
+            offset += 1 + length
+            eq = tags.get(tag)
+            ids.append(eq.id if eq is not None else None)
+    except (IndexError, UnicodeDecodeError) as e:
+        raise TelemetryFormatError(f"bad tag table: {e}")
+    records = memoryview(body)[offset:]
+    if len(records) % FRAME_RECORD.size:
+        raise TelemetryFormatError(f"record section is not a multiple of {FRAME_RECORD.size} bytes")
+
+    readings, unknown = [], 0
+    append = readings.append
+    fromtimestamp = datetime.fromtimestamp
+    isfinite = math.isfinite
+    number = 0
+    try:
+        for number, (index, ts, temperature, vibration) in enumerate(FRAME_RECORD.iter_unpack(records), 1):
+            eq_id = ids[index]
+            if eq_id is None:
+                unknown += 1
+                continue
+            if not (isfinite(temperature) and isfinite(vibration)):
+                raise ValueError("non-finite value")
+            append((eq_id, fromtimestamp(ts), round(temperature, 2), round(vibration, 3)))
+    except IndexError:
+        raise TelemetryFormatError("record refers to a tag index outside the tag table")
+    except (ValueError, OverflowError, OSError) as e:
+        raise TelemetryFormatError(f"record {number}: {e}")
+    return readings, unknown
+
+
+def encode_ndjson(samples) -> bytes:
+    """samples: iterable of (tag, unix_ts, temperature, vibration)."""
+    return b"".join(
+        b'{"tag":"%s","ts":%.3f,"temperature":%r,"vibration":%r}\n' % (tag.encode(), ts, temperature, vibration)
+        for tag, ts, temperature, vibration in samples
+    )
+
+
+def encode_frame(samples) -> bytes:
+    index: Dict[str, int] = {}
+    records = []
+    for tag, ts, temperature, vibration in samples:
+        i = index.setdefault(tag, len(index))
+        records.append(FRAME_RECORD.pack(i, ts, temperature, vibration))
+    header = [FRAME_MAGIC, struct.pack("<H", len(index))]
+    for tag in index:
+        raw = tag.encode("utf-8")
+        header.append(bytes((len(raw),)) + raw)
+    return b"".join(header + records)
+
+
+class TelemetryBuffer:
+    """Bounded buffer between request handlers and the bulk flusher."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._history: List[Reading] = []
+        self._latest: Dict[str, Reading] = {}
+
+    @property
+    def capacity(self) -> int:
+        return settings.TELEMETRY_BUFFER_CAPACITY
+
+    def fill(self) -> float:
+        return len(self._history) / self.capacity
+
+    def offer(self, readings: List[Reading]) -> bool:
+        """Buffer the whole batch, or nothing when it does not fit (caller signals backpressure)."""
+        # Coalesce outside the lock: newest sample per device within this batch
+        newest: Dict[str, Reading] = {}
+        for r in readings:
+            cur = newest.get(r[0])
+            if cur is None or r[1] >= cur[1]:
+                newest[r[0]] = r
+        with self._lock:
+            if len(self._history) + len(readings) > self.capacity:
+                return False
+            self._history.extend(readings)
+            latest = self._latest
+            for eq_id, r in newest.items():
+                cur = latest.get(eq_id)
+                if cur is None or r[1] >= cur[1]:
+                    latest[eq_id] = r
+            buffered = len(self._history)
+        TELEMETRY_BUFFERED.set(buffered)
+        if buffered >= settings.TELEMETRY_FLUSH_ROWS:
+            scheduler.trigger(FLUSH_JOB)
+        return True
+
+    def drain(self) -> Tuple[List[Reading], Dict[str, Reading]]:
+        with self._lock:
+            history, latest = self._history, self._latest
+            self._history, self._latest = [], {}
+        TELEMETRY_BUFFERED.set(0)
+        return history, latest
+
+
+telemetry_buffer = TelemetryBuffer()
+
+
+def ingest(db: Session, body: bytes, content_type: str) -> dict:
+    """Parse and buffer one batch. Raises TelemetryFormatError; 'accepted' False means backpressure."""
+    tags = reference_data.get(db).equipment_by_tag
+    if content_type.startswith(FRAME):
+        readings, unknown = parse_frame(body, tags)
+    else:
+        readings, unknown = parse_ndjson(body, tags)
+    if unknown:
+        TELEMETRY_READINGS.inc("unknown_tag", amount=unknown)
+    accepted = telemetry_buffer.offer(readings) if readings else True
+    TELEMETRY_READINGS.inc("accepted" if accepted else "rejected", amount=len(readings))
+    return {
+        "accepted": accepted,
+        "readings": len(readings),
+        "unknown_tags": unknown,
+        "buffer_fill": round(telemetry_buffer.fill(), 3),
+    }
+
+
+def flush_readings(db: Session, history: List[Reading], latest: Dict[str, Reading]) -> Dict[str, Reading]:
+    """
+    History rows in one executemany, current values as one bulk UPDATE by
+    primary key. Readings of equipment deleted since their tag resolved are
+    dropped (the bulk UPDATE fails on a missing row); returns the newest
+    readings that were written.
+    """
+    existing = set()
+    ids = list(latest)
+    for i in range(0, len(ids), 500):
+        existing.update(eq_id for (eq_id,) in db.query(Equipment.id).filter(Equipment.id.in_(ids[i:i + 500])))
+    if len(existing) < len(latest):
+        kept = [r for r in history if r[0] in existing]
+        TELEMETRY_READINGS.inc("dropped", amount=len(history) - len(kept))
+        history = kept
+        latest = {eq_id: r for eq_id, r in latest.items() if eq_id in existing}
+    if history:
+        db.execute(insert(TelemetryReading), [
+            {"equipment_id": eq_id, "timestamp": ts, "temperature": t, "vibration": v}
+            for eq_id, ts, t, v in history
+        ])
+    if latest:
+        db.execute(update(Equipment), [
+            {"id": eq_id, "temperature": t, "vibration": v, "last_telemetry_update": ts}
+            for eq_id, ts, t, v in latest.values()
+        ])
+    db.commit()
+    return latest
+
+
+def flush_buffer():
+    """
+    Scheduled job: flush the buffer every TELEMETRY_FLUSH_SECONDS, or sooner
+    once TELEMETRY_FLUSH_ROWS readings are waiting, then evaluate alerts.
+    """
+    history, latest = telemetry_buffer.drain()
+    if not history:
+        return
+    db: Session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        try:
+            latest = flush_readings(db, history, latest)
+        except Exception:
+            db.rollback()
+            TELEMETRY_READINGS.inc("dropped", amount=len(history))
+            raise
+        finally:
+            TELEMETRY_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        if settings.ALERTS_ENABLED:
+            evaluate_alerts(db, latest)
+    finally:
+        db.close()
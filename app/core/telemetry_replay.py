@@ -0,0 +1,316 @@
+"""
+Telemetry recordings: export history to a file and replay it through ingestion.
+
+A recording is NDJSON in the ingestion format, one reading per line
+({"tag": ..., "ts": ..., "temperature": ..., "vibration": ...}), gzipped when
+the name ends in .gz:
+
+    python -m app.core.telemetry_replay export --since 2026-10-01T08:00 --until 2026-10-01T12:00 \\
+        --out incident.ndjson.gz
+    python -m app.core.telemetry_replay replay incident.ndjson.gz --speed 60 \\
+        --url http://localhost:8000/api/telemetry/ingest --token $TELEMETRY_INGEST_TOKEN
+    python -m app.core.telemetry_replay replay incident.ndjson.gz --speed 1000 --direct
+
+Replay keeps the recording's timing: a reading taken t seconds after the first
+one is sent t / speed seconds after the start and stamped with that send time,
+so bursts and gaps come out as recorded, only compressed. Readings due within
+one tick go out together as one binary frame. Sinks:
+
+- the ingestion endpoint over HTTP; 503 backpressure is honoured as a gateway
+  would (wait Retry-After, resend);
+- --direct: ingest() in-process, flushing the buffer (and running the alert
+  rules) itself, so no server is needed.
+
+Determinism: with --fan-out K every recorded device drives K live devices
+picked with --seed, and --noise adds seeded relative Gaussian noise to the
+values. The same file, seed and options always send the same readings in the
+same order; only the absolute timestamps follow the wall clock (and, when
+sending falls behind, how readings are grouped into batches).
+
+The report compares requested throughput (readings over the recording's span
+divided by speed) with what was achieved, and how far sending fell behind.
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.telemetry_ingest import FRAME, encode_frame, encode_ndjson, flush_buffer, ingest, telemetry_buffer
+from app.db.session import SessionLocal
+from app.models.equipment import Equipment
+from app.models.telemetry import TelemetryReading
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+MAX_SPEED = 1000.0
+TICK_SECONDS = 0.05
+MAX_BATCH = 20_000
+
+# (unix seconds, tag, temperature, vibration)
+Recorded = Tuple[float, str, float, float]
+# Returns (accepted readings, readings refused by backpressure, unknown tags)
+Sink = Callable[[List[tuple]], Tuple[int, int, int]]
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+def _unix(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+# -- recordings ------------------------------------------------------------------------
+
+def export_history(db: Session, path: str, since: datetime = None, until: datetime = None,
+                   tags: Sequence[str] = None) -> int:
+    """Write telemetry history (oldest first) as a recording; returns the number of readings."""
+    query = db.query(
+        Equipment.tag, TelemetryReading.timestamp, TelemetryReading.temperature, TelemetryReading.vibration
+    ).join(Equipment, Equipment.id == TelemetryReading.equipment_id)
+    if since is not None:
+        query = query.filter(TelemetryReading.timestamp >= since)
+    if until is not None:
+        query = query.filter(TelemetryReading.timestamp < until)
+    if tags:
+        query = query.filter(Equipment.tag.in_(tags))
+    query = query.order_by(TelemetryReading.timestamp, TelemetryReading.id).yield_per(10_000)
+
+    count = 0
+    chunk = []
+    with _open(path, "wb") as out:
+        for tag, ts, temperature, vibration in query:
+            chunk.append((tag, ts.timestamp(), temperature or 0.0, vibration or 0.0))
+            if len(chunk) >= 10_000:
+                out.write(encode_ndjson(chunk))
+                count += len(chunk)
+                chunk = []
+        out.write(encode_ndjson(chunk))
+        count += len(chunk)
+    return count
+
+
+def read_recording(path: str) -> List[Recorded]:
+    """All readings of a recording, ordered by time (file order among equal timestamps)."""
+    readings: List[Recorded] = []
+    with _open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = _loads(line)
+                readings.append((
+                    _unix(record["ts"]), record["tag"],
+                    float(record.get("temperature") or 0.0), float(record.get("vibration") or 0.0),
+                ))
+            except (ValueError, TypeError, KeyError) as e:
+                raise ValueError(f"{path}:{number}: {e}")
+    readings.sort(key=lambda r: r[0])
+    return readings
+
+
+def fan_out(recorded_tags: Sequence[str], live_tags: Sequence[str], factor: int, rng: random.Random) -> Dict[str, List[str]]:
+    """Recorded tag -> live tags. factor 0 keeps the recorded tags; K picks K live devices per recorded one."""
+    if factor <= 0:
+        return {tag: [tag] for tag in recorded_tags}
+    live = sorted(live_tags)
+    if factor > len(live):
+        raise ValueError(f"--fan-out {factor} exceeds the {len(live)} devices in the database")
+    return {tag: rng.sample(live, factor) for tag in sorted(recorded_tags)}
+
+
+# -- sinks -----------------------------------------------------------------------------
+
+def http_sink(url: str, token: str = None) -> Sink:
+    import requests
+    http = requests.Session()
+    headers = {"Content-Type": FRAME}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    def send(samples):
+        body = encode_frame(samples)
+        rejected = 0
+        while True:
+            response = http.post(url, data=body, headers=headers, timeout=30)
+            if response.status_code != 503:
+                break
+            rejected += len(samples)
+            time.sleep(float(response.headers.get("Retry-After", "1")))
+        if response.status_code != 202:
+            raise RuntimeError(f"Ingest returned {response.status_code}: {response.text[:200]}")
+        result = response.json()
+        return result["readings"], rejected, result["unknown_tags"]
+
+    return send
+
+
+class DirectSink:
+    """ingest() in this process; flushes the buffer like the scheduled job would (by time or size)."""
+
+    def __init__(self):
+        self._flushed_at = time.monotonic()
+
+    def __call__(self, samples):
+        body = encode_frame(samples)
+        rejected = 0
+        while True:
+            db: Session = SessionLocal()  # Per batch, like a request: no read transaction held across flushes
+            try:
+                result = ingest(db, body, FRAME)
+            finally:
+                db.close()
+            if result["accepted"]:
+                break
+            rejected += result["readings"]
+            self.flush()
+        if (time.monotonic() - self._flushed_at >= settings.TELEMETRY_FLUSH_SECONDS
+                or telemetry_buffer.fill() * telemetry_buffer.capacity >= settings.TELEMETRY_FLUSH_ROWS):
+            self.flush()
+        return result["readings"], rejected, result["unknown_tags"]
+
+    def flush(self):
+        flush_buffer()
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+# -- replay ----------------------------------------------------------------------------
+
+def replay(readings: List[Recorded], send: Sink, speed: float = 1.0, live_tags: Sequence[str] = (),
+           fan_out_factor: int = 0, noise: float = 0.0, seed: int = 1, tick: float = TICK_SECONDS) -> dict:
+    if not 0 < speed <= MAX_SPEED:
+        raise ValueError(f"speed must be in (0, {MAX_SPEED:g}]")
+    if not readings:
+        raise ValueError("Empty recording")
+
+    rng = random.Random(seed)
+    mapping = fan_out({r[1] for r in readings}, live_tags, fan_out_factor, rng)
+    t0 = readings[0][0]
+    span = (readings[-1][0] - t0) / speed
+    total = len(readings) * max(fan_out_factor, 1)
+
+    sent = accepted = rejected = unknown = batches = 0
+    behind = 0.0
+    start_wall, start_unix = time.perf_counter(), time.time()
+    i, n = 0, len(readings)
+    while i < n:
+        due = (readings[i][0] - t0) / speed
+        now = time.perf_counter() - start_wall
+        if due > now:
+            time.sleep(due - now)
+            now = due
+        behind = max(behind, now - due)
+
+        # Everything due within the next tick, in recording order
+        horizon = now + tick
+        samples = []
+        while i < n and (readings[i][0] - t0) / speed <= horizon and len(samples) < MAX_BATCH:
+            ts, tag, temperature, vibration = readings[i]
+            stamp = start_unix + (ts - t0) / speed
+            for live_tag in mapping[tag]:
+                if noise:
+                    temperature_out = round(temperature * (1 + rng.gauss(0, noise)), 2)
+                    vibration_out = round(max(0.0, vibration * (1 + rng.gauss(0, noise))), 3)
+                else:
+                    temperature_out, vibration_out = temperature, vibration
+                samples.append((live_tag, stamp, temperature_out, vibration_out))
+            i += 1
+
+        ok, refused, missing = send(samples)
+        sent += len(samples)
+        accepted += ok
+        rejected += refused
+        unknown += missing
+        batches += 1
+
+    elapsed = time.perf_counter() - start_wall
+    requested = total / span if span > 0 else None
+    achieved = sent / elapsed if elapsed > 0 else None
+    return {
+        "readings": total,
+        "recording_seconds": round(readings[-1][0] - t0, 3),
+        "speed": speed,
+        "seed": seed,
+        "batches": batches,
+        "elapsed_seconds": round(elapsed, 3),
+        "requested_per_s": round(requested) if requested else None,
+        "achieved_per_s": round(achieved) if achieved else None,
+        "achieved_ratio": round(achieved / requested, 3) if requested and achieved else None,
+        "behind_schedule_max_s": round(behind, 3),
+        "accepted": accepted,
+        "rejected_backpressure": rejected,
+        "unknown_tags": unknown,
+    }
+
+
+def _datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main():
+    # Standalone: register every mapped class so relationships resolve
+    from app.models import enterprise, equipment, order, operation, repair  # noqa: F401
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write telemetry history to a recording")
+    export.add_argument("--out", required=True, help="file name; .gz compresses")
+    export.add_argument("--since", type=_datetime)
+    export.add_argument("--until", type=_datetime)
+    export.add_argument("--tag", action="append", dest="tags", help="repeat to export several devices")
+
+    play = commands.add_parser("replay", help="stream a recording into ingestion")
+    play.add_argument("recording")
+    play.add_argument("--speed", type=float, default=1.0, help=f"time multiplier, up to {MAX_SPEED:g}")
+    play.add_argument("--url", default="http://localhost:8000/api/telemetry/ingest")
+    play.add_argument("--token", default=settings.TELEMETRY_INGEST_TOKEN)
+    play.add_argument("--direct", action="store_true", help="ingest in this process instead of over HTTP")
+    play.add_argument("--fan-out", type=int, default=0, help="live devices per recorded device (0: recorded tags)")
+    play.add_argument("--noise", type=float, default=0.0, help="relative std of value noise, e.g. 0.02")
+    play.add_argument("--seed", type=int, default=1)
+    play.add_argument("--tick", type=float, default=TICK_SECONDS, help="seconds of recording per batch, after speed")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        db = SessionLocal()
+        try:
+            count = export_history(db, args.out, args.since, args.until, args.tags)
+        finally:
+            db.close()
+        print(json.dumps({"out": args.out, "readings": count}))
+        return
+
+    if not 0 < args.speed <= MAX_SPEED:
+        parser.error(f"--speed must be in (0, {MAX_SPEED:g}]")
+    try:
+        readings = read_recording(args.recording)
+    except ValueError as e:
+        parser.error(str(e))
+    db = SessionLocal()
+    live_tags = [tag for (tag,) in db.query(Equipment.tag)]
+    db.close()
+    if args.fan_out > len(live_tags):
+        parser.error(f"--fan-out {args.fan_out} exceeds the {len(live_tags)} devices in the database")
+    sink = DirectSink() if args.direct else http_sink(args.url, args.token)
+    try:
+        report = replay(readings, sink, args.speed, live_tags, args.fan_out, args.noise, args.seed, args.tick)
+    finally:
+        if args.direct:
+            sink.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
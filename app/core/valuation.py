@@ -0,0 +1,205 @@
+"""
+Warehouse valuation: stock value (quantity * moving-average price) in total,
+per location and per product.
+
+Current value: one GROUP BY in SQL, then kept current from the stock ledger
+instead of rescanning. Every stock move already carries its exact value
+change: a receipt adds quantity * price, which is what the moving-average
+merge adds to quantity * price, and a shipment takes off quantity * the
+average it left at. New StockMovement rows are collected at flush and applied
+after commit. A move for a product the totals do not know yet (no location),
+or a bulk delete of warehouse items, marks the totals stale; the next read
+aggregates again. VALUATION_TTL_SECONDS bounds drift from other processes.
+
+History: a scheduled job stores one ValuationSnapshot row per location every
+VALUATION_SNAPSHOT_INTERVAL_SECONDS and re-bases the running totals on the
+same SQL result. The valuation chart reads snapshots only.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal, primary_session
+from app.models.warehouse import WarehouseItem, StockMovement, ValuationSnapshot
+
+ITEM_VALUE = func.coalesce(WarehouseItem.quantity * WarehouseItem.price, 0.0)
+
+
+class LocationValue(NamedTuple):
+    location: str
+    products: int
+    quantity: float
+    value: float
+
+
+class Valuation(NamedTuple):
+    locations: List[LocationValue]  # Highest value first
+    as_of: float  # Unix time of the last SQL aggregation
+
+    @property
+    def total_value(self) -> float:
+        return sum(loc.value for loc in self.locations)
+
+    @property
+    def total_quantity(self) -> float:
+        return sum(loc.quantity for loc in self.locations)
+
+
+def valuation_by_location(db: Session) -> List[LocationValue]:
+    rows = db.query(
+        WarehouseItem.location,
+        func.count(WarehouseItem.id),
+        func.coalesce(func.sum(WarehouseItem.quantity), 0.0),
+        func.coalesce(func.sum(ITEM_VALUE), 0.0),
+    ).group_by(WarehouseItem.location).all()
+    return [LocationValue(location or "", count, quantity, value) for location, count, quantity, value in rows]
+
+
+def valuation_by_product(db: Session, limit: int = 10) -> List[dict]:
+    """Most valuable products, computed in SQL."""
+    rows = db.query(
+        WarehouseItem.product_code, WarehouseItem.product_name, WarehouseItem.location,
+        WarehouseItem.quantity, WarehouseItem.unit, ITEM_VALUE.label("value"),
+    ).order_by(ITEM_VALUE.desc()).limit(limit).all()
+    return [row._asdict() for row in rows]
+
+
+class ValuationCache:
+    """
+    Running per-location totals plus the product -> location map that places
+    ledger deltas. A move committed while the totals are being aggregated can
+    be counted twice until the next aggregation (TTL or snapshot).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locations: Optional[Dict[str, List[float]]] = None  # location -> [products, quantity, value]
+        self._product_location: Dict[str, str] = {}
+        self._built_at = 0.0
+
+    def _load(self, db: Session):
+        self._rebase(valuation_by_location(db), db.query(WarehouseItem.product_code, WarehouseItem.location).all())
+
+    def _rebase(self, locations: List[LocationValue], product_locations: List[Tuple[str, str]]):
+        self._locations = {loc.location: [loc.products, loc.quantity, loc.value] for loc in locations}
+        self._product_location = {code: location or "" for code, location in product_locations}
+        self._built_at = time.time()
+
+    def current(self, db: Session) -> Valuation:
+        with self._lock:
+            if self._locations is None or time.time() - self._built_at > settings.VALUATION_TTL_SECONDS:
+                # From the primary: a lagging replica would undo the deltas applied since
+                with primary_session(db) as primary:
+                    self._load(primary)
+            locations = [LocationValue(name, int(p), q, v) for name, (p, q, v) in self._locations.items()]
+            as_of = self._built_at
+        locations.sort(key=lambda loc: -loc.value)
+        return Valuation(locations, as_of)
+
+    def apply(self, moves: List[Tuple[str, float, float]]):
+        """(product_code, quantity, value) deltas from committed ledger rows."""
+        with self._lock:
+            if self._locations is None:
+                return
+            for code, quantity, value in moves:
+                location = self._product_location.get(code)
+                if location is None:
+                    self._locations = None  # New product: location only known to the database
+                    return
+                entry = self._locations.setdefault(location, [0, 0.0, 0.0])
+                entry[1] += quantity
+                entry[2] += value
+
+    def invalidate(self):
+        with self._lock:
+            self._locations = None
+
+    def rebase(self, locations: List[LocationValue], product_locations: List[Tuple[str, str]]):
+        with self._lock:
+            self._rebase(locations, product_locations)
+
+
+warehouse_valuation = ValuationCache()
+
+
+def take_valuation_snapshot(db: Session, at: datetime = None) -> int:
+    """
+    Store the current valuation per location (one SQL aggregation) and re-base
+    the running totals on it. Returns the number of rows written; commits.
+    """
+    at = at or datetime.now()
+    locations = valuation_by_location(db)
+    product_locations = db.query(WarehouseItem.product_code, WarehouseItem.location).all()
+    db.add_all([
+        ValuationSnapshot(taken_at=at, location=loc.location, products=loc.products, quantity=loc.quantity, value=loc.value)
+        for loc in locations
+    ])
+    db.commit()
+    warehouse_valuation.rebase(locations, product_locations)
+    return len(locations)
+
+
+def valuation_snapshot_job():
+    """Scheduled job: snapshot the warehouse valuation."""
+    db: Session = SessionLocal()
+    try:
+        take_valuation_snapshot(db)
+    finally:
+        db.close()
+
+
+def value_at(db: Session, at: datetime) -> Optional[float]:
+    """Total value of the latest snapshot taken at or before `at`, None without one."""
+    taken_at = db.query(func.max(ValuationSnapshot.taken_at)).filter(ValuationSnapshot.taken_at <= at).scalar()
+    if taken_at is None:
+        return None
+    return db.query(func.sum(ValuationSnapshot.value)).filter(ValuationSnapshot.taken_at == taken_at).scalar() or 0.0
+
+
+def valuation_history(db: Session, days: int) -> Tuple[List[datetime], Dict[str, List[float]]]:
+    """Snapshot times over the last `days` and the value per location at each (0 where absent)."""
+    rows = db.query(
+        ValuationSnapshot.taken_at, ValuationSnapshot.location, ValuationSnapshot.value
+    ).filter(ValuationSnapshot.taken_at >= datetime.now() - timedelta(days=days)).order_by(ValuationSnapshot.taken_at).all()
+    times: List[datetime] = []
+    series: Dict[str, Dict[datetime, float]] = {}
+    for taken_at, location, value in rows:
+        if not times or times[-1] != taken_at:
+            times.append(taken_at)
+        series.setdefault(location, {})[taken_at] = value
+    return times, {location: [values.get(t, 0.0) for t in times] for location, values in series.items()}
+
+
+# -- keeping it current ---------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _record_moves(session, flush_context):
+    moves = [(obj.product_code, obj.quantity or 0.0, obj.value or 0.0) for obj in session.new if isinstance(obj, StockMovement)]
+    if moves:
+        session.info.setdefault("valuation_moves", []).extend(moves)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_delete(orm_execute_state):
+    if orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) == WarehouseItem.__tablename__:
+            orm_execute_state.session.info["valuation_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_moves(session):
+    moves = session.info.pop("valuation_moves", None)
+    if session.info.pop("valuation_stale", False):
+        warehouse_valuation.invalidate()
+    elif moves:
+        warehouse_valuation.apply(moves)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_moves(session):
+    session.info.pop("valuation_moves", None)
+    session.info.pop("valuation_stale", None)
@@ -0,0 +1,67 @@
+"""
+Convert a database with text UUID keys to compact keys (COMPACT_KEYS=1).
+
+    python -m app.db.compact_keys sqlite:///./digital_platform.db sqlite:///./digital_platform_compact.db
+
+Copies every table into a fresh target database created from the current
+models with binary keys. Key values are unchanged, so URLs keep working.
+Then point DATABASE_URL at the target and set COMPACT_KEYS=1. Stop the app
+while this runs; the source database is only read.
+"""
+import sys
+from sqlalchemy import MetaData, create_engine, func, inspect, select
+from app.core.config import settings
+from app.db.base import Base
+# Every model, so the target gets all tables
+from app.models import enterprise, equipment, order, operation, repair, log, user, warehouse, rollup, outbox, telemetry, resource_version, alert, sequence  # noqa: F401
+
+CHUNK = 10_000
+
+
+def convert(source_url: str, target_url: str) -> dict:
+    source = create_engine(source_url)
+    target = create_engine(target_url)
+    if inspect(target).get_table_names():
+        raise RuntimeError(f"Target database {target_url} is not empty")
+
+    # Source is reflected, so its keys come back as plain text whatever the setting;
+    # the target uses the model types, which now write binary keys
+    settings.COMPACT_KEYS = True
+    Base.metadata.create_all(target)
+    reflected = MetaData()
+    reflected.reflect(source)
+
+    copied = {}
+    with source.connect() as src, target.begin() as dst:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in reflected.tables:
+                continue
+            src_table = reflected.tables[table.name]
+            columns = [c.name for c in table.columns if c.name in src_table.c]
+            result = src.execution_options(stream_results=True).execute(
+                select(*(src_table.c[c] for c in columns))
+            )
+            copied[table.name] = 0
+            while True:
+                rows = result.fetchmany(CHUNK)
+                if not rows:
+                    break
+                dst.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+                copied[table.name] += len(rows)
+
+        for name, count in copied.items():
+            in_target = dst.execute(select(func.count()).select_from(Base.metadata.tables[name])).scalar()
+            if in_target != count:
+                raise RuntimeError(f"{name}: copied {count} rows but target has {in_target}")
+
+    source.dispose()
+    target.dispose()
+    return copied
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(2)
+    for name, count in convert(sys.argv[1], sys.argv[2]).items():
+        print(f"{name}: {count}")
@@ -0,0 +1,44 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.db.base import Base
+
+
+def add_missing_columns(engine: Engine):
+    """
+    create_all() never alters existing tables. Add any model column that an
+    older database file is missing (with its scalar default, if any).
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT {default!r}" if isinstance(default, str) else f" DEFAULT {default}"
+                if not column.nullable and default is not None:
+                    ddl += " NOT NULL"
+                conn.execute(text(ddl))
+
+
+def check_key_storage(engine: Engine):
+    """Refuse to start when the database's key storage does not match settings.COMPACT_KEYS."""
+    inspector = inspect(engine)
+    if "users" not in inspector.get_table_names():
+        return
+    id_type = next(str(c["type"]).upper() for c in inspector.get_columns("users") if c["name"] == "id")
+    compact = not any(t in id_type for t in ("CHAR", "TEXT"))
+    if compact != settings.COMPACT_KEYS:
+        stored = "binary" if compact else "text"
+        raise RuntimeError(
+            f"Database stores {stored} keys but COMPACT_KEYS={int(settings.COMPACT_KEYS)}. "
+            f"Set COMPACT_KEYS={int(compact)} or convert the database with python -m app.db.compact_keys"
+        )
@@ -0,0 +1,122 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+_IN_LIST = re.compile(r"(?i)\bIN\s*\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+class RepeatedQueryError(RuntimeError):
+    """Strict mode: one request ran the same statement shape too many times (N+1)."""
+
+
+def statement_shape(statement: str) -> str:
+    # Parameters are already placeholders; only expanded IN lists vary in length
+    return _IN_LIST.sub("IN (?...)", _SPACES.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """SQL executed within one request (or one track_queries() block)."""
+
+    __slots__ = ("count", "total_time", "shapes", "slowest", "strict", "threshold")
+
+    def __init__(self, strict: bool = False, threshold: int = None):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Dict[str, int] = {}
+        self.slowest: List[Tuple[float, str]] = []
+        self.strict = strict
+        self.threshold = threshold or settings.SQL_REPEAT_THRESHOLD
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+
+        shape = statement_shape(statement)
+        repeats = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = repeats
+
+        keep = settings.SQL_STATS_SLOWEST
+        if len(self.slowest) < keep or elapsed > self.slowest[-1][0]:
+            self.slowest.append((elapsed, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[keep:]
+
+        if self.strict and repeats == self.threshold + 1:
+            raise RepeatedQueryError(
+                f"Statement ran {repeats} times in one request (threshold {self.threshold}): {shape[:300]}"
+            )
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        return sorted(
+            ((shape, n) for shape, n in self.shapes.items() if n > self.threshold),
+            key=lambda item: item[1], reverse=True
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "queries": self.count,
+            "total_ms": round(self.total_time * 1000, 3),
+            "slowest": [{"ms": round(t * 1000, 3), "statement": s} for t, s in self.slowest],
+            "repeated": [{"count": n, "statement": s} for s, n in self.repeated()],
+        }
+
+
+# Set per request by the middleware; threadpool workers inherit it with the request context
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(strict: bool = None, threshold: int = None):
+    """Collect SQL stats for the enclosed block (used per request, and usable directly in tests)."""
+    stats = QueryStats(settings.SQL_STRICT if strict is None else strict, threshold)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+def handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def stats_headers(stats: QueryStats) -> Dict[str, str]:
+    headers = {
+        "X-DB-Queries": str(stats.count),
+        "X-DB-Time-Ms": f"{stats.total_time * 1000:.3f}",
+        # Shows up in the browser devtools timing panel
+        "Server-Timing": f'db;dur={stats.total_time * 1000:.3f};desc="{stats.count} queries"',
+    }
+    if stats.slowest and settings.SQL_STATS_SQL_TEXT:
+        elapsed, shape = stats.slowest[0]
+        headers["X-DB-Slowest"] = f"{elapsed * 1000:.3f}ms {shape[:200]}".encode("ascii", "replace").decode()
+    repeated = stats.repeated()
+    if repeated:
+        headers["X-DB-Repeated"] = str(repeated[0][1])
+    return headers
@@ -0,0 +1,53 @@
+import sqlite3
+from datetime import datetime
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal, engine, read_engine
+from app.models.replication import ReplicationHeartbeat
+
+
+def write_heartbeat(db: Session):
+    beat = db.get(ReplicationHeartbeat, 1)
+    if beat:
+        beat.beat_at = datetime.now()
+    else:
+        db.add(ReplicationHeartbeat(id=1, beat_at=datetime.now()))
+    db.commit()
+
+
+def sync_sqlite_replica():
+    """Copy the primary SQLite file onto the replica file (online backup, consistent snapshot)."""
+    source = sqlite3.connect(make_url(settings.DATABASE_URL).database)
+    target = sqlite3.connect(make_url(settings.DATABASE_REPLICA_URL).database, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def local_sync_enabled() -> bool:
+    return (
+        settings.REPLICA_SYNC_SECONDS > 0
+        and engine.dialect.name == "sqlite"
+        and read_engine.dialect.name == "sqlite"
+    )
+
+
+def replica_interval() -> float:
+    return settings.REPLICA_SYNC_SECONDS if local_sync_enabled() else settings.REPLICA_HEARTBEAT_SECONDS
+
+
+def replica_maintenance():
+    """
+    Scheduled job: stamp the heartbeat on the primary (the replica's copy of it
+    tells how far behind the replica is) and, for local testing, sync the SQLite replica.
+    """
+    db: Session = SessionLocal()
+    try:
+        write_heartbeat(db)
+    finally:
+        db.close()
+    if local_sync_enabled():
+        sync_sqlite_replica()
@@ -1,17 +1,113 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from fastapi import Request
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import MeteredQueuePool, instrument_pool
+from app.db import query_stats
+from app.models.replication import ReplicationHeartbeat
 
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Set after a write; while it is in the future the client reads from the primary (read-your-writes)
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def _create_engine(url: str, name: str, pool_size: int, max_overflow: int):
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        poolclass=MeteredQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT
+    )
+    instrument_pool(engine, name)
+    # Per-request query count / SQL time / N+1 detection (see app.db.query_stats)
+    if settings.SQL_STATS_ENABLED:
+        event.listen(engine, "before_cursor_execute", query_stats.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", query_stats.after_cursor_execute)
+        event.listen(engine, "handle_error", query_stats.handle_error)
+    return engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
+# Without a replica every read goes to the primary
+if settings.DATABASE_REPLICA_URL:
+    read_engine = _create_engine(
+        settings.DATABASE_REPLICA_URL, "replica", settings.REPLICA_POOL_SIZE, settings.REPLICA_MAX_OVERFLOW
+    )
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+if read_engine is not engine:
+    @event.listens_for(ReadSessionLocal, "before_flush")
+    def _read_only(session, flush_context, instances):
+        raise RuntimeError("Write attempted on a read-replica session (only GET/HEAD requests read from the replica)")
+
+    if read_engine.dialect.name == "sqlite":
+        @event.listens_for(read_engine, "connect")
+        def _query_only(dbapi_conn, _):
+            dbapi_conn.execute("PRAGMA query_only=ON")
+
+
+_replica_state = {"checked_at": 0.0, "fresh": False}
+
+
+def replica_is_fresh() -> bool:
+    """Replica lag within REPLICA_MAX_LAG_SECONDS, re-checked at most once a second."""
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < 1.0:
+        return _replica_state["fresh"]
+    try:
+        with read_engine.connect() as conn:
+            beat_at = conn.execute(select(ReplicationHeartbeat.beat_at)).scalar()
+        fresh = beat_at is not None and (datetime.now() - beat_at).total_seconds() <= settings.REPLICA_MAX_LAG_SECONDS
+    except Exception:
+        # Unreachable or not yet populated
+        fresh = False
+    _replica_state.update(checked_at=now, fresh=fresh)
+    return fresh
+
+
+def use_replica(request: Request) -> bool:
+    if read_engine is engine or request is None or request.method not in SAFE_METHODS:
+        return False
+    try:
+        if float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time():
+            return False
+    except ValueError:
+        pass
+    return replica_is_fresh()
+
+
+def get_db(request: Request = None):
+    # Reads (GET/HEAD) go to the replica when it is fresh enough; everything else to the primary
+    db = ReadSessionLocal() if use_replica(request) else SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+
+@contextmanager
+def primary_session(db: Session = None):
+    """
+    `db` when it is bound to the primary, otherwise a short-lived primary
+    session. Process-wide caches rebuild through this: rebuilt from a lagging
+    replica right after an invalidation, they would serve stale data for their
+    whole TTL.
+    """
+    if db is not None and db.get_bind() is engine:
+        yield db
+        return
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
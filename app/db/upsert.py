@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def upsert_insert(db: Session, table):
+    """
+    An INSERT supporting .on_conflict_do_update() for the session's dialect,
+    or None when the dialect has no native upsert (callers fall back to update-then-insert).
+    """
+    make_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    return make_insert(table) if make_insert is not None else None
@@ -1,13 +1,15 @@
 from fastapi import FastAPI, Depends, Request
 from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.exception_handlers import http_exception_handler
 from starlette.exceptions import HTTPException as StarletteHTTPException
+import time
 import uvicorn
 
 from app.db.base import Base
-from app.db.session import engine, get_db
-from app.routers import auth, dashboard, enterprises, equipment, orders, warehouse, api, users, logs
+from app.db.session import engine, read_engine, get_db, SAFE_METHODS, READ_PRIMARY_COOKIE
+from app.db.migrations import add_missing_columns, check_key_storage
+from app.db.query_stats import track_queries, stats_headers
+from app.routers import auth, dashboard, enterprises, equipment, orders, warehouse, api, api_v1, telemetry, search, users, logs, reliability, alerts, metrics
 from app.models.user import User
 # Import all models to ensure tables are created
 from app.models.enterprise import Enterprise
@@ -15,17 +17,45 @@ from app.models.order import ProductionOrder
 from app.models.operation import ProductionOperation, DefectLog
 from app.models.repair import RepairLog
 from app.models.log import SystemLog
+from app.models.warehouse import WarehouseItem, StockMovement, StockSnapshot, ValuationSnapshot
+from app.models.rollup import ProductionDaily, RollupWatermark
+from app.models.outbox import OutboxEvent
+from app.models.telemetry import TelemetryReading
+from app.models.replication import ReplicationHeartbeat
+from app.models.resource_version import ResourceVersion
+from app.models.alert import AlertRule
+from app.models.sequence import NumberSequence
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, instrument_templates
+from app.core.compression import CompressionMiddleware
+from app.core.static_assets import StaticAssets
 from app.core.security import get_password_hash
-from app.core.iot_simulator import start_iot_simulation
+from app.core.stock_ledger import backfill_opening_balances
+from app.core.production_rollup import ensure_production_rollup
+from app.core.scheduler import scheduler
+from app.core.jobs import register_jobs
+from app.core.resource_versions import ensure_resource_versions
+# Import event handlers to register them with the outbox
+from app.core import order_events
 
 # Create tables
+check_key_storage(engine)
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+ensure_resource_versions(engine)
 
 app = FastAPI(title="Цифровая платформа холдинга")
 
+# Background jobs run on the event loop's scheduler, not in free-running threads
+register_jobs(scheduler)
+
 @app.on_event("startup")
 async def startup_event():
-    start_iot_simulation()
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await scheduler.shutdown()
 
 
 # Ensure static folder exists
@@ -33,7 +63,35 @@ import os
 if not os.path.exists("app/static"):
     os.makedirs("app/static")
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+@app.middleware("http")
+async def sql_stats_middleware(request: Request, call_next):
+    # Query count / SQL time of the request in response headers (X-DB-*, Server-Timing)
+    if not settings.SQL_STATS_ENABLED:
+        return await call_next(request)
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers.update(stats_headers(stats))
+    return response
+
+if read_engine is not engine:
+    @app.middleware("http")
+    async def read_your_writes_middleware(request: Request, call_next):
+        # After a write, pin this client's reads to the primary until the replica can have caught up
+        response = await call_next(request)
+        if request.method not in SAFE_METHODS and response.status_code < 500:
+            lag = settings.REPLICA_MAX_LAG_SECONDS
+            response.set_cookie(READ_PRIMARY_COOKIE, f"{time.time() + lag:.3f}", max_age=int(lag) + 1, httponly=True)
+        return response
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latency covers the other middleware too
+app.add_middleware(MetricsMiddleware)
+
+# Hashed, precompressed, long-cached assets; templates link them via static_url()
+static_assets = StaticAssets("app/static")
+app.mount("/static", static_assets, name="static")
 
 # Include Routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -44,7 +102,18 @@ app.include_router(orders.router, tags=["orders"])
 app.include_router(warehouse.router, tags=["warehouse"])
 app.include_router(users.router, tags=["users"])
 app.include_router(logs.router, tags=["logs"])
+app.include_router(reliability.router, tags=["reliability"])
+app.include_router(alerts.router, tags=["alerts"])
+app.include_router(api_v1.router, prefix="/api/v1", tags=["api-v1"])
+app.include_router(telemetry.router, prefix="/api", tags=["telemetry"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(api.router, prefix="/api", tags=["api"])
+app.include_router(metrics.router, tags=["metrics"])
+
+# Template render time for /metrics, and static_url() for hashed asset links
+for module in (auth, dashboard, enterprises, equipment, orders, warehouse, users, logs, reliability, alerts):
+    instrument_templates(module.templates)
+    module.templates.env.globals["static_url"] = static_assets.url
 
 # Exception Handler for 401 Unauthorized
 @app.exception_handler(StarletteHTTPException)
@@ -83,5 +152,8 @@ def create_initial_data():
     except:
         db.rollback()
 
+    backfill_opening_balances(db)
+    ensure_production_rollup(db)
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
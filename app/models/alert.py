@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Float, Boolean, DateTime
+from app.db.base import Base
+from app.db.types import GUID, new_id
+from datetime import datetime
+
+class AlertRule(Base):
+    """
+    Telemetry alert rule. Applies to one tag, or to every asset of an equipment
+    type, or (neither set) to the whole fleet.
+    """
+    __tablename__ = "alert_rules"
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    name = Column(String(200), nullable=False)
+    equipment_type = Column(String(100), nullable=True)
+    equipment_tag = Column(String(50), nullable=True)  # Wins over equipment_type when both are set
+
+    metric = Column(String(20), nullable=False)  # temperature, vibration
+    kind = Column(String(20), default="threshold", nullable=False)  # threshold: value; rate: change per minute
+    direction = Column(String(10), default="above", nullable=False)  # above, below
+    threshold = Column(Float, nullable=False)
+    # Hysteresis: an active alert clears only once the value is back past this level (default: threshold)
+    clear_threshold = Column(Float, nullable=True)
+    duration_seconds = Column(Float, default=0.0, nullable=False)  # Condition must hold this long to fire
+
+    severity = Column(String(20), default="warning")  # warning, critical
+    enabled = Column(Boolean, default=True, nullable=False)
+    created_date = Column(DateTime, default=datetime.now)
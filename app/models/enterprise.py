@@ -1,12 +1,12 @@
 from sqlalchemy import Column, String, Text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
-import uuid
+from app.db.types import GUID, new_id
 
 class Enterprise(Base):
     __tablename__ = "enterprises"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     name = Column(String(200), nullable=False)
     type = Column(String(50), nullable=False)  # добыча/переработка
     region = Column(String(100))
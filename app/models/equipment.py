@@ -1,13 +1,13 @@
 from sqlalchemy import Column, String, ForeignKey, DateTime, Float
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.types import GUID, new_id
 from datetime import datetime
-import uuid
 
 class Equipment(Base):
     __tablename__ = "equipment"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     tag = Column(String(50), unique=True, nullable=False)
     name = Column(String(200), nullable=False)
     type = Column(String(100))
@@ -19,7 +19,7 @@ class Equipment(Base):
     vibration = Column(Float, default=0.0)
     last_telemetry_update = Column(DateTime, nullable=True)
     
-    enterprise_id = Column(String, ForeignKey("enterprises.id"))
+    enterprise_id = Column(GUID, ForeignKey("enterprises.id"))
     enterprise = relationship("Enterprise", back_populates="equipment")
     
     repairs = relationship("RepairLog", back_populates="equipment", cascade="all, delete-orphan")
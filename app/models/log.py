@@ -1,13 +1,13 @@
 from sqlalchemy import Column, String, ForeignKey, DateTime, Text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.types import GUID, new_id
 from datetime import datetime
-import uuid
 
 class SystemLog(Base):
     __tablename__ = "system_logs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     timestamp = Column(DateTime, default=datetime.now)
     
     # User who performed the action
@@ -1,15 +1,15 @@
 from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, Text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.types import GUID, new_id
 from datetime import datetime
-import uuid
 
 class ProductionOperation(Base):
     __tablename__ = "production_operations"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     name = Column(String(200), nullable=False)
-    order_id = Column(String, ForeignKey("production_orders.id"))
+    order_id = Column(GUID, ForeignKey("production_orders.id"))
     
     # Status: pending, in_progress, completed, problem
     status = Column(String(50), default="pending") 
@@ -27,8 +27,8 @@ class ProductionOperation(Base):
 class DefectLog(Base):
     __tablename__ = "defect_logs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    operation_id = Column(String, ForeignKey("production_operations.id"))
+    id = Column(GUID, primary_key=True, default=new_id)
+    operation_id = Column(GUID, ForeignKey("production_operations.id"))
     
     quantity = Column(Float, nullable=False)
     reason = Column(String(200), nullable=False)
@@ -1,13 +1,13 @@
 from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, Text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.types import GUID, new_id
 from datetime import datetime
-import uuid
 
 class ProductionOrder(Base):
     __tablename__ = "production_orders"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     order_number = Column(String(50), unique=True, nullable=False)
     product_code = Column(String(50), nullable=False)
     product_name = Column(String(200))
@@ -22,7 +22,7 @@ class ProductionOrder(Base):
     status = Column(String(50), default="new")
     created_date = Column(DateTime, default=datetime.now)
     
-    enterprise_id = Column(String, ForeignKey("enterprises.id"))
+    enterprise_id = Column(GUID, ForeignKey("enterprises.id"))
     enterprise = relationship("Enterprise", back_populates="orders")
     
     operations = relationship("ProductionOperation", back_populates="order", cascade="all, delete-orphan")
\ No newline at end of file
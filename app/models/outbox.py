@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text, Index
+from app.db.base import Base
+from app.db.types import GUID, new_id
+from datetime import datetime
+
+class OutboxEvent(Base):
+    """Side effect recorded in the same transaction as the change that caused it."""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_available", "status", "available_at"),
+    )
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    event_type = Column(String(100), nullable=False)  # e.g. "order.completed"
+    payload = Column(Text, nullable=False)            # JSON
+    created_at = Column(DateTime, default=datetime.now)
+
+    # Status: pending, done, failed
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, default=datetime.now, nullable=False)  # Next attempt not before
+    processed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
@@ -1,14 +1,14 @@
 from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Float
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.types import GUID, new_id
 from datetime import datetime
-import uuid
 
 class RepairLog(Base):
     __tablename__ = "repair_logs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    equipment_id = Column(String, ForeignKey("equipment.id"))
+    id = Column(GUID, primary_key=True, default=new_id)
+    equipment_id = Column(GUID, ForeignKey("equipment.id"))
     
     start_date = Column(DateTime, default=datetime.now)
     end_date = Column(DateTime, nullable=True)
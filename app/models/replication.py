@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, DateTime
+from app.db.base import Base
+
+class ReplicationHeartbeat(Base):
+    """Single row stamped on the primary; its age on the replica is the replica lag."""
+    __tablename__ = "replication_heartbeat"
+
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
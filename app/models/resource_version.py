@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.db.base import Base
+
+class ResourceVersion(Base):
+    """Change counter per API resource (orders, equipment, ...), bumped in the writing transaction."""
+    __tablename__ = "resource_versions"
+
+    resource = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
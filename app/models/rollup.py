@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Float, Integer, Date
+from app.db.base import Base
+
+class ProductionDaily(Base):
+    """Pre-aggregated production per calendar day (maintained on order create/complete)."""
+    __tablename__ = "production_daily"
+
+    day = Column(Date, primary_key=True)
+    ordered_quantity = Column(Float, default=0.0, nullable=False)
+    ordered_count = Column(Integer, default=0, nullable=False)
+    completed_quantity = Column(Float, default=0.0, nullable=False)
+    completed_count = Column(Integer, default=0, nullable=False)
+
+class RollupWatermark(Base):
+    """Earliest day from which a rollup table is complete; older days come from the source tables."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    covered_from = Column(Date, nullable=False)
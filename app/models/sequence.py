@@ -0,0 +1,9 @@
+from sqlalchemy import Column, BigInteger, String
+from app.db.base import Base
+
+class NumberSequence(Base):
+    """Named counter handed out in blocks (app.core.numbering); next_value is the first unreserved number."""
+    __tablename__ = "number_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, default=1, nullable=False)
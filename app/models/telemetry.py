@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Float, Integer, DateTime, ForeignKey, Index
+from app.db.base import Base
+from app.db.types import GUID
+from datetime import datetime
+
+class TelemetryReading(Base):
+    """Telemetry history, one row per equipment sample."""
+    __tablename__ = "telemetry_readings"
+    __table_args__ = (
+        Index("ix_telemetry_readings_equipment_ts", "equipment_id", "timestamp"),
+    )
+
+    # Append-only and high volume: a compact integer key instead of a UUID string
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    equipment_id = Column(GUID, ForeignKey("equipment.id"), nullable=False)
+    timestamp = Column(DateTime, default=datetime.now, nullable=False)
+    temperature = Column(Float, default=0.0)
+    vibration = Column(Float, default=0.0)
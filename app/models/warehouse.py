@@ -1,14 +1,63 @@
-from sqlalchemy import Column, String, Float, Integer
+from sqlalchemy import Column, String, Float, Integer, DateTime, Index, UniqueConstraint
 from app.db.base import Base
-import uuid
+from app.db.types import GUID, new_id
+from datetime import datetime
 
 class WarehouseItem(Base):
     __tablename__ = "warehouse_items"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     product_code = Column(String(50), unique=True, nullable=False)
     product_name = Column(String(200), nullable=False)
     quantity = Column(Float, default=0.0)
     unit = Column(String(20), default="т")
     price = Column(Float, default=0.0)  # New: Price per unit
     location = Column(String(100), default="Основной склад")
+
+    # Bumped on every stock move (optimistic concurrency / change detection)
+    version = Column(Integer, default=0, nullable=False)
+
+class StockMovement(Base):
+    """Append-only ledger: one row per receipt, shipment or production completion."""
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_product_created", "product_code", "created_at"),
+    )
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    created_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
+    product_code = Column(String(50), nullable=False)
+
+    # Type: receipt, shipment, production, opening
+    movement_type = Column(String(20), nullable=False)
+    quantity = Column(Float, nullable=False)      # Signed: + in, - out
+    unit_price = Column(Float, default=0.0)       # Receipt price, or average cost for shipments
+    value = Column(Float, default=0.0)            # Signed quantity * unit_price
+    reference = Column(String(100), nullable=True)  # e.g. order number
+
+class StockSnapshot(Base):
+    """Balance per product compacted from the ledger up to `taken_at` (inclusive)."""
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        UniqueConstraint("taken_at", "product_code", name="uq_stock_snapshots_taken_product"),
+    )
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    taken_at = Column(DateTime, nullable=False, index=True)
+    product_code = Column(String(50), nullable=False)
+    quantity = Column(Float, default=0.0)
+    value = Column(Float, default=0.0)
+
+class ValuationSnapshot(Base):
+    """Stock value per location at `taken_at` (quantity * moving-average price)."""
+    __tablename__ = "valuation_snapshots"
+    __table_args__ = (
+        UniqueConstraint("taken_at", "location", name="uq_valuation_snapshots_taken_location"),
+    )
+
+    id = Column(GUID, primary_key=True, default=new_id)
+    taken_at = Column(DateTime, nullable=False, index=True)
+    location = Column(String(100), nullable=False)
+    products = Column(Integer, default=0)
+    quantity = Column(Float, default=0.0)
+    value = Column(Float, default=0.0)
@@ -0,0 +1,150 @@
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.routers.deps import get_current_active_user, get_manager_user
+from app.models.alert import AlertRule
+from app.models.log import SystemLog
+from app.models.user import User
+from app.core.config import settings
+from app.core.alerts import alert_engine, METRICS, KINDS, DIRECTIONS, SEVERITIES
+from app.core.json_api import FastJSONResponse
+from app.core.reference_data import reference_data
+
+router = APIRouter()
+templates = Jinja2Templates(directory="app/templates")
+
+
+def _alert_json(alert) -> dict:
+    return {
+        "rule": alert.rule_name,
+        "severity": alert.severity,
+        "equipment_id": alert.equipment_id,
+        "tag": alert.tag,
+        "name": alert.equipment_name,
+        "metric": alert.metric,
+        "kind": alert.kind,
+        "value": round(alert.value, 2),
+        "raised_at": alert.raised_at.strftime('%H:%M:%S'),
+    }
+
+
+@router.get("/alerts", response_class=HTMLResponse)
+async def list_alerts(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    rules = db.query(AlertRule).order_by(AlertRule.created_date.desc()).all()
+    ref = reference_data.get(db)
+    return templates.TemplateResponse("alerts.html", {
+        "request": request,
+        "user": user,
+        "rules": rules,
+        "active_alerts": alert_engine.active(),
+        "equipment_types": sorted({eq.type for eq in ref.equipment_by_id.values() if eq.type}),
+        "metrics": METRICS,
+        "severities": SEVERITIES
+    })
+
+
+@router.get("/alerts/active")
+async def active_alerts(
+    limit: int = None,
+    user: User = Depends(get_current_active_user)
+):
+    # Polled by the dashboard; served from memory, no query
+    alerts = alert_engine.active()
+    return FastJSONResponse(content={
+        "count": len(alerts),
+        "alerts": [_alert_json(a) for a in alerts[:limit or settings.ALERTS_LIVE_LIMIT]]
+    })
+
+
+@router.post("/alerts/rules")
+async def create_alert_rule(
+    name: str = Form(...),
+    metric: str = Form(...),
+    kind: str = Form("threshold"),
+    direction: str = Form("above"),
+    threshold: float = Form(...),
+    clear_threshold: str = Form(""),
+    duration_seconds: float = Form(0.0),
+    severity: str = Form("warning"),
+    equipment_type: str = Form(""),
+    equipment_tag: str = Form(""),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_manager_user)
+):
+    if metric not in METRICS or kind not in KINDS or direction not in DIRECTIONS or severity not in SEVERITIES:
+        raise HTTPException(status_code=400, detail="Unknown metric, kind, direction or severity")
+    equipment_tag = equipment_tag.strip()
+    if equipment_tag and equipment_tag not in reference_data.get(db).equipment_by_tag:
+        raise HTTPException(status_code=400, detail=f"Unknown equipment tag {equipment_tag}")
+    clear = None
+    if clear_threshold.strip():
+        try:
+            clear = float(clear_threshold)
+        except ValueError:
+            clear = math.nan
+        if not math.isfinite(clear):
+            raise HTTPException(status_code=400, detail="Clear threshold must be a number")
+        # Hysteresis: clearing must need a value back past the threshold, or the alert flaps
+        if (direction == "above" and clear > threshold) or (direction == "below" and clear < threshold):
+            side = "at or below" if direction == "above" else "at or above"
+            raise HTTPException(status_code=400, detail=f"Clear threshold must be {side} the threshold")
+
+    rule = AlertRule(
+        name=name,
+        metric=metric,
+        kind=kind,
+        direction=direction,
+        threshold=threshold,
+        clear_threshold=clear,
+        duration_seconds=max(duration_seconds, 0.0),
+        severity=severity,
+        equipment_type=equipment_type.strip() or None,
+        equipment_tag=equipment_tag or None
+    )
+    db.add(rule)
+    db.add(SystemLog(
+        username=user.username,
+        role=user.role,
+        action="CREATE",
+        module="ALERTS",
+        details=f"Правило тревоги: {name}"
+    ))
+    db.commit()
+    alert_engine.rules_changed()
+    return RedirectResponse(url="/alerts", status_code=303)
+
+
+@router.post("/alerts/rules/{rule_id}/toggle")
+async def toggle_alert_rule(
+    rule_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_manager_user)
+):
+    rule = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+    if rule:
+        rule.enabled = not rule.enabled
+        db.commit()
+        alert_engine.rules_changed()
+    return RedirectResponse(url="/alerts", status_code=303)
+
+
+@router.post("/alerts/rules/{rule_id}/delete")
+async def delete_alert_rule(
+    rule_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_manager_user)
+):
+    rule = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+    if rule:
+        db.delete(rule)
+        db.commit()
+        alert_engine.rules_changed()
+    return RedirectResponse(url="/alerts", status_code=303)
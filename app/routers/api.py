@@ -1,16 +1,27 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
-import uuid
+from datetime import datetime
 
 from app.db.session import get_db
+from app.db.types import new_id
 from app.routers.deps import get_admin_user, get_current_active_user
 from app.models.enterprise import Enterprise
 from app.models.equipment import Equipment
 from app.models.order import ProductionOrder
-from app.models.warehouse import WarehouseItem
+from app.models.warehouse import WarehouseItem, StockMovement, StockSnapshot
+from app.models.outbox import OutboxEvent
+from app.models.telemetry import TelemetryReading
 from app.models.user import User
 from app.core.security import get_password_hash
+from app.core.reliability import reliability_cache
+from app.core.enterprise_rollup import enterprise_rollup_cache
+from app.core.reference_data import reference_data
+from app.core.stock import receive_stock
+from app.core.stock_ledger import balance_at
+from app.core.production_rollup import rebuild_production_rollup
+from app.core.outbox import outbox_stats
+from app.core.telemetry_archive import telemetry_archive
 
 router = APIRouter()
 
@@ -36,6 +47,83 @@ async def get_telemetry(
     
     return JSONResponse(content=data)
 
+@router.get("/reliability")
+async def get_reliability(
+    group: str = "equipment",
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    if group == "type":
+        stats = reliability_cache.by_type(db)
+    else:
+        stats = reliability_cache.ranking(db)
+    return JSONResponse(content=[s.to_dict() for s in stats])
+
+@router.get("/enterprises/rollup")
+async def get_enterprise_rollup(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    return JSONResponse(content={
+        "enterprises": [r.to_dict() for r in enterprise_rollup_cache.all(db)],
+        "totals": enterprise_rollup_cache.totals(db).to_dict()
+    })
+
+@router.get("/stock/balance")
+async def get_stock_balance(
+    at: datetime = None,
+    product_code: str = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    # Point-in-time balance: nearest snapshot + short ledger tail
+    at = at or datetime.now()
+    balances = balance_at(db, at, product_code)
+    return JSONResponse(content={
+        "at": at.isoformat(),
+        "items": [
+            {
+                "product_code": code,
+                "quantity": round(b["quantity"], 3),
+                "value": round(b["value"], 2),
+                "avg_price": round(b["value"] / b["quantity"], 2) if b["quantity"] else 0.0
+            }
+            for code, b in sorted(balances.items())
+        ],
+        "total_value": round(sum(b["value"] for b in balances.values()), 2)
+    })
+
+@router.get("/stock/movements")
+async def get_stock_movements(
+    product_code: str = None,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    query = db.query(StockMovement)
+    if product_code:
+        query = query.filter(StockMovement.product_code == product_code)
+    movements = query.order_by(StockMovement.created_at.desc()).limit(min(limit, 1000)).all()
+    return JSONResponse(content=[
+        {
+            "created_at": m.created_at.isoformat(),
+            "product_code": m.product_code,
+            "type": m.movement_type,
+            "quantity": m.quantity,
+            "unit_price": m.unit_price,
+            "value": m.value,
+            "reference": m.reference
+        }
+        for m in movements
+    ])
+
+@router.get("/outbox")
+async def get_outbox_stats(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_admin_user)
+):
+    return JSONResponse(content=outbox_stats(db))
+
 @router.post("/init-data")
 async def init_test_data(
     db: Session = Depends(get_db),
@@ -43,18 +131,24 @@ async def init_test_data(
 ):
     # Clear existing BUSINESS data
     db.query(ProductionOrder).delete()
+    db.query(TelemetryReading).delete()
     db.query(Equipment).delete()
     db.query(Enterprise).delete()
     db.query(WarehouseItem).delete()
+    db.query(StockMovement).delete()
+    db.query(StockSnapshot).delete()
+    db.query(OutboxEvent).delete()
     db.commit()
+    telemetry_archive.clear()
+    reliability_cache.invalidate()
 
     # Create Enterprises
     ent1 = Enterprise(
-        id=str(uuid.uuid4()),
+        id=new_id(),
         name="🏔️ Добывающее предприятие №1", type="добывающее", region="Урал", description="Добыча железной руды открытым способом"
     )
     ent2 = Enterprise(
-        id=str(uuid.uuid4()),
+        id=new_id(),
         name="🏭 Перерабатывающий завод №1", type="перерабатывающее", region="Сибирь", description="Обогащение руды и выплавка металла"
     )
     db.add(ent1); db.add(ent2); db.commit()
@@ -77,11 +171,11 @@ async def init_test_data(
     db.add(order1); db.add(order2); db.commit()
     
     # Init Warehouse (from completed orders)
-    wh_item = WarehouseItem(
-        product_code="RAW-IRON", product_name="Железная руда", 
-        quantity=500.0, price=120.0, unit="т", location="Склад сырья №1"
+    receive_stock(
+        db, product_code="RAW-IRON", product_name="Железная руда",
+        quantity=500.0, price=120.0, unit="т", location="Склад сырья №1",
+        movement_type="production", reference=order1.order_number
     )
-    db.add(wh_item)
     
     # Ensure Users
     if not db.query(User).filter(User.username == "admin").first():
@@ -92,6 +186,9 @@ async def init_test_data(
         db.add(User(username="operator", hashed_password=get_password_hash("operator"), role="operator", full_name="Алексей Сидоров (Оператор)"))
         
     db.commit()
+    rebuild_production_rollup(db)
+    enterprise_rollup_cache.invalidate()
+    reference_data.bump()
     return RedirectResponse(url="/auth/login", status_code=303)
 
 @router.post("/clear-data")
@@ -101,8 +198,17 @@ async def clear_data(
 ):
     # Clear existing BUSINESS data
     db.query(ProductionOrder).delete()
+    db.query(TelemetryReading).delete()
     db.query(Equipment).delete()
     db.query(Enterprise).delete()
     db.query(WarehouseItem).delete()
+    db.query(StockMovement).delete()
+    db.query(StockSnapshot).delete()
+    db.query(OutboxEvent).delete()
     db.commit()
+    telemetry_archive.clear()
+    reliability_cache.invalidate()
+    enterprise_rollup_cache.invalidate()
+    reference_data.bump()
+    rebuild_production_rollup(db)
     return RedirectResponse(url="/auth/login", status_code=303)
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.routers.deps import get_current_active_user
+from app.models.user import User
+from app.core.json_api import RESOURCES, ApiError, FastJSONResponse, resource_etag
+from app.core.static_assets import etag_matches
+
+router = APIRouter()
+
+# Clients may keep the body but must revalidate (cheap: 304 while the version is unchanged)
+CACHE_CONTROL = "private, no-cache"
+
+
+def _resource(name: str):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise HTTPException(status_code=404, detail=f"Unknown resource {name}. Available: {', '.join(RESOURCES)}")
+    return resource
+
+
+def _not_modified(request: Request, db: Session, resource: str):
+    """(304 response or None, etag) - the version is checked before any row is read."""
+    etag = resource_etag(db, resource, f"{request.url.path}?{request.url.query}")
+    if etag is None:
+        return None, None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}), etag
+    return None, etag
+
+
+def _json(content, etag):
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    return FastJSONResponse(content=content, headers=headers)
+
+
+@router.get("/{resource_name}")
+async def list_resource(
+    resource_name: str,
+    request: Request,
+    fields: str = None,
+    limit: int = None,
+    after: str = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    resource = _resource(resource_name)
+    not_modified, etag = _not_modified(request, db, resource.name)
+    if not_modified:
+        return not_modified
+    filters = {k: v for k, v in request.query_params.items() if k in resource.filters}
+    try:
+        page = resource.list(db, fields=fields, limit=limit, after=after, filters=filters)
+    except ApiError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _json(page, etag)
+
+
+@router.get("/{resource_name}/{item_id}")
+async def get_resource_item(
+    resource_name: str,
+    item_id: str,
+    request: Request,
+    fields: str = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    resource = _resource(resource_name)
+    not_modified, etag = _not_modified(request, db, resource.name)
+    if not_modified:
+        return not_modified
+    try:
+        item = resource.get(db, item_id, fields=fields)
+    except ApiError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if item is None:
+        raise HTTPException(status_code=404, detail=f"{resource.name} {item_id} not found")
+    return _json({"data": item}, etag)
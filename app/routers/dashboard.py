@@ -13,6 +13,9 @@ from app.models.equipment import Equipment
 from app.models.order import ProductionOrder
 from app.models.warehouse import WarehouseItem
 from app.models.operation import DefectLog
+from app.core.config import settings
+from app.core.production_rollup import production_trend
+from app.core.valuation import value_at, warehouse_valuation
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -20,6 +23,7 @@ templates = Jinja2Templates(directory="app/templates")
 @router.get("/", response_class=HTMLResponse)
 async def dashboard(
     request: Request, 
+    trend_days: int = 7,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_active_user)
 ):
@@ -41,18 +45,19 @@ async def dashboard(
     availability_pct = (operational_equipment / total_equipment * 100) if total_equipment > 0 else 0
     
     # KPI 3: Warehouse & Finance (Real Calculation)
-    warehouse_total_qty = db.query(func.sum(WarehouseItem.quantity)).scalar() or 0
+    valuation = warehouse_valuation.current(db)
+    warehouse_total_qty = valuation.total_quantity
     low_stock_count = db.query(WarehouseItem).filter(WarehouseItem.quantity < 50).count()
-    
-    all_items = db.query(WarehouseItem).all()
-    estimated_value = sum(item.quantity * item.price for item in all_items)
+    estimated_value = valuation.total_value
+    value_day_ago = value_at(db, current_time - timedelta(days=1))
 
     stats = {
         "factories": db.query(Enterprise).count(),
         "equipment": total_equipment,
         "orders_active": db.query(ProductionOrder).filter(ProductionOrder.status == "in_progress").count(),
         "warehouse_total": warehouse_total_qty,
-        "estimated_value": estimated_value
+        "estimated_value": estimated_value,
+        "value_change_pct": (estimated_value / value_day_ago - 1) * 100 if value_day_ago else None
     }
     
     # Chart 1: Equipment Status
@@ -79,23 +84,11 @@ async def dashboard(
     defect_labels = [d[0] for d in defect_stats]
     defect_values = [d[1] for d in defect_stats]
 
-    # Chart 4: Production Trend (Last 7 days)
-    today = datetime.now().date()
-    seven_days_ago = today - timedelta(days=6)
-    
-    # SQLite has limited date functions, so we'll fetch and process in python for simplicity and compatibility
-    # Get all orders from last 7 days
-    recent_trend_orders = db.query(ProductionOrder).filter(ProductionOrder.created_date >= seven_days_ago).all()
-    
-    trend_map = { (seven_days_ago + timedelta(days=i)): 0 for i in range(7) }
-    
-    for order in recent_trend_orders:
-        o_date = order.created_date.date()
-        if o_date in trend_map:
-            trend_map[o_date] += order.quantity
-            
-    trend_labels = [d.strftime("%d.%m") for d in sorted(trend_map.keys())]
-    trend_values = [trend_map[d] for d in sorted(trend_map.keys())]
+    # Chart 4: Production Trend (daily rollup, any range costs one row per day)
+    if trend_days not in settings.PRODUCTION_TREND_RANGES:
+        trend_days = settings.PRODUCTION_TREND_RANGES[0]
+    trend_axis, trend_values, trend_completed = production_trend(db, trend_days)
+    trend_labels = [d.strftime("%d.%m") for d in trend_axis]
 
     # KPI Percentages
     kpi_quality = 100 - (problem_orders / total_orders * 100) if total_orders > 0 else 100
@@ -117,6 +110,9 @@ async def dashboard(
         "defect_values": defect_values,
         "trend_labels": trend_labels,
         "trend_values": trend_values,
+        "trend_completed": trend_completed,
+        "trend_days": trend_days,
+        "trend_ranges": settings.PRODUCTION_TREND_RANGES,
         "recent_orders": recent_orders,
         "live_equipment": live_equipment,
         "kpi": {
@@ -2,12 +2,14 @@ from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-import uuid
 
 from app.db.session import get_db
+from app.db.types import new_id
 from app.routers.deps import get_current_active_user, get_admin_user
 from app.models.enterprise import Enterprise
 from app.models.user import User
+from app.core.enterprise_rollup import enterprise_rollup_cache
+from app.core.reference_data import reference_data
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -36,7 +38,7 @@ async def create_enterprise(
     user: User = Depends(get_admin_user)  # Only admin can add factories
 ):
     new_enterprise = Enterprise(
-        id=str(uuid.uuid4()),
+        id=new_id(),
         name=name,
         type=type,
         region=region,
@@ -44,8 +46,23 @@ async def create_enterprise(
     )
     db.add(new_enterprise)
     db.commit()
+    enterprise_rollup_cache.invalidate()
+    reference_data.bump()
     return RedirectResponse(url="/enterprises", status_code=303)
 
+@router.get("/enterprises/compare", response_class=HTMLResponse)
+async def compare_enterprises(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    return templates.TemplateResponse("enterprise_compare.html", {
+        "request": request,
+        "user": user,
+        "rollups": enterprise_rollup_cache.all(db),
+        "totals": enterprise_rollup_cache.totals(db)
+    })
+
 @router.get("/enterprises/{enterprise_id}", response_class=HTMLResponse)
 async def enterprise_detail(
     enterprise_id: str,
@@ -57,5 +74,6 @@ async def enterprise_detail(
     return templates.TemplateResponse("enterprise_detail.html", {
         "request": request,
         "user": user,
-        "enterprise": enterprise
+        "enterprise": enterprise,
+        "rollup": enterprise_rollup_cache.get(db, enterprise_id) if enterprise else None
     })
@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import datetime
+import time
 import uuid
 
+try:
+    from orjson import loads as _loads
+except ImportError:  # Optional: the stdlib parser is slower
+    from json import loads as _loads
+
 from app.db.session import get_db
 from app.routers.deps import get_current_active_user, get_admin_user
 from app.models.equipment import Equipment
 from app.models.repair import RepairLog
-from app.models.enterprise import Enterprise
 from app.models.user import User
+from app.core.reliability import reliability_cache
+from app.core.enterprise_rollup import enterprise_rollup_cache
+from app.core.reference_data import reference_data
+from app.core.list_rows import equipment_rows
+from app.core.json_api import FastJSONResponse
+from app.core.batch_updates import BatchError, BatchResult, update_equipment_statuses, update_repairs
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -21,13 +32,14 @@ async def list_equipment(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_active_user)
 ):
-    equipment = db.query(Equipment).all()
-    enterprises = db.query(Enterprise).all()
+    equipment = equipment_rows(db)
+    ref = reference_data.get(db)
     return templates.TemplateResponse("equipment.html", {
         "request": request,
         "user": user,
         "equipment": equipment,
-        "enterprises": enterprises
+        "enterprises": ref.enterprises,
+        "ref": ref
     })
 
 @router.get("/equipment/{equipment_id}", response_class=HTMLResponse)
@@ -40,11 +52,13 @@ async def get_equipment_details(
     eq = db.query(Equipment).filter(Equipment.id == equipment_id).first()
     if not eq:
         return RedirectResponse(url="/equipment", status_code=303)
-        
+
     return templates.TemplateResponse("equipment_detail.html", {
         "request": request,
         "user": user,
-        "eq": eq
+        "eq": eq,
+        "reliability": reliability_cache.get_equipment(db, eq.id),
+        "ref": reference_data.get(db)
     })
 
 @router.post("/equipment")
@@ -66,6 +80,9 @@ async def create_equipment(
     )
     db.add(new_eq)
     db.commit()
+    reliability_cache.refresh_equipment(db, new_eq.id)
+    enterprise_rollup_cache.invalidate()
+    reference_data.bump()
     return RedirectResponse(url="/equipment", status_code=303)
 
 @router.post("/equipment/{equipment_id}/delete")
@@ -76,8 +93,55 @@ async def delete_equipment(
 ):
     db.query(Equipment).filter(Equipment.id == equipment_id).delete()
     db.commit()
+    reliability_cache.refresh_equipment(db, equipment_id)
+    enterprise_rollup_cache.invalidate()
+    reference_data.bump()
     return RedirectResponse(url="/equipment", status_code=303)
 
+async def _batch_items(request: Request) -> list:
+    try:
+        payload = _loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    return payload.get("updates") if isinstance(payload, dict) else None
+
+def _batch_response(db: Session, result: BatchResult, started: float) -> FastJSONResponse:
+    # One commit and one round of cache refreshes for the whole batch
+    db.commit()
+    if "repairs" in result.changed:
+        reliability_cache.invalidate()
+    if "equipment" in result.changed:
+        enterprise_rollup_cache.invalidate()
+    return FastJSONResponse(content={**result.to_dict(), "took_ms": round((time.perf_counter() - started) * 1000, 1)})
+
+@router.post("/equipment/batch")
+async def update_equipment_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    # {"updates": [{"id", "status"}]}; per-item results, invalid items are skipped
+    started = time.perf_counter()
+    try:
+        result = update_equipment_statuses(db, await _batch_items(request))
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _batch_response(db, result, started)
+
+@router.post("/repairs/batch")
+async def update_repairs_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    # {"updates": [{"id", "status"}]}; completing a repair returns its asset to operation
+    started = time.perf_counter()
+    try:
+        result = update_repairs(db, await _batch_items(request))
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _batch_response(db, result, started)
+
 @router.post("/equipment/{equipment_id}/status")
 async def update_status(
     equipment_id: str,
@@ -89,6 +153,7 @@ async def update_status(
     if eq:
         eq.status = status
         db.commit()
+        enterprise_rollup_cache.invalidate()
         
     return RedirectResponse(url="/equipment", status_code=303)
 
@@ -110,6 +175,7 @@ async def add_repair(
     )
     db.add(repair)
     db.commit()
+    reliability_cache.refresh_equipment(db, equipment_id)
     return RedirectResponse(url=f"/equipment/{equipment_id}", status_code=303)
 
 @router.post("/repairs/{repair_id}/update")
@@ -127,8 +193,13 @@ async def update_repair(
             # Also update equipment last maintenance
             repair.equipment.last_maintenance = datetime.now()
             repair.equipment.status = "operational" # Assume fixed
-            
+
         db.commit()
+        if status == "completed":
+            # MTTR/MTBF only change once a repair is closed
+            reliability_cache.refresh_equipment(db, repair.equipment_id)
+            # ...and the asset is back in operation: plant availability changed
+            enterprise_rollup_cache.invalidate()
         return RedirectResponse(url=f"/equipment/{repair.equipment_id}", status_code=303)
         
     return RedirectResponse(url="/equipment", status_code=303)
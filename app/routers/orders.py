@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import datetime
-import uuid
+import time
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # Optional: the stdlib parser is slower
+    from json import loads as _loads
 
 from app.db.session import get_db
 from app.routers.deps import get_current_active_user, get_manager_user, get_admin_user
 from app.models.order import ProductionOrder
 from app.models.operation import ProductionOperation, DefectLog
-from app.models.enterprise import Enterprise
-from app.models.warehouse import WarehouseItem
 from app.models.user import User
+from app.core.production_rollup import record_order_created, record_order_deleted
+from app.core.outbox import publish, notify_dispatcher
+from app.core.order_events import ORDER_COMPLETED, order_completed_payload
+from app.core.enterprise_rollup import enterprise_rollup_cache
+from app.core.reference_data import reference_data
+from app.core.list_rows import order_rows
+from app.core.json_api import FastJSONResponse
+from app.core.numbering import next_order_numbers
+from app.core.order_intake import OrderIntakeError, intake_orders
+from app.core.batch_updates import BatchError, update_operations
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -22,13 +35,14 @@ async def list_orders(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_active_user)
 ):
-    orders = db.query(ProductionOrder).order_by(ProductionOrder.created_date.desc()).all()
-    enterprises = db.query(Enterprise).all()
+    orders = order_rows(db)
+    ref = reference_data.get(db)
     return templates.TemplateResponse("orders.html", {
         "request": request,
         "user": user,
         "orders": orders,
-        "enterprises": enterprises
+        "enterprises": ref.enterprises,
+        "ref": ref
     })
 
 @router.get("/orders/{order_id}", response_class=HTMLResponse)
@@ -45,7 +59,8 @@ async def get_order_details(
     return templates.TemplateResponse("order_detail.html", {
         "request": request,
         "user": user,
-        "order": order
+        "order": order,
+        "ref": reference_data.get(db)
     })
 
 @router.post("/orders")
@@ -73,19 +88,54 @@ async def create_order(
             pass
 
     new_order = ProductionOrder(
-        order_number=f"PO-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:4].upper()}",
+        order_number=next_order_numbers(1)[0],
         product_name=product_name,
         product_code=product_code,
         quantity=quantity,
         price_per_unit=price_per_unit,
         enterprise_id=enterprise_id,
         due_date=parsed_date,
-        status="new"
+        status="new",
+        created_date=datetime.now()
     )
     db.add(new_order)
+    record_order_created(db, new_order)
     db.commit()
+    enterprise_rollup_cache.invalidate()
+    reference_data.note_product(db, product_code, product_name)
     return RedirectResponse(url="/orders", status_code=303)
 
+@router.post("/orders/batch")
+async def create_orders_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_manager_user)
+):
+    # Bulk intake for integrations: {"orders": [{product_code, product_name, quantity, price_per_unit,
+    # enterprise_id, due_date, operations: [{name, planned_quantity}]}]}; all or nothing
+    started = time.perf_counter()
+    try:
+        payload = _loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    orders = payload.get("orders") if isinstance(payload, dict) else None
+
+    try:
+        created = intake_orders(db, orders, reference_data.get(db))
+    except OrderIntakeError as e:
+        db.rollback()
+        return FastJSONResponse(content={"created": 0, "errors": e.errors[:100]}, status_code=400)
+    db.commit()
+    enterprise_rollup_cache.invalidate()
+    for code, name in {o.product_code: o.product_name for o in created}.items():
+        reference_data.note_product(db, code, name)
+
+    return FastJSONResponse(content={
+        "created": len(created),
+        "orders": [{"id": o.id, "order_number": o.order_number} for o in created],
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }, status_code=201)
+
 @router.post("/orders/{order_id}/status")
 async def update_order_status(
     order_id: str,
@@ -97,29 +147,22 @@ async def update_order_status(
     if not order:
         return RedirectResponse(url="/orders", status_code=303)
         
-    previous_status = order.status
-    order.status = status
-    
-    if status == "completed" and previous_status != "completed":
-        # WMS Integration with Pricing
-        wh_item = db.query(WarehouseItem).filter(WarehouseItem.product_code == order.product_code).first()
-        if wh_item:
-            # Weighted average price
-            total_old = wh_item.quantity * wh_item.price
-            total_new = order.quantity * order.price_per_unit
-            wh_item.quantity += order.quantity
-            wh_item.price = (total_old + total_new) / wh_item.quantity
-        else:
-            new_item = WarehouseItem(
-                product_code=order.product_code,
-                product_name=order.product_name,
-                quantity=order.quantity,
-                price=order.price_per_unit,
-                unit="т"
-            )
-            db.add(new_item)
-            
-    db.commit()
+    if status == "completed":
+        # Flip the status conditionally so only one request ever emits the completion event
+        flipped = db.query(ProductionOrder).filter(
+            ProductionOrder.id == order_id,
+            ProductionOrder.status != "completed"
+        ).update({ProductionOrder.status: "completed"}, synchronize_session=False)
+        if flipped:
+            # Stock booking, KPI rollups etc. run in the outbox dispatcher, not in this request
+            publish(db, ORDER_COMPLETED, order_completed_payload(order))
+        db.commit()
+        notify_dispatcher()
+    else:
+        order.status = status
+        db.commit()
+    enterprise_rollup_cache.invalidate()
+
     return RedirectResponse(url="/orders", status_code=303)
 
 @router.post("/orders/{order_id}/problem")
@@ -134,6 +177,7 @@ async def report_order_problem(
         order.status = "problem"
         order.problem_details = problem_details
         db.commit()
+        enterprise_rollup_cache.invalidate()
     return RedirectResponse(url="/orders", status_code=303)
 
 @router.post("/orders/{order_id}/delete")
@@ -142,8 +186,12 @@ async def delete_order(
     db: Session = Depends(get_db),
     user: User = Depends(get_manager_user)
 ):
-    db.query(ProductionOrder).filter(ProductionOrder.id == order_id).delete()
-    db.commit()
+    order = db.query(ProductionOrder).filter(ProductionOrder.id == order_id).first()
+    if order:
+        record_order_deleted(db, order)
+        db.query(ProductionOrder).filter(ProductionOrder.id == order_id).delete()
+        db.commit()
+        enterprise_rollup_cache.invalidate()
     return RedirectResponse(url="/orders", status_code=303)
 
 @router.post("/orders/{order_id}/operations")
@@ -164,6 +212,28 @@ async def add_operation(
     db.commit()
     return RedirectResponse(url=f"/orders/{order_id}", status_code=303)
 
+@router.post("/operations/batch")
+async def update_operations_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    # End-of-shift closing: {"updates": [{"id", "status", "actual_quantity",
+    # "defects": [{"quantity", "reason", "comment"}]}]}; per-item results, invalid items are skipped
+    started = time.perf_counter()
+    try:
+        payload = _loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    try:
+        result = update_operations(db, payload.get("updates") if isinstance(payload, dict) else None)
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    if "defects" in result.changed:
+        enterprise_rollup_cache.invalidate()
+    return FastJSONResponse(content={**result.to_dict(), "took_ms": round((time.perf_counter() - started) * 1000, 1)})
+
 @router.post("/operations/{op_id}/update")
 async def update_operation(
     op_id: str,
@@ -214,4 +284,5 @@ async def report_defect(
     op.defect_quantity += quantity
     
     db.commit()
+    enterprise_rollup_cache.invalidate()
     return RedirectResponse(url=f"/orders/{op.order_id}", status_code=303)
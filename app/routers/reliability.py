@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.routers.deps import get_current_active_user
+from app.models.user import User
+from app.core.reliability import reliability_cache
+
+router = APIRouter()
+templates = Jinja2Templates(directory="app/templates")
+
+@router.get("/reliability", response_class=HTMLResponse)
+async def reliability_ranking(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    return templates.TemplateResponse("reliability.html", {
+        "request": request,
+        "user": user,
+        "ranking": reliability_cache.ranking(db),
+        "by_type": reliability_cache.by_type(db)
+    })
@@ -0,0 +1,35 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.routers.deps import get_current_active_user
+from app.models.user import User
+from app.core.config import settings
+from app.core.json_api import FastJSONResponse
+from app.core.search_index import KINDS, search_index
+
+router = APIRouter()
+
+
+@router.get("/search")
+async def search(
+    q: str = "",
+    limit: int = 10,
+    kind: str = None,
+    user: User = Depends(get_current_active_user)
+):
+    # Typeahead: served from the in-memory index, no query
+    kinds = [k for k in kind.split(",") if k] if kind else None
+    if kinds and any(k not in KINDS for k in kinds):
+        raise HTTPException(status_code=400, detail=f"kind must be among {', '.join(KINDS)}")
+    limit = max(1, min(limit, settings.SEARCH_MAX_RESULTS))
+    started = time.perf_counter()
+    results = search_index.search(q, limit, kinds)
+    return FastJSONResponse(content={
+        "query": q,
+        "ready": search_index.ready,
+        "results": [
+            {"kind": doc.kind, "id": doc.id, "title": doc.title, "subtitle": doc.subtitle, "url": doc.url}
+            for doc in results
+        ],
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    })
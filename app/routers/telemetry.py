@@ -0,0 +1,96 @@
+import hmac
+import math
+from datetime import datetime, timedelta
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.routers.deps import get_current_active_user, get_current_user
+from app.models.equipment import Equipment
+from app.models.user import User
+from app.core.config import settings
+from app.core.json_api import FastJSONResponse
+from app.core.telemetry_archive import telemetry_history
+from app.core.telemetry_ingest import TelemetryFormatError, ingest
+
+router = APIRouter()
+
+
+def _authorized(request: Request, user: User) -> bool:
+    token = settings.TELEMETRY_INGEST_TOKEN
+    auth = request.headers.get("authorization", "")
+    if token and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].encode(), token.encode()):
+        return True
+    return user is not None and user.is_active
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """The request body, refused with 413 as soon as it exceeds `limit` (chunked bodies included)."""
+    too_large = HTTPException(status_code=413, detail=f"Batch larger than {limit} bytes")
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if declared > limit:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post("/telemetry/ingest")
+async def ingest_telemetry(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    # Gateways are not browsers: refuse with 403 instead of the login redirect a 401 would cause
+    if not _authorized(request, user):
+        raise HTTPException(status_code=403, detail="Ingest token or login required")
+    body = await _read_body(request, settings.TELEMETRY_MAX_BODY_BYTES)
+    try:
+        result = ingest(db, body, request.headers.get("content-type", ""))
+    except TelemetryFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"X-Ingest-Buffer-Fill": str(result["buffer_fill"])}
+    if not result["accepted"]:
+        # Backpressure: nothing from this batch was kept; retry it after the next flush
+        headers["Retry-After"] = str(math.ceil(settings.TELEMETRY_FLUSH_SECONDS))
+        return FastJSONResponse(content=result, status_code=503, headers=headers)
+    return FastJSONResponse(content=result, status_code=202, headers=headers)
+
+
+def _values(column: np.ndarray) -> list:
+    # Missing readings are NaN in the archive; JSON has no NaN
+    return [None if v != v else v for v in column.tolist()]
+
+
+@router.get("/telemetry/history")
+async def telemetry_history_api(
+    equipment_id: str,
+    since: datetime,
+    until: datetime = Query(None),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_active_user)
+):
+    """One device's readings in [since, until), from the table and the cold archive alike."""
+    until = until or datetime.now()
+    if until <= since or until - since > timedelta(days=settings.TELEMETRY_HISTORY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range must be positive and at most {settings.TELEMETRY_HISTORY_MAX_DAYS} days")
+    if db.get(Equipment, equipment_id) is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    timestamps, temperature, vibration = telemetry_history(db, equipment_id, since, until)
+    return FastJSONResponse(content={
+        "equipment_id": equipment_id,
+        "count": len(timestamps),
+        # Local time without offset, like the stored timestamps
+        "ts": np.datetime_as_string(timestamps.astype("datetime64[us]"), unit="ms").tolist(),
+        "temperature": _values(temperature),
+        "vibration": _values(vibration),
+    })
@@ -7,6 +7,11 @@ from app.db.session import get_db
 from app.routers.deps import get_current_active_user, get_manager_user
 from app.models.warehouse import WarehouseItem
 from app.models.user import User
+from app.core.stock import receive_stock, ship_stock, StockConflictError
+from app.core.reference_data import reference_data
+from app.core.list_rows import warehouse_rows
+from app.core.config import settings
+from app.core.valuation import warehouse_valuation, valuation_by_product, valuation_history
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -14,18 +19,25 @@ templates = Jinja2Templates(directory="app/templates")
 @router.get("/warehouse", response_class=HTMLResponse)
 async def list_warehouse(
     request: Request, 
+    valuation_days: int = 30,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_active_user)
 ):
-    items = db.query(WarehouseItem).all()
-    # Calculate total value per item for display
-    for item in items:
-        item.total_value = item.quantity * item.price
-        
+    if valuation_days not in settings.VALUATION_HISTORY_RANGES:
+        valuation_days = settings.VALUATION_HISTORY_RANGES[1]
+    # Chart reads snapshots only; current figures come from the running totals
+    history_times, history_series = valuation_history(db, valuation_days)
     return templates.TemplateResponse("warehouse.html", {
         "request": request,
         "user": user,
-        "items": items
+        "items": warehouse_rows(db),
+        "products": reference_data.get(db).products,
+        "valuation": warehouse_valuation.current(db),
+        "top_products": valuation_by_product(db, limit=5),
+        "valuation_days": valuation_days,
+        "valuation_ranges": settings.VALUATION_HISTORY_RANGES,
+        "history_labels": [t.strftime("%d.%m %H:%M") for t in history_times],
+        "history_series": history_series
     })
 
 @router.post("/warehouse")
@@ -44,25 +56,22 @@ async def add_warehouse_item(
     if price < 0:
         return RedirectResponse(url="/warehouse?error=Цена+не+может+быть+отрицательной", status_code=303)
 
-    item = db.query(WarehouseItem).filter(WarehouseItem.product_code == product_code).first()
-    if item:
-        # Weighted average price calculation (Moving Average)
-        total_old = item.quantity * item.price
-        total_new = quantity * price
-        item.quantity += quantity
-        item.price = (total_old + total_new) / item.quantity
-    else:
-        new_item = WarehouseItem(
+    try:
+        receive_stock(
+            db,
             product_code=product_code,
-            product_name=product_name,
             quantity=quantity,
             price=price,
+            product_name=product_name,
             unit=unit,
             location=location
         )
-        db.add(new_item)
-    
+    except StockConflictError:
+        db.rollback()
+        return RedirectResponse(url="/warehouse?error=Остаток+изменяется+другим+пользователем,+повторите+попытку", status_code=303)
+
     db.commit()
+    reference_data.note_product(db, product_code, product_name)
     return RedirectResponse(url="/warehouse", status_code=303)
 
 @router.post("/warehouse/{item_id}/ship")
@@ -75,12 +84,12 @@ async def ship_warehouse_item(
     if amount <= 0:
         return RedirectResponse(url="/warehouse?error=Нельзя+списать+отрицательное+количество+или+ноль", status_code=303)
 
-    item = db.query(WarehouseItem).filter(WarehouseItem.id == item_id).first()
-    if item:
-        if item.quantity >= amount:
-            item.quantity -= amount
-            db.commit()
-        else:
-            return RedirectResponse(url=f"/warehouse?error=Ошибка:+На+складе+всего+{item.quantity}+ед.", status_code=303)
-            
+    # Conditional decrement: never goes negative, never loses a concurrent shipment
+    if ship_stock(db, item_id, amount):
+        db.commit()
+    else:
+        available = db.query(WarehouseItem.quantity).filter(WarehouseItem.id == item_id).scalar()
+        if available is not None:
+            return RedirectResponse(url=f"/warehouse?error=Ошибка:+На+складе+всего+{available}+ед.", status_code=303)
+
     return RedirectResponse(url="/warehouse", status_code=303)
@@ -0,0 +1,51 @@
+// Global typeahead: /api/search as you type, results under the sidebar box
+(function () {
+    const input = document.getElementById('globalSearch');
+    const list = document.getElementById('globalSearchResults');
+    if (!input || !list) return;
+
+    const icons = { equipment: 'fa-cogs', order: 'fa-clipboard-list', product: 'fa-box', enterprise: 'fa-building' };
+    let timer = null;
+    let latest = 0;
+
+    function render(results) {
+        list.replaceChildren();
+        results.forEach(r => {
+            const link = document.createElement('a');
+            link.href = r.url;
+            link.className = 'list-group-item list-group-item-action py-1 px-2 small';
+            const icon = document.createElement('i');
+            icon.className = `fas ${icons[r.kind] || 'fa-search'} me-2 text-white-50`;
+            const title = document.createElement('span');
+            title.className = 'fw-bold';
+            title.textContent = r.title;
+            link.append(icon, title);
+            if (r.subtitle) {
+                const sub = document.createElement('div');
+                sub.className = 'text-white-50 text-truncate';
+                sub.style.fontSize = '0.7rem';
+                sub.textContent = r.subtitle;
+                link.append(sub);
+            }
+            list.append(link);
+        });
+        list.classList.toggle('d-none', !results.length);
+    }
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        const q = input.value.trim();
+        if (q.length < 2) { render([]); return; }
+        timer = setTimeout(() => {
+            const request = ++latest;
+            fetch(`/api/search?q=${encodeURIComponent(q)}&limit=8`)
+                .then(response => response.json())
+                .then(data => { if (request === latest) render(data.results || []); })
+                .catch(err => console.error('Search error:', err));
+        }, 120);
+    });
+    input.addEventListener('keydown', e => {
+        if (e.key === 'Enter' && list.firstElementChild) window.location = list.firstElementChild.href;
+        if (e.key === 'Escape') { input.value = ''; render([]); }
+    });
+})();
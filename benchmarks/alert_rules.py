@@ -0,0 +1,120 @@
+"""
+Alert rules evaluation (app.core.alerts): time per telemetry tick.
+
+Builds an in-memory fleet of N devices over T equipment types and R rules
+(mostly per type, some per tag, a few fleet-wide; threshold and rate rules,
+with durations and hysteresis), then times compile, applying a tick of
+readings for every device, and evaluation alone. Readings drift slowly and a
+small share of devices overheats or recovers each tick. No database is involved.
+
+    python -m benchmarks.alert_rules --devices 100000 --rules 1000
+    python -m benchmarks.alert_rules --devices 100000 --rules 1000 --ticks 20
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+# The engine needs no database, but importing the app wires one up
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def _fleet(devices, types):
+    from app.core.reference_data import EquipmentRef
+    return [
+        EquipmentRef(f"eq-{i}", f"EQ-{i:06d}", f"Станок {i}", f"Тип {i % types}", None)
+        for i in range(devices)
+    ]
+
+
+def _rules(count, fleet, types, rng):
+    from app.core.alerts import RuleSpec
+    rules = []
+    for i in range(count):
+        metric = "temperature" if i % 2 == 0 else "vibration"
+        kind = "rate" if i % 5 == 4 else "threshold"
+        base = (90.0 if metric == "temperature" else 8.0) if kind == "threshold" else (20.0 if metric == "temperature" else 3.0)
+        threshold = base * rng.uniform(0.8, 1.2)
+        if i % 50 == 0:
+            tag, type_ = None, None  # Fleet-wide
+        elif i % 10 == 0:
+            tag, type_ = rng.choice(fleet).tag, None
+        else:
+            tag, type_ = None, f"Тип {i % types}"
+        rules.append(RuleSpec(
+            f"rule-{i}", f"Правило {i}", type_, tag, metric, kind, "above",
+            threshold, threshold * 0.9, rng.choice((0.0, 0.0, 10.0, 30.0)), rng.choice(("warning", "critical")),
+        ))
+    return rules
+
+
+def _ticks(fleet, count, now, rng):
+    """Slow random walks; each tick about 0.1% of devices start overheating and as many recover."""
+    temperature = [rng.uniform(40.0, 65.0) for _ in fleet]
+    vibration = [rng.uniform(0.1, 2.5) for _ in fleet]
+    ticks = []
+    for t in range(count):
+        stamp = datetime.fromtimestamp(now + 5 * t)
+        for _ in range(len(fleet) // 1000):
+            i = rng.randrange(len(fleet))
+            temperature[i] += 40.0 if temperature[i] < 70.0 else -40.0
+            vibration[i] += 8.0 if vibration[i] < 5.0 else -8.0
+        latest = {}
+        for i, eq in enumerate(fleet):
+            temperature[i] += rng.uniform(-0.3, 0.3)
+            vibration[i] = max(0.0, vibration[i] + rng.uniform(-0.05, 0.05))
+            latest[eq.id] = (eq.id, stamp, temperature[i], vibration[i])
+        ticks.append(latest)
+    return ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=100_000)
+    parser.add_argument("--rules", type=int, default=1_000)
+    parser.add_argument("--types", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.core.alerts import AlertEngine
+
+    rng = random.Random(1)
+    fleet = _fleet(args.devices, args.types)
+    rules = _rules(args.rules, fleet, args.types, rng)
+    engine = AlertEngine()
+
+    started = time.perf_counter()
+    engine.compile(rules, fleet)
+    compile_seconds = time.perf_counter() - started
+
+    now = time.time()
+    ticks = _ticks(fleet, args.ticks, now, rng)
+    observe, evaluate, raised, cleared = [], [], 0, 0
+    for t, latest in enumerate(ticks):
+        started = time.perf_counter()
+        engine.observe(latest)
+        observe.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        events = engine.tick(now=now + 5 * t)
+        evaluate.append(time.perf_counter() - started)
+        raised += sum(1 for e in events if e.event == "raised")
+        cleared += sum(1 for e in events if e.event == "cleared")
+
+    print(json.dumps({
+        "devices": args.devices,
+        "rules": args.rules,
+        "groups": len(engine._groups),
+        "rule_device_pairs": sum(g.since.size for g in engine._groups),
+        "compile_seconds": round(compile_seconds, 3),
+        "observe_ms": {"median": round(sorted(observe)[len(observe) // 2] * 1000, 1), "max": round(max(observe) * 1000, 1)},
+        "evaluate_ms": {"median": round(sorted(evaluate)[len(evaluate) // 2] * 1000, 1), "max": round(max(evaluate) * 1000, 1)},
+        "raised": raised,
+        "cleared": cleared,
+        "active": len(engine.active()),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Parametric synthetic data generator for sizing and benchmarks.
+
+Bulk-loads enterprises, equipment per site, production orders with operations
+and defects, repair histories, system logs, telemetry history and warehouse
+stock. Rows are inserted with driver-level executemany in chunks, one
+transaction per chunk. The same seed (and anchor date) always gives the same data.
+
+    python -m benchmarks.datagen --db sqlite:///./sizing.db --orders 1000000
+    python -m benchmarks.datagen --db sqlite:///./small.db --enterprises 2 --orders 1000 --logs 5000
+"""
+import argparse
+import json
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.core.security import get_password_hash
+from app.models.enterprise import Enterprise
+from app.models.equipment import Equipment
+from app.models.order import ProductionOrder
+from app.models.operation import ProductionOperation, DefectLog
+from app.models.repair import RepairLog
+from app.models.log import SystemLog
+from app.models.telemetry import TelemetryReading
+from app.models.user import User
+from app.models.warehouse import WarehouseItem
+# Remaining models only need to be imported so their tables exist
+from app.models import rollup, outbox  # noqa: F401
+
+PRODUCTS = [
+    ("RAW-IRON", "Железная руда", 120.0),
+    ("STEEL-BAR", "Стальная заготовка", 850.0),
+    ("COAL-K", "Уголь коксующийся", 95.0),
+    ("PELLET-FE", "Окатыши железорудные", 160.0),
+    ("SLAB-ST3", "Сляб Ст3", 610.0),
+    ("WIRE-65G", "Катанка 65Г", 990.0),
+    ("CONC-FE", "Концентрат железорудный", 140.0),
+    ("SINTER", "Агломерат", 130.0),
+]
+OPERATIONS = ["Подготовка сырья", "Основная обработка", "Термообработка", "Контроль качества", "Упаковка"]
+DEFECT_REASONS = ["Брак сырья", "Нарушение режима", "Поломка оборудования", "Ошибка оператора", "Несоответствие размеров"]
+EQUIPMENT_TYPES = ["heavy_machinery", "processing", "transport"]
+REGIONS = ["Урал", "Сибирь", "Кузбасс", "Карелия", "Кольский п-ов"]
+LOG_ACTIONS = [("LOGIN", "AUTH"), ("CREATE_ORDER", "MES"), ("UPDATE_ORDER", "MES"),
+               ("REPAIR", "EAM"), ("SHIP", "WMS"), ("RECEIPT", "WMS")]
+USERS = [("admin", "admin", "Системный Администратор"),
+         ("manager", "manager", "Иван Петров (Менеджер)"),
+         ("operator", "operator", "Алексей Сидоров (Оператор)")]
+
+
+@dataclass
+class GeneratorConfig:
+    enterprises: int = 10
+    equipment_per_site: int = 50
+    orders: int = 100_000
+    operations_per_order: int = 3
+    defect_rate: float = 0.1            # share of operations with a defect record
+    repairs_per_equipment: int = 5
+    logs: int = 100_000
+    telemetry_points: int = 288         # history samples per equipment
+    telemetry_interval_s: int = 300
+    history_days: int = 365             # orders, repairs and logs are spread over this window
+    seed: int = 42
+    time_ordered_ids: bool = True       # False: random uuid4-style ids, as the app made before
+    chunk: int = 50_000
+    anchor: datetime = None             # "now" of the dataset; defaults to today 00:00
+    password: str = None                # for admin/manager/operator; defaults to the username
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    return value.isoformat(" ", "microseconds")
+
+
+class BulkLoader:
+    """Driver-level executemany in chunks, one transaction per chunk."""
+
+    def __init__(self, engine: Engine, chunk: int):
+        self.engine = engine
+        self.chunk = chunk
+        self.counts = {}
+        self._statements = {}
+
+    def converter(self, column):
+        """Bind conversion for one column (None if values go to the driver as-is)."""
+        dialect = self.engine.dialect
+        # SQLite DateTime's own processor %-formats each field; isoformat() gives the same text much faster
+        if dialect.name == "sqlite" and isinstance(column.type, DateTime):
+            return _sqlite_datetime
+        return column.type.dialect_impl(dialect).bind_processor(dialect)
+
+    def _statement(self, table, columns):
+        key = (table.name, tuple(columns))
+        if key not in self._statements:
+            marker = {"qmark": "?", "format": "%s", "pyformat": "%s"}.get(self.engine.dialect.paramstyle, "?")
+            sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})"
+            processors = [(i, self.converter(table.c[c])) for i, c in enumerate(columns)]
+            self._statements[key] = (sql, [(i, p) for i, p in processors if p is not None])
+        return self._statements[key]
+
+    def insert_many(self, conn, table, columns, rows, converted=False):
+        """
+        Insert within an already open transaction. Pass converted=True when the rows
+        already hold driver values (see converter()), which skips a pass over every row.
+        """
+        if not rows:
+            return
+        sql, processors = self._statement(table, columns)
+        if processors and not converted:
+            prepared = []
+            for row in rows:
+                row = list(row)
+                for i, process in processors:
+                    if row[i] is not None:
+                        row[i] = process(row[i])
+                prepared.append(tuple(row))
+            rows = prepared
+        conn.exec_driver_sql(sql, rows)
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+
+    def load(self, table, columns, rows_iter):
+        rows_iter = iter(rows_iter)
+        while True:
+            chunk = list(islice(rows_iter, self.chunk))
+            if not chunk:
+                break
+            with self.engine.begin() as conn:
+                self.insert_many(conn, table, columns, chunk)
+
+
+def _fast_sqlite(engine: Engine):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=OFF")
+        cur.execute("PRAGMA cache_size=-262144")  # 256 MB: keeps the random-key B-trees in memory
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
+
+class _Generator:
+    def __init__(self, config: GeneratorConfig, loader: BulkLoader):
+        self.cfg = config
+        self.loader = loader
+        self.rnd = random.Random(config.seed)
+        self.anchor = config.anchor or datetime.combine(datetime.now().date(), datetime.min.time())
+        self.span = config.history_days * 86400
+        self.completed_stock = {}
+        self._seq = 0
+
+    def uid(self) -> str:
+        """
+        Seeded (reproducible, unlike uuid4()) and laid out like a UUIDv7: a 48-bit
+        sequence prefix then random bits, so bulk inserts append to the primary key
+        index instead of splitting random pages. Formatted by hand; uuid.UUID is slow here.
+        """
+        if not self.cfg.time_ordered_ids:
+            return self._random_uid()
+        self._seq += 1
+        seq, r = self._seq, self.rnd.getrandbits(76)
+        return "%08x-%04x-7%03x-%04x-%012x" % (
+            seq >> 16, seq & 0xFFFF, r >> 64, 0x8000 | (r >> 48) & 0x3FFF, r & 0xFFFFFFFFFFFF
+        )
+
+    def _random_uid(self) -> str:
+        r = self.rnd.getrandbits(122)
+        return "%08x-%04x-4%03x-%04x-%012x" % (
+            r >> 90, r >> 74 & 0xFFFF, r >> 62 & 0xFFF, 0x8000 | r >> 48 & 0x3FFF, r & 0xFFFFFFFFFFFF
+        )
+
+    def past(self, max_seconds=None) -> datetime:
+        return self.anchor - timedelta(seconds=self.rnd.randint(0, max_seconds or self.span))
+
+    def users(self):
+        t = User.__table__
+        rows = []
+        for username, role, full_name in USERS:
+            pw = get_password_hash(self.cfg.password or username)
+            rows.append((self.uid(), username, pw, role, full_name, True))
+        self.loader.load(t, ["id", "username", "hashed_password", "role", "full_name", "is_active"], rows)
+
+    def enterprises(self):
+        rnd = self.rnd
+        self.enterprise_ids = [self.uid() for _ in range(self.cfg.enterprises)]
+        rows = []
+        for i, eid in enumerate(self.enterprise_ids):
+            kind = "добывающее" if i % 2 == 0 else "перерабатывающее"
+            icon = "🏔️" if kind == "добывающее" else "🏭"
+            rows.append((eid, f"{icon} Предприятие №{i + 1}", kind, rnd.choice(REGIONS), f"Синтетическая площадка {i + 1}"))
+        self.loader.load(Enterprise.__table__, ["id", "name", "type", "region", "description"], rows)
+
+    def equipment(self):
+        rnd = self.rnd
+        self.equipment_ids = []
+        rows = []
+        n = 0
+        for eid in self.enterprise_ids:
+            for _ in range(self.cfg.equipment_per_site):
+                n += 1
+                status = rnd.choices(["operational", "maintenance", "broken"], [90, 6, 4])[0]
+                qid = self.uid()
+                self.equipment_ids.append((qid, status))
+                temp, vib = self._sample(status)
+                rows.append((qid, f"EQ-{n:05d}", f"Агрегат {n}", rnd.choice(EQUIPMENT_TYPES), status,
+                             self.past(30 * 86400), temp, vib, self.anchor, eid))
+        self.loader.load(Equipment.__table__, [
+            "id", "tag", "name", "type", "status", "last_maintenance",
+            "temperature", "vibration", "last_telemetry_update", "enterprise_id"
+        ], rows)
+
+    def _sample(self, status):
+        rnd = self.rnd
+        if status == "operational":
+            return round(rnd.uniform(40.0, 65.0), 1), round(rnd.uniform(0.1, 2.5), 2)
+        if status == "broken":
+            return round(rnd.uniform(80.0, 110.0), 1), round(rnd.uniform(5.0, 15.0), 2)
+        return 0.0, 0.0
+
+    def orders(self):
+        """Orders, their operations and defects; each chunk of orders is one transaction."""
+        rnd, cfg, loader = self.rnd, self.cfg, self.loader
+        order_cols = ["id", "order_number", "product_code", "product_name", "quantity", "price_per_unit",
+                      "due_date", "problem_details", "status", "created_date", "enterprise_id"]
+        op_cols = ["id", "name", "order_id", "status", "start_time", "end_time",
+                   "planned_quantity", "actual_quantity", "defect_quantity"]
+        defect_cols = ["id", "operation_id", "quantity", "reason", "comment", "created_at"]
+
+        # Hot loop: plain random() arithmetic instead of randint/choices, ~4-5 rows per order
+        rand, anchor, span = rnd.random, self.anchor, self.span
+        hour, day = timedelta(hours=1), timedelta(days=1)
+        # Rows are built with driver values directly; a second conversion pass costs ~20%
+        ts = loader.converter(ProductionOrder.__table__.c.created_date) or (lambda v: v)
+        key = loader.converter(ProductionOrder.__table__.c.id)  # COMPACT_KEYS: text -> 16 bytes
+        uid = self.uid if key is None else (lambda: key(self.uid()))
+        enterprise_ids = self.enterprise_ids if key is None else [key(e) for e in self.enterprise_ids]
+        n_ent = len(enterprise_ids)
+        n_products, n_reasons = len(PRODUCTS), len(DEFECT_REASONS)
+        op_names = [OPERATIONS[k % len(OPERATIONS)] for k in range(cfg.operations_per_order)]
+        defect_rate = cfg.defect_rate
+
+        done = 0
+        while done < cfg.orders:
+            n = min(cfg.chunk, cfg.orders - done)
+            orders, ops, defects = [], [], []
+            for i in range(done, done + n):
+                code, name, price = PRODUCTS[int(rand() * n_products)]
+                r = rand()
+                status = "completed" if r < 0.55 else "in_progress" if r < 0.80 else "new" if r < 0.95 else "problem"
+                created = anchor - timedelta(seconds=int(rand() * span))
+                quantity = float(10 + int(rand() * 491))
+                oid = uid()
+                orders.append((
+                    oid, f"PO-G-{i:08d}", code, name, quantity, round(price * (0.9 + 0.2 * rand()), 2),
+                    ts(created + day * (3 + int(rand() * 28))),
+                    "Задержка поставки сырья" if status == "problem" else None,
+                    status, ts(created), enterprise_ids[int(rand() * n_ent)]
+                ))
+                if status == "completed":
+                    self.completed_stock[code] = self.completed_stock.get(code, 0.0) + quantity
+
+                t = created
+                for op_name in op_names:
+                    if status == "completed":
+                        op_status = "completed"
+                    elif status == "new":
+                        op_status = "pending"
+                    else:
+                        r = rand()
+                        op_status = "completed" if r < 0.34 else "in_progress" if r < 0.67 else "pending"
+                    op_id = uid()
+                    if op_status == "pending":
+                        ops.append((op_id, op_name, oid, op_status, None, None, quantity, 0.0, 0.0))
+                        continue
+                    start = t + hour * (1 + int(rand() * 12))
+                    end = start + hour * (1 + int(rand() * 24)) if op_status == "completed" else None
+                    t = end or t
+                    actual = quantity if end else round(quantity * rand(), 1)
+                    start_s, end_s = ts(start), end and ts(end)
+                    defect_qty = 0.0
+                    if rand() < defect_rate:
+                        defect_qty = round(0.5 + rand() * max(quantity * 0.05 - 0.5, 0.0), 1)
+                        defects.append((uid(), op_id, defect_qty, DEFECT_REASONS[int(rand() * n_reasons)], None, end_s or start_s))
+                    ops.append((op_id, op_name, oid, op_status, start_s, end_s, quantity, actual, defect_qty))
+
+            with loader.engine.begin() as conn:
+                loader.insert_many(conn, ProductionOrder.__table__, order_cols, orders, converted=True)
+                loader.insert_many(conn, ProductionOperation.__table__, op_cols, ops, converted=True)
+                loader.insert_many(conn, DefectLog.__table__, defect_cols, defects, converted=True)
+            done += n
+
+    def repairs(self):
+        rnd, cfg = self.rnd, self.cfg
+
+        def rows():
+            for qid, status in self.equipment_ids:
+                t = self.anchor - timedelta(seconds=self.span)
+                for k in range(cfg.repairs_per_equipment):
+                    t += timedelta(hours=rnd.randint(24, max(48, cfg.history_days * 24 // max(cfg.repairs_per_equipment, 1))))
+                    if t >= self.anchor:
+                        break
+                    last = k == cfg.repairs_per_equipment - 1 and status != "operational"
+                    end = None if last else t + timedelta(hours=rnd.randint(2, 72))
+                    yield (self.uid(), qid, t, end, rnd.choice(["Плановое ТО", "Замена подшипника", "Ремонт гидравлики", "Замена ленты"]),
+                           rnd.choice(["Бригада №1", "Бригада №2", "Подрядчик"]), round(rnd.uniform(200, 15000), 2),
+                           "in_progress" if last else "completed")
+                    t = end or t
+
+        self.loader.load(RepairLog.__table__, [
+            "id", "equipment_id", "start_date", "end_date", "description", "performed_by", "cost", "status"
+        ], rows())
+
+    def logs(self):
+        rnd = self.rnd
+
+        def rows():
+            for _ in range(self.cfg.logs):
+                username, role, _ = rnd.choice(USERS)
+                action, module = rnd.choice(LOG_ACTIONS)
+                yield (self.uid(), self.past(), username, role, action, f"Синтетическое событие {action}", module)
+
+        self.loader.load(SystemLog.__table__, ["id", "timestamp", "username", "role", "action", "details", "module"], rows())
+
+    def telemetry(self):
+        cfg = self.cfg
+
+        def rows():
+            for qid, status in self.equipment_ids:
+                for k in range(cfg.telemetry_points, 0, -1):
+                    temp, vib = self._sample(status)
+                    yield (qid, self.anchor - timedelta(seconds=k * cfg.telemetry_interval_s), temp, vib)
+
+        self.loader.load(TelemetryReading.__table__, ["equipment_id", "timestamp", "temperature", "vibration"], rows())
+
+    def warehouse(self):
+        prices = {code: price for code, _, price in PRODUCTS}
+        names = {code: name for code, name, _ in PRODUCTS}
+        rows = [
+            (self.uid(), code, names[code], qty, "т", prices[code], "Основной склад", 0)
+            for code, qty in sorted(self.completed_stock.items())
+        ]
+        self.loader.load(WarehouseItem.__table__, [
+            "id", "product_code", "product_name", "quantity", "unit", "price", "location", "version"
+        ], rows)
+
+
+def generate(database_url: str, config: GeneratorConfig = None) -> dict:
+    """Create tables and load a synthetic dataset. Returns row counts and timings."""
+    config = config or GeneratorConfig()
+    engine = create_engine(database_url)
+    _fast_sqlite(engine)
+    Base.metadata.create_all(engine)
+
+    loader = BulkLoader(engine, config.chunk)
+    gen = _Generator(config, loader)
+    timings = {}
+    for step in ("users", "enterprises", "equipment", "orders", "repairs", "logs", "telemetry", "warehouse"):
+        started = time.perf_counter()
+        getattr(gen, step)()
+        timings[step] = round(time.perf_counter() - started, 3)
+
+    # Derived state the app would otherwise build at startup
+    started = time.perf_counter()
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        from app.core.stock_ledger import backfill_opening_balances
+        from app.core.production_rollup import rebuild_production_rollup
+        backfill_opening_balances(db)
+        rebuild_production_rollup(db)
+    timings["derived"] = round(time.perf_counter() - started, 3)
+    engine.dispose()
+
+    return {"rows": loader.counts, "seconds": timings, "total_seconds": round(sum(timings.values()), 3)}
+
+
+def main():
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="target DATABASE_URL (tables are created if missing)")
+    for field, value in asdict(defaults).items():
+        if field in ("anchor", "password"):
+            continue
+        if isinstance(value, bool):
+            # --flag / --no-flag: type=bool would turn any string, "False" too, into True
+            parser.add_argument(f"--{field.replace('_', '-')}", action=argparse.BooleanOptionalAction, default=value)
+        else:
+            parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--anchor", help="dataset 'now' as YYYY-MM-DD (default: today)")
+    parser.add_argument("--password", help="password for admin/manager/operator (default: username)")
+    args = vars(parser.parse_args())
+
+    database_url = args.pop("db")
+    anchor = args.pop("anchor")
+    config = GeneratorConfig(**args, anchor=datetime.fromisoformat(anchor) if anchor else None)
+    print(json.dumps(generate(database_url, config), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Seeded benchmark datasets, cached as SQLite files under benchmarks/.data/.
+
+    python -m benchmarks.dataset 100000      # build (or reuse) the 100k-order dataset
+
+The data itself comes from benchmarks.datagen; this module only picks
+sizes proportional to the order count and caches the result.
+"""
+import os
+import sys
+
+from benchmarks.datagen import GeneratorConfig, generate
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), ".data")
+BENCH_PASSWORD = "bench"
+
+
+def dataset_path(orders: int) -> str:
+    return os.path.join(DATA_DIR, f"bench_{orders}.db")
+
+
+def config_for(orders: int, seed: int = 42) -> GeneratorConfig:
+    enterprises = max(2, min(50, orders // 2000))
+    equipment = max(5, min(20_000, orders // 50))
+    return GeneratorConfig(
+        enterprises=enterprises,
+        equipment_per_site=max(2, equipment // enterprises),
+        orders=orders,
+        logs=orders,
+        telemetry_points=24,
+        seed=seed,
+        password=BENCH_PASSWORD,
+    )
+
+
+def build(orders: int, seed: int = 42, path: str = None) -> str:
+    """Create the dataset file for `orders` production orders unless it already exists."""
+    path = path or dataset_path(orders)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp = path + ".tmp"
+    for leftover in (tmp, tmp + "-wal", tmp + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    generate(f"sqlite:///{tmp}", config_for(orders, seed))
+    os.replace(tmp, path)
+    return path
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:] or ["1000"]:
+        print(build(int(arg)))
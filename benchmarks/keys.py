@@ -0,0 +1,123 @@
+"""
+Key layout benchmark: text UUID keys (random or time-ordered) vs compact binary keys.
+
+For each variant a dataset is generated into a scratch SQLite file, then the
+script reports load throughput, on-disk size of the order/operation tables
+and their indexes, primary key lookups and a three-table join.
+
+    python -m benchmarks.keys --orders 200000
+    python -m benchmarks.keys --orders 1000000 --lookups 50000
+
+Every variant runs in its own subprocess because COMPACT_KEYS is read from the
+environment at import time.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+VARIANTS = {
+    # name: (COMPACT_KEYS, time-ordered ids)
+    "text-random": ("0", False),
+    "text-ordered": ("0", True),
+    "compact-ordered": ("1", True),
+}
+SIZE_OBJECTS = {
+    "production_orders": "orders table",
+    "production_operations": "operations table",
+    "sqlite_autoindex_production_orders_1": "orders pk",
+    "sqlite_autoindex_production_operations_1": "operations pk",
+}
+
+
+def _sizes(db_file):
+    import sqlite3
+    conn = sqlite3.connect(db_file)
+    try:
+        pages = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except sqlite3.OperationalError:
+        pages = {}  # SQLite built without dbstat
+    conn.close()
+    sizes = {label: pages.get(name) for name, label in SIZE_OBJECTS.items()}
+    sizes["file"] = os.path.getsize(db_file)
+    return {k: round(v / 1024 / 1024, 2) if v is not None else None for k, v in sizes.items()}
+
+
+def _run_variant(db_file, orders, lookups, time_ordered):
+    from sqlalchemy import create_engine, func, select
+    from app.models.enterprise import Enterprise
+    from app.models.operation import ProductionOperation
+    from app.models.order import ProductionOrder
+    from benchmarks.datagen import GeneratorConfig, generate
+
+    config = GeneratorConfig(
+        enterprises=20, equipment_per_site=20, orders=orders, logs=0, telemetry_points=0,
+        time_ordered_ids=time_ordered
+    )
+    generated = generate(f"sqlite:///{db_file}", config)
+    rows = sum(generated["rows"].get(t, 0) for t in ("production_orders", "production_operations", "defect_logs"))
+    result = {
+        "load_seconds": generated["seconds"]["orders"],
+        "load_rows_per_s": round(rows / generated["seconds"]["orders"]),
+        "size_mb": _sizes(db_file),
+    }
+
+    engine = create_engine(f"sqlite:///{db_file}")
+    orders_t, ops_t, ent_t = ProductionOrder.__table__, ProductionOperation.__table__, Enterprise.__table__
+    with engine.connect() as conn:
+        ids = [r[0] for r in conn.execute(select(orders_t.c.id))]
+        sample = random.Random(1).sample(ids, min(lookups, len(ids)))
+        lookup = select(orders_t.c.status, orders_t.c.quantity)
+        started = time.perf_counter()
+        for oid in sample:
+            conn.execute(lookup.where(orders_t.c.id == oid)).first()
+        elapsed = time.perf_counter() - started
+        result["pk_lookups_per_s"] = round(len(sample) / elapsed)
+
+        join = select(ent_t.c.region, func.count(), func.sum(ops_t.c.actual_quantity)).select_from(
+            ops_t.join(orders_t, orders_t.c.id == ops_t.c.order_id).join(ent_t, ent_t.c.id == orders_t.c.enterprise_id)
+        ).group_by(ent_t.c.region)
+        started = time.perf_counter()
+        conn.execute(join).all()
+        result["join_seconds"] = round(time.perf_counter() - started, 3)
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=20_000, help="random primary key lookups")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="subset of: " + ", ".join(VARIANTS))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        db_file, time_ordered = args.worker, VARIANTS[os.environ["BENCH_KEY_VARIANT"]][1]
+        print(json.dumps(_run_variant(db_file, args.orders, args.lookups, time_ordered)))
+        return
+
+    results = {}
+    for name in args.variants.split(","):
+        compact, _ = VARIANTS[name]
+        scratch = tempfile.mkdtemp(prefix="keys_")
+        try:
+            env = dict(os.environ, COMPACT_KEYS=compact, BENCH_KEY_VARIANT=name)
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.keys", "--worker", os.path.join(scratch, "keys.db"),
+                 "--orders", str(args.orders), "--lookups", str(args.lookups)],
+                env=env, capture_output=True, text=True, check=True
+            )
+            results[name] = json.loads(out.stdout.strip().splitlines()[-1])
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
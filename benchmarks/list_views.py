@@ -0,0 +1,113 @@
+"""
+List view loading: full ORM instances vs column-projection rows (app.core.list_rows).
+
+Generates a scratch SQLite dataset with N orders and N warehouse items, then
+loads both lists each way and reports rows/s and peak Python memory
+(tracemalloc) per variant.
+
+    python -m benchmarks.list_views --rows 100000
+    python -m benchmarks.list_views --rows 100000 --repeat 5
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+
+def _measure(load, repeat):
+    # Memory on a separate run: tracemalloc slows allocation-heavy code down a lot
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        rows = load()
+        timings.append(time.perf_counter() - started)
+        count = len(rows)
+        del rows
+    gc.collect()
+    tracemalloc.start()
+    rows = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    best = min(timings)
+    return {
+        "rows": count,
+        "best_seconds": round(best, 3),
+        "rows_per_s": round(count / best) if best else None,
+        "peak_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def _seed(db_file, rows):
+    from sqlalchemy import create_engine
+    from app.models.warehouse import WarehouseItem
+    from benchmarks.datagen import BulkLoader, GeneratorConfig, generate
+
+    generate(f"sqlite:///{db_file}", GeneratorConfig(
+        enterprises=10, equipment_per_site=10, orders=rows, logs=0, telemetry_points=0
+    ))
+    engine = create_engine(f"sqlite:///{db_file}")
+    loader = BulkLoader(engine, 50_000)
+    loader.load(WarehouseItem.__table__, [
+        "id", "product_code", "product_name", "quantity", "unit", "price", "location", "version"
+    ], (
+        (str(uuid.UUID(int=1 << 127 | i)), f"BENCH-{i:08d}", f"Позиция {i}", float(i % 997), "т", 10.0 + i % 89, "Основной склад", 0)
+        for i in range(rows)
+    ))
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="orders and warehouse items to generate")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="lists_")
+    db_file = os.path.join(scratch, "lists.db")
+    # Before any app import: settings and the engine are bound at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    try:
+        _seed(db_file, args.rows)
+        from app.db.session import SessionLocal
+        from app.models.order import ProductionOrder
+        from app.models.warehouse import WarehouseItem
+        from app.core.list_rows import order_rows, warehouse_rows
+
+        def orm_orders():
+            with SessionLocal() as db:
+                return db.query(ProductionOrder).order_by(ProductionOrder.created_date.desc()).all()
+
+        def orm_warehouse():
+            # What list_warehouse used to do, including the per-instance derived field
+            with SessionLocal() as db:
+                items = db.query(WarehouseItem).all()
+                for item in items:
+                    item.total_value = item.quantity * item.price
+                return items
+
+        def row_orders():
+            with SessionLocal() as db:
+                return order_rows(db)
+
+        def row_warehouse():
+            with SessionLocal() as db:
+                return warehouse_rows(db)
+
+        results = {
+            "orders": {"orm": _measure(orm_orders, args.repeat), "rows": _measure(row_orders, args.repeat)},
+            "warehouse": {"orm": _measure(orm_warehouse, args.repeat), "rows": _measure(row_warehouse, args.repeat)},
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Batch order intake (app.core.order_intake): orders per second and numbering.
+
+Several threads each submit batches of orders (with initial operations)
+against a scratch SQLite file, each batch in its own transaction, the way
+concurrent POST /orders/batch requests do. At the end every order number must
+be unique and every order must have its operations. For comparison, prints
+how many duplicates the old numbering (date + 4 hex digits of a UUID) gives
+for the same number of orders in one day.
+
+    python -m benchmarks.order_intake --threads 4 --batches 20 --batch-size 1000
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+_fd, _path = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--batches", type=int, default=20, help="per thread")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=3, help="per order")
+    args = parser.parse_args()
+
+    from sqlalchemy import func
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models import enterprise, equipment, order, operation, repair, rollup, resource_version, sequence  # noqa: F401
+    from app.models.enterprise import Enterprise
+    from app.models.order import ProductionOrder
+    from app.models.operation import ProductionOperation
+    from app.core.order_intake import intake_orders
+    from app.core.reference_data import load_reference_data
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add_all([Enterprise(name=f"Предприятие №{i}", type="перерабатывающее") for i in range(5)])
+        db.commit()
+        ref = load_reference_data(db, 1)
+    enterprise_ids = list(ref.enterprise_by_id)
+
+    def batch(n):
+        return [{
+            "product_code": f"P-{i % 50:03d}",
+            "product_name": f"Изделие {i % 50}",
+            "quantity": 10.0 + i % 90,
+            "price_per_unit": 100.0,
+            "enterprise_id": enterprise_ids[i % len(enterprise_ids)],
+            "due_date": "2030-01-15",
+            "operations": [{"name": f"Операция {k + 1}", "planned_quantity": 10.0} for k in range(args.operations)],
+        } for i in range(n)]
+
+    errors, timings = [], []
+    barrier = threading.Barrier(args.threads)
+
+    def worker():
+        payloads = [batch(args.batch_size) for _ in range(args.batches)]
+        barrier.wait()
+        for payload in payloads:
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                intake_orders(db, payload, ref)
+                db.commit()
+                timings.append(time.perf_counter() - started)
+            except Exception as e:  # noqa: BLE001 - reported below
+                errors.append(repr(e))
+                db.rollback()
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        orders = db.query(func.count(ProductionOrder.id)).scalar()
+        numbers = db.query(func.count(func.distinct(ProductionOrder.order_number))).scalar()
+        operations = db.query(func.count(ProductionOperation.id)).scalar()
+
+    legacy = [uuid.uuid4().hex[:4] for _ in range(orders)]
+    timings.sort()
+    print(json.dumps({
+        "orders": orders,
+        "distinct_numbers": numbers,
+        "operations": operations,
+        "orders_per_second": round(orders / elapsed),
+        "batch_ms": {"median": round(timings[len(timings) // 2] * 1000, 1), "max": round(timings[-1] * 1000, 1)} if timings else None,
+        "errors": errors[:5],
+        "legacy_duplicate_numbers": len(legacy) - len(set(legacy)),
+    }, indent=2))
+    os.unlink(_path)
+
+
+if __name__ == "__main__":
+    main()
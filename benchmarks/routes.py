@@ -0,0 +1,196 @@
+"""
+In-process load test for the core routes.
+
+Drives the FastAPI app through an ASGI client with concurrent virtual users
+against seeded datasets, reports throughput and p50/p95/p99 latency per route
+as JSON, and optionally compares against a stored baseline.
+
+    python -m benchmarks.routes --sizes 1000,100000 --users 8 --requests 200
+    python -m benchmarks.routes --sizes 1000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.routes --sizes 1000 --baseline benchmarks/baseline.json   # exit 1 on regression
+
+Each dataset size runs in its own subprocess on a scratch copy of the dataset,
+because the app binds its engine to DATABASE_URL at import time.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROUTES = {
+    "dashboard": ("GET", "/"),
+    "telemetry": ("GET", "/api/telemetry"),
+    "login": ("POST", "/auth/login"),
+    "orders": ("GET", "/orders"),
+    "equipment": ("GET", "/equipment"),
+    # JSON API counterparts of the HTML lists; *_304 repeats the poll with If-None-Match
+    "api_orders": ("GET", "/api/v1/orders?limit=1000"),
+    "api_orders_304": ("GET", "/api/v1/orders?limit=1000"),
+    "api_equipment": ("GET", "/api/v1/equipment?limit=1000"),
+    "order_complete": ("POST", "/orders/{order_id}/status"),
+}
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+
+async def _run_in_process(routes, users, requests_per_route):
+    import httpx
+    from app.main import app
+    from app.db.session import SessionLocal
+    from app.models.order import ProductionOrder
+    from benchmarks.dataset import BENCH_PASSWORD
+
+    db = SessionLocal()
+    completable = [
+        oid for (oid,) in db.query(ProductionOrder.id).filter(
+            ProductionOrder.status == "in_progress"
+        ).limit(requests_per_route).all()
+    ]
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    clients = []
+    for _ in range(users):
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+        await client.post("/auth/login", data={"username": "manager", "password": BENCH_PASSWORD})
+        clients.append(client)
+
+    etags = {}
+    for name in routes:
+        if name.endswith("_304"):
+            response = await clients[0].get(ROUTES[name][1])
+            etags[name] = response.headers.get("etag")
+
+    results = {}
+    for name in routes:
+        method, path = ROUTES[name]
+        remaining = [requests_per_route]
+        latencies, errors = [], [0]
+
+        async def virtual_user(client):
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                url, data, headers = path, None, None
+                if name == "order_complete":
+                    if not completable:
+                        return
+                    url = path.format(order_id=completable.pop())
+                    data = {"status": "completed"}
+                elif name == "login":
+                    data = {"username": "operator", "password": BENCH_PASSWORD}
+                elif name in etags:
+                    headers = {"If-None-Match": etags[name]}
+                started = time.perf_counter()
+                response = await client.request(method, url, data=data, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors[0] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(c) for c in clients))
+        results[name] = summarize(latencies, errors[0], time.perf_counter() - started)
+
+    for client in clients:
+        await client.aclose()
+    return results
+
+
+def run_size(size, routes, users, requests_per_route):
+    """Seed (or reuse) the dataset, copy it to scratch and benchmark it in a subprocess."""
+    from benchmarks.dataset import build
+    source = build(size)
+    scratch_dir = tempfile.mkdtemp(prefix="bench_")
+    scratch = os.path.join(scratch_dir, "bench.db")
+    shutil.copyfile(source, scratch)
+    try:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{scratch}")
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.routes", "--worker",
+             "--routes", ",".join(routes), "--users", str(users), "--requests", str(requests_per_route)],
+            env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """List regressions: p95 slower or throughput lower than baseline beyond `tolerance`."""
+    regressions = []
+    for size, routes in results.items():
+        for route, cur in routes.items():
+            base = baseline.get(size, {}).get(route)
+            if not base:
+                continue
+            if base.get("p95_ms") and cur.get("p95_ms") and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{size}/{route}: p95 {cur['p95_ms']}ms > baseline {base['p95_ms']}ms")
+            if base.get("throughput_rps") and cur.get("throughput_rps") and cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{size}/{route}: {cur['throughput_rps']} rps < baseline {base['throughput_rps']} rps")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000", help="comma-separated dataset sizes (orders), e.g. 1000,100000,1000000")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated subset of: " + ", ".join(ROUTES))
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this results file and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown vs baseline")
+    parser.add_argument("--save-baseline", help="store the results as the new baseline")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    routes = [r for r in args.routes.split(",") if r]
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_run_in_process(routes, args.users, args.requests))))
+        return
+
+    results = {size: run_size(int(size), routes, args.users, args.requests) for size in args.sizes.split(",")}
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Global search index (app.core.search_index): build time, memory and query latency.
+
+Builds an in-memory index of N orders, M equipment units, P products and a
+few enterprises from synthetic rows (the same document builders the app uses,
+no database), then times typeahead queries: two-character prefixes, growing
+prefixes of order numbers and tags, substrings of product names, and misses.
+Finally times incremental writes (insert, rename) against the built index.
+
+    python -m benchmarks.search_index --orders 1000000 --equipment 100000
+"""
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+
+# The index needs no database, but importing the app wires one up
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+WORDS = ("Вал", "Шестерня", "Корпус", "Фланец", "Втулка", "Кронштейн", "Муфта", "Рама", "Крышка", "Ось")
+GRADES = ("стальной", "чугунный", "литой", "кованый", "сварной")
+
+
+def _changes(args, rng):
+    from app.core.search_index import enterprise_doc, equipment_doc, order_doc, product_doc
+    products = [(f"PRD-{i:05d}", f"{rng.choice(WORDS)} {rng.choice(GRADES)} {i}") for i in range(args.products)]
+    changes = [enterprise_doc(f"ent-{i}", f"Предприятие №{i}", "Урал") for i in range(20)]
+    changes += [equipment_doc(f"eq-{i}", f"EQ-{i:06d}", f"Станок {rng.choice(WORDS).lower()} {i}") for i in range(args.equipment)]
+    for i in range(args.orders):
+        code, name = products[rng.randrange(len(products))]
+        changes.append(order_doc(f"ord-{i}", f"PO-{2024 + i % 3}-{i:08d}", code, name))
+    changes += [product_doc(code, name) for code, name in products]
+    return changes
+
+
+def _queries(args, rng):
+    queries = []
+    for _ in range(50):
+        number = f"po-{2024 + rng.randrange(3)}-{rng.randrange(args.orders):08d}"
+        queries += [number[:k] for k in (2, 4, 7, 10, 13, len(number))]
+        tag = f"eq-{rng.randrange(args.equipment):06d}"
+        queries += [tag[:k] for k in (3, 5, 7, len(tag))]
+        queries += [rng.choice(WORDS).lower()[:4], rng.choice(GRADES)[1:5], f"prd-{rng.randrange(args.products):05d}"[:7]]
+        queries.append("нет такого")
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--equipment", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.core.search_index import SearchIndex, equipment_doc, order_doc
+
+    rng = random.Random(1)
+    changes = _changes(args, rng)
+    tracemalloc.start(1)
+    started = time.perf_counter()
+    index = SearchIndex()
+    for i in range(0, len(changes), 10_000):
+        index.apply(changes[i:i + 10_000])
+    build_seconds = time.perf_counter() - started
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del changes
+
+    queries = _queries(args, rng)
+    for q in queries[:50]:
+        index.search(q, args.limit)  # Warm up
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        index.search(q, args.limit)
+        timings.append((time.perf_counter() - started, q))
+    timings.sort()
+    ms = [t * 1000 for t, _ in timings]
+
+    writes = []
+    for i in range(1000):
+        change = order_doc(f"new-{i}", f"PO-2026-{i:08d}", "PRD-00001", "Вал стальной 1") if i % 2 else \
+            equipment_doc(f"eq-{i}", f"EQ-{i:06d}", f"Станок переименован {i}")
+        started = time.perf_counter()
+        index.apply([change])
+        writes.append(time.perf_counter() - started)
+    writes.sort()
+
+    print(json.dumps({
+        "documents": len(index),
+        "trigrams": len(index._postings),
+        "build_seconds": round(build_seconds, 2),
+        "index_mb": round(index_bytes / 2**20, 1),
+        "queries": len(ms),
+        "query_ms": {
+            "median": round(ms[len(ms) // 2], 3),
+            "p99": round(ms[int(len(ms) * 0.99)], 3),
+            "max": round(ms[-1], 3),
+        },
+        "slowest_query": timings[-1][1],
+        "write_us": {"median": round(writes[len(writes) // 2] * 1e6, 1), "max": round(writes[-1] * 1e6, 1)},
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Multi-threaded stress benchmark for warehouse stock moves.
+
+Many workers ship (and optionally receive) the same item concurrently against a
+scratch SQLite file. At the end the on-hand quantity must equal
+initial - shipped + received exactly, i.e. zero lost updates.
+
+    python -m benchmarks.stock_contention --threads 16 --ops 500
+    python -m benchmarks.stock_contention --legacy   # old read-modify-write, for comparison
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.warehouse import WarehouseItem
+from app.core.stock import receive_stock, ship_stock
+
+
+def legacy_ship(db, item_id, amount):
+    # The pre-atomic implementation: read in Python, write back
+    item = db.query(WarehouseItem).filter(WarehouseItem.id == item_id).first()
+    if item and item.quantity >= amount:
+        item.quantity -= amount
+        return True
+    return False
+
+
+def run(threads: int, ops: int, receive_every: int, legacy: bool) -> dict:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 60}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    initial = float(threads * ops)  # enough for every shipment to succeed
+    with Session() as db:
+        item = WarehouseItem(product_code="BENCH", product_name="Bench item", quantity=initial, price=10.0)
+        db.add(item)
+        db.commit()
+        item_id = item.id
+
+    shipped = [0] * threads
+    received = [0] * threads
+    errors = []
+    ship = legacy_ship if legacy else ship_stock
+    barrier = threading.Barrier(threads)
+
+    def worker(n):
+        db = Session()
+        try:
+            barrier.wait()
+            for i in range(ops):
+                if ship(db, item_id, 1.0):
+                    shipped[n] += 1
+                if receive_every and i % receive_every == 0:
+                    receive_stock(db, "BENCH", 1.0, 12.0)
+                    received[n] += 1
+                db.commit()
+        except Exception as e:
+            errors.append(repr(e))
+            db.rollback()
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    with Session() as db:
+        final = db.query(WarehouseItem.quantity).filter(WarehouseItem.id == item_id).scalar()
+    engine.dispose()
+    os.remove(path)
+
+    expected = initial - sum(shipped) + sum(received)
+    return {
+        "mode": "legacy" if legacy else "atomic",
+        "threads": threads,
+        "ops_per_thread": ops,
+        "shipments": sum(shipped),
+        "receipts": sum(received),
+        "final_quantity": final,
+        "expected_quantity": expected,
+        "lost_updates": int(round(final - expected)),
+        "errors": errors[:5],
+        "elapsed_s": round(elapsed, 3),
+        "shipments_per_s": round(sum(shipped) / elapsed, 1) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=250, help="shipments per thread")
+    parser.add_argument("--receive-every", type=int, default=10, help="interleave a receipt every N ops (0 = never)")
+    parser.add_argument("--legacy", action="store_true", help="use the old read-modify-write shipment")
+    args = parser.parse_args()
+
+    result = run(args.threads, args.ops, args.receive_every, args.legacy)
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(1 if result["lost_updates"] or result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
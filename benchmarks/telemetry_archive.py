@@ -0,0 +1,189 @@
+"""
+Cold telemetry archive (app.core.telemetry_archive) against the row table.
+
+Fills a scratch SQLite file with readings every --interval seconds (a few ms
+of jitter, temperature as a random walk rounded like ingestion does) for
+--devices devices over --days whole days, then measures on the table:
+
+- bytes: pages of telemetry_readings and its index (dbstat, or the file size);
+- full scan: every reading read back, rows per second;
+- range reads: --ranges random (device, --window hours) reads, ms per read;
+
+moves everything into the archive and measures the same on the day files,
+checking that each device's history comes back exactly.
+
+    python -m benchmarks.telemetry_archive --devices 50 --days 3 --interval 5
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_fd, _path = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_path}")
+_archive_dir = tempfile.mkdtemp(suffix="-telemetry-archive")
+
+
+def _table_bytes(engine) -> int:
+    with engine.connect() as conn:
+        try:
+            return conn.exec_driver_sql(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN ('telemetry_readings', 'ix_telemetry_readings_equipment_ts')"
+            ).scalar()
+        except Exception:  # noqa: BLE001 - SQLite built without dbstat
+            return os.path.getsize(_path)
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "median": round(timings[len(timings) // 2] * 1000, 3),
+        "p99": round(timings[int(len(timings) * 0.99)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between readings")
+    parser.add_argument("--ranges", type=int, default=200)
+    parser.add_argument("--window", type=float, default=6.0, help="hours per range read")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    import numpy as np
+    from sqlalchemy import insert, select
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.db.types import new_id
+    from app.models import enterprise, equipment, order, operation, repair  # noqa: F401
+    from app.models.equipment import Equipment
+    from app.models.telemetry import TelemetryReading
+    from app.core.telemetry_archive import TelemetryArchive, archive_telemetry, to_micros
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(args.seed)
+    devices = [new_id() for _ in range(args.devices)]
+    with SessionLocal() as db:
+        db.execute(insert(Equipment), [
+            {"id": device, "tag": f"BENCH-{i:05d}", "name": f"Датчик {i}", "type": "processing", "status": "operational"}
+            for i, device in enumerate(devices)
+        ])
+        db.commit()
+
+    start = datetime.combine(date.today() - timedelta(days=args.days + 1), datetime.min.time())
+    end = start + timedelta(days=args.days)
+    per_device = int(args.days * 86400 / args.interval)
+    loaded = time.perf_counter()
+    with SessionLocal() as db:
+        for device in devices:
+            temperature = rng.uniform(40.0, 90.0)
+            rows = []
+            for i in range(per_device):
+                temperature += rng.gauss(0, 0.05)
+                rows.append({
+                    "equipment_id": device,
+                    "timestamp": start + timedelta(seconds=i * args.interval, microseconds=rng.randint(0, 5000)),
+                    "temperature": round(temperature, 2),
+                    "vibration": round(abs(rng.gauss(1.5, 0.4)), 3),
+                })
+            db.execute(insert(TelemetryReading), rows)
+            db.commit()
+    load_seconds = time.perf_counter() - loaded
+    total = per_device * args.devices
+
+    ranges = []
+    for _ in range(args.ranges):
+        since = start + timedelta(seconds=rng.uniform(0, args.days * 86400 - args.window * 3600))
+        ranges.append((rng.choice(devices), since, since + timedelta(hours=args.window)))
+
+    # -- the table --------------------------------------------------------------------
+    table_bytes = _table_bytes(engine)
+    columns = (TelemetryReading.equipment_id, TelemetryReading.timestamp, TelemetryReading.temperature, TelemetryReading.vibration)
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        scanned = sum(1 for _ in db.execute(select(*columns[1:])))
+        table_scan = time.perf_counter() - started
+
+        table_timings, table_ranges = [], []
+        for device, since, until in ranges:
+            started = time.perf_counter()
+            rows = db.execute(
+                select(*columns[1:]).where(
+                    TelemetryReading.equipment_id == device,
+                    TelemetryReading.timestamp >= since, TelemetryReading.timestamp < until,
+                ).order_by(TelemetryReading.timestamp)
+            ).all()
+            table_timings.append(time.perf_counter() - started)
+            table_ranges.append(rows)
+
+        sample = devices[0]
+        expected = db.execute(
+            select(*columns[1:]).where(TelemetryReading.equipment_id == sample).order_by(TelemetryReading.timestamp)
+        ).all()
+
+    # -- the archive ------------------------------------------------------------------
+    archive = TelemetryArchive(_archive_dir)
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        moved = archive_telemetry(db, end.date(), archive)
+        archive_seconds = time.perf_counter() - started
+    archive_bytes = archive.size()
+
+    started = time.perf_counter()
+    archived = 0
+    for day in archive.days():
+        for _, (timestamps, _, _) in archive.day(day).read():
+            archived += len(timestamps)
+    archive_scan = time.perf_counter() - started
+
+    archive_timings, mismatched_ranges = [], 0
+    for (device, since, until), rows in zip(ranges, table_ranges):
+        started = time.perf_counter()
+        timestamps, temperature, vibration = archive.read_range(device, since, until)
+        archive_timings.append(time.perf_counter() - started)
+        if len(timestamps) != len(rows) or (rows and to_micros(rows[0][0]) != timestamps[0]):
+            mismatched_ranges += 1
+
+    timestamps, temperature, vibration = archive.read_range(sample, start, end)
+    exact = (
+        len(timestamps) == len(expected)
+        and np.array_equal(timestamps, [to_micros(r[0]) for r in expected])
+        and np.array_equal(temperature, [r[1] for r in expected])
+        and np.array_equal(vibration, [r[2] for r in expected])
+    )
+
+    print(json.dumps({
+        "readings": total,
+        "load_seconds": round(load_seconds, 1),
+        "table": {
+            "bytes": table_bytes,
+            "bytes_per_reading": round(table_bytes / total, 2),
+            "scan_rows_per_s": round(scanned / table_scan),
+            "range_read_ms": _percentiles(table_timings),
+        },
+        "archive": {
+            "moved": moved,
+            "archive_seconds": round(archive_seconds, 1),
+            "bytes": archive_bytes,
+            "bytes_per_reading": round(archive_bytes / total, 3),
+            "scan_rows_per_s": round(archived / archive_scan),
+            "range_read_ms": _percentiles(archive_timings),
+        },
+        "compression_ratio": round(table_bytes / archive_bytes, 1),
+        "scan_speedup": round((archived / archive_scan) / (scanned / table_scan), 1),
+        "mismatched_ranges": mismatched_ranges,
+        "sample_device_exact": bool(exact),
+    }, indent=2))
+    os.unlink(_path)
+    shutil.rmtree(_archive_dir)
+
+
+if __name__ == "__main__":
+    main()